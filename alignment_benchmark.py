@@ -0,0 +1,80 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import getopt
+import sys
+import time
+
+import batch_alignment
+import benchmark_corpus
+import word_analysis as ana
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [--block=<block size>]".format(sys.argv[0]))
+    print("compares the time per word pair of the per-pair and the batched alignment on a generated corpus")
+    sys.exit(2)
+
+
+def per_pair(word_pairs):
+    return [ana.WordSubsequenceIntervals(ana.LCSMatrix(word_a, word_b)) for word_a, word_b in word_pairs]
+
+
+def batched(word_pairs, block_size: int):
+    return batch_alignment.batch_subsequence_intervals(word_pairs, block_size)
+
+
+def lcs_matrices_only(word_pairs, block_size: int):
+    for start in range(0, len(word_pairs), block_size):
+        batch_alignment.batch_lcs_matrices(word_pairs[start:start + block_size])
+
+
+def measure(name: str, function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    print("{:<32} {:>10.3f} {:>12.2f}".format(name, seconds, seconds / len(args[0]) * 1e6))
+    return seconds
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size=", "block="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 20000
+    block_size = 256
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "--block":
+            block_size = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    word_pairs = benchmark_corpus.generate_word_pairs(size)
+    if [i.intervals for i in per_pair(word_pairs[:1000])] != [i.intervals for i in batched(word_pairs[:1000], block_size)]:
+        print("error: batched alignment differs from per-pair alignment")
+        sys.exit(1)
+    print("{} word pairs, block size {}".format(len(word_pairs), block_size))
+    print("{:<32} {:>10} {:>12}".format("alignment", "seconds", "us per pair"))
+    measure("per pair (matrix + traceback)", per_pair, word_pairs)
+    measure("batched (matrix + traceback)", batched, word_pairs, block_size)
+    measure("batched matrices only", lcs_matrices_only, word_pairs, block_size)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
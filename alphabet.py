@@ -0,0 +1,79 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+from array import array
+from typing import Iterable, Sequence
+
+# an optional interning layer for the analysis: every letter of the processed words (e.g. decomposed Hangeul jamo) gets
+# a small integer code, so a word becomes a compact int array once and the hot loops compare and index ints. the
+# codes 1..n follow the sorted order of the letters, so sorting codes sorts letters the same way. 0 stands for any
+# letter outside the alphabet.
+
+UNKNOWN = 0
+
+
+class Alphabet:
+
+    def __init__(self, letters: Iterable[str]) -> None:
+        self.__letters = tuple(sorted(set(letters)))
+        if any(len(letter) != 1 for letter in self.__letters):
+            raise ValueError("Alphabet letters must be single characters")
+        self.__codes = {letter: code + 1 for code, letter in enumerate(self.__letters)}
+        self.__typecode = "B" if len(self.__letters) < 2 ** 8 else "H" if len(self.__letters) < 2 ** 16 else "I"
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "Alphabet":
+        letters = set()
+        for word in words:
+            letters.update(word)
+        return cls(letters)
+
+    @property
+    def letters(self) -> Sequence[str]:
+        return self.__letters
+
+    @property
+    def typecode(self) -> str:
+        return self.__typecode
+
+    def code_of(self, letter: str) -> int:
+        return self.__codes.get(letter, UNKNOWN)
+
+    def letter_of(self, code: int) -> str:
+        if not 0 < code <= len(self.__letters):
+            raise ValueError("Code {} does not stand for a letter of the alphabet".format(code))
+        return self.__letters[code - 1]
+
+    def encode(self, word: str) -> array:
+        codes = self.__codes
+        return array(self.__typecode, [codes.get(letter, UNKNOWN) for letter in word])
+
+    def encode_known(self, word: str) -> array:
+        # like encode, but refuses letters outside the alphabet, which would all compare equal as UNKNOWN
+        coded = self.encode(word)
+        if UNKNOWN in coded:
+            raise ValueError("Word <{}> has letters outside the alphabet".format(word))
+        return coded
+
+    def decode(self, codes: Iterable[int]) -> str:
+        return "".join(self.letter_of(code) for code in codes)
+
+    def __len__(self) -> int:
+        return len(self.__letters)
+
+    def __repr__(self) -> str:
+        return "<Alphabet, {} letters>".format(len(self.__letters))
@@ -0,0 +1,106 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import getopt
+import sys
+import time
+
+import benchmark_corpus
+import input_parsing as par
+import training as tr
+import word_analysis as ana
+from alphabet import Alphabet
+from word_features import OrdinalFeatureEncoder
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [--positions=<k>] [<input_file> ...]".format(sys.argv[0]))
+    print("compares the string and the int coded alphabet path of the analysis and the ordinal feature encoding; "
+          "uses a generated corpus if no input file is given")
+    sys.exit(2)
+
+
+def measure(name: str, count: int, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    print("{:<40} {:>10.3f} {:>12.2f}".format(name, seconds, seconds / count * 1e6))
+    return result
+
+
+def lcs_matrices(word_pairs):
+    return [ana.LCSMatrix(word_a, word_b) for word_a, word_b in word_pairs]
+
+
+def intervals(matrices):
+    return [ana.WordSubsequenceIntervals(matrix).intervals for matrix in matrices]
+
+
+def analyze(word_pairs, alphabet=None):
+    return [ana.analyze_word_pair(word_a, word_b, alphabet) for word_a, word_b in word_pairs]
+
+
+def encode_pairs(word_pairs, alphabet: Alphabet):
+    return [(alphabet.encode(word_a), alphabet.encode(word_b)) for word_a, word_b in word_pairs]
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size=", "positions="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 20000
+    positions = 8
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "--positions":
+            positions = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    if len(args) > 0:
+        input_processor = par.CombinedProcessor([par.StripProcessor(), par.HangeulComposer()])
+        word_tuples, _ = tr.read_corpus(args, input_processor)
+    else:
+        word_tuples = benchmark_corpus.generate_word_pairs(size)
+    word_pairs = [word_tuple[:2] for word_tuple in word_tuples if word_tuple[1] != ""]
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    alphabet = measure("build alphabet", len(word_pairs), Alphabet.from_words,
+                       (word for word_pair in word_pairs for word in word_pair))
+    print("{} word pairs, {} letters".format(len(word_pairs), len(alphabet)))
+    print("{:<40} {:>10} {:>12}".format("step", "seconds", "us per item"))
+    coded_pairs = measure("encode word pairs", len(word_pairs), encode_pairs, word_pairs, alphabet)
+    matrices = measure("LCS matrices, strings", len(word_pairs), lcs_matrices, word_pairs)
+    coded_matrices = measure("LCS matrices, int coded", len(word_pairs), lcs_matrices, coded_pairs)
+    string_intervals = measure("intervals, strings", len(word_pairs), intervals, matrices)
+    coded_intervals = measure("intervals, int coded", len(word_pairs), intervals, coded_matrices)
+    transformations = measure("analyze_word_pair, strings", len(word_pairs), analyze, word_pairs)
+    coded_transformations = measure("analyze_word_pair, alphabet", len(word_pairs), analyze, word_pairs, alphabet)
+    encoder = OrdinalFeatureEncoder(positions).fit(base_words)
+    coded_encoder = OrdinalFeatureEncoder(positions, alphabet).fit(base_words)
+    rows = measure("ordinal features, strings", len(base_words), encoder.transform, base_words)
+    coded_rows = measure("ordinal features, alphabet", len(base_words), coded_encoder.transform, base_words)
+    coded_words = [alphabet.encode(word) for word in base_words]
+    measure("ordinal features, words coded before", len(base_words), lambda: [coded_encoder.encode_coded(word) for word in coded_words])
+    if string_intervals != coded_intervals or transformations != coded_transformations or rows != coded_rows:
+        print("error: the int coded path differs from the string path")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,78 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import pickle
+import unittest
+
+import benchmark_corpus
+import input_parsing
+import word_analysis
+from alphabet import Alphabet, UNKNOWN
+from word_features import OrdinalFeatureEncoder
+
+
+class AlphabetTests(unittest.TestCase):
+
+    def test_codes(self) -> None:
+        alphabet = Alphabet.from_words(["liegen", "gelegen"])
+        self.assertEqual("".join(alphabet.letters), "egiln")
+        self.assertEqual(list(alphabet.encode("lieg")), [4, 3, 1, 2])
+        self.assertEqual(alphabet.decode(alphabet.encode("gelegen")), "gelegen")
+        self.assertEqual(alphabet.code_of("x"), UNKNOWN)
+        self.assertEqual(list(alphabet.encode("lax")), [4, UNKNOWN, UNKNOWN])
+        self.assertRaises(ValueError, alphabet.encode_known, "lax")
+        self.assertRaises(ValueError, alphabet.decode, [UNKNOWN])
+        self.assertRaises(ValueError, Alphabet, ["ab"])
+        self.assertEqual(Alphabet(chr(0xac00 + i) for i in range(300)).typecode, "H")
+
+    def test_coded_alignment(self) -> None:
+        composer = input_parsing.HangeulComposer()
+        word_pairs = benchmark_corpus.generate_word_pairs(200, seed=4)
+        word_pairs += [(composer.decompose("먹다"), composer.decompose("먹었다")),
+                       (composer.decompose("생각하다"), composer.decompose("생각해요"))]
+        alphabet = Alphabet.from_words(word for word_pair in word_pairs for word in word_pair)
+        for word_a, word_b in word_pairs:
+            self.assertEqual(word_analysis.align_word_pair(word_a, word_b, alphabet=alphabet).intervals,
+                             word_analysis.align_word_pair(word_a, word_b).intervals)
+            self.assertEqual(word_analysis.analyze_word_pair(word_a, word_b, alphabet),
+                             word_analysis.analyze_word_pair(word_a, word_b))
+        coded = word_analysis.align_word_pair(word_pairs[0][0], word_pairs[0][1], 0, alphabet)
+        self.assertEqual(coded.intervals, word_analysis.align_word_pair(word_pairs[0][0], word_pairs[0][1]).intervals)
+        self.assertRaises(ValueError, word_analysis.analyze_word_pair, "liegen", "\u0142iegen", alphabet)
+
+    def test_ordinal_features(self) -> None:
+        words = [word_a for word_a, _ in benchmark_corpus.generate_word_pairs(300, seed=5)]
+        alphabet = Alphabet.from_words(words)
+        encoder = OrdinalFeatureEncoder(4).fit(words)
+        coded_encoder = OrdinalFeatureEncoder(4, alphabet).fit(words)
+        unseen = ["", "x", "liegenß", "zzzz"]
+        self.assertEqual(coded_encoder.transform(words + unseen), encoder.transform(words + unseen))
+        self.assertEqual(coded_encoder.encode_coded(alphabet.encode(words[0])), encoder.encode(words[0]))
+        for feature in range(encoder.feature_count):
+            self.assertEqual(coded_encoder.describe_split(feature, 1.5), encoder.describe_split(feature, 1.5))
+        restored = pickle.loads(pickle.dumps(coded_encoder))
+        self.assertEqual(restored.transform(words[:10]), encoder.transform(words[:10]))
+        self.assertRaises(ValueError, OrdinalFeatureEncoder(4, Alphabet("ab")).fit, ["abc"])
+
+    def test_encoder_stored_without_alphabet(self) -> None:
+        encoder = OrdinalFeatureEncoder(2).fit(["liegen", "sagen"])
+        state = encoder.__dict__.copy()
+        del state["_OrdinalFeatureEncoder__alphabet"], state["_OrdinalFeatureEncoder__tables"]
+        restored = OrdinalFeatureEncoder.__new__(OrdinalFeatureEncoder)
+        restored.__setstate__(state)
+        self.assertIsNone(restored.alphabet)
+        self.assertEqual(restored.encode("liegen"), encoder.encode("liegen"))
@@ -0,0 +1,92 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import getopt
+import pickle
+import sys
+import time
+
+import benchmark_corpus
+import evaluation
+import input_parsing as par
+import training as tr
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [<input_file> ...]".format(sys.argv[0]))
+    print("compares the decision tree, suffix trie and random forest backends; uses a generated corpus if no input file is given")
+    sys.exit(2)
+
+
+def prediction_latency(model, word_tuples) -> float:
+    # mean seconds per word for classification and transformation, errors included
+    start = time.perf_counter()
+    for word_tuple in word_tuples:
+        try:
+            model.predict_processed(word_tuple[0], [0])
+        except ValueError:
+            pass
+    return (time.perf_counter() - start) / max(len(word_tuples), 1)
+
+
+def benchmark(word_tuples, test_tuples, backend: str) -> None:
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    start = time.perf_counter()
+    encoder, x_data = tr.extract_features(base_words, tr.make_encoder(backend=backend))
+    results = tr.train_targets(word_tuples, x_data, backend=backend)
+    training_time = time.perf_counter() - start
+    start = time.perf_counter()
+    tr.fit_classifier(x_data, results[0][0].labels, backend)
+    fit_time = time.perf_counter() - start
+    model = tr.build_model(par.StripProcessor(), encoder, ["target"], results)
+    print("{:>7} {:>10.3f} {:>10.3f} {:>11} {:>14.1f} {:>9.3f} {:>9.3f}".format(
+        backend,
+        training_time,
+        fit_time,
+        len(pickle.dumps(model)),
+        prediction_latency(model, test_tuples) * 1e6,
+        evaluation.accuracy(model, word_tuples),
+        evaluation.accuracy(model, test_tuples)
+    ))
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 5000
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    if len(args) > 0:
+        input_processor = par.CombinedProcessor([par.StripProcessor(), par.HangeulComposer()])
+        word_tuples, _ = tr.read_corpus(args, input_processor)
+    else:
+        word_tuples = benchmark_corpus.generate_word_pairs(size)
+    training_tuples, test_tuples = evaluation.split_word_tuples(word_tuples)
+    print("{} training and {} test word pairs".format(len(training_tuples), len(test_tuples)))
+    print("{:>7} {:>10} {:>10} {:>11} {:>14} {:>9} {:>9}".format(
+        "backend", "train/s", "fit/s", "model/bytes", "latency/us", "train acc", "test acc"))
+    for backend in tr.BACKENDS:
+        benchmark(training_tuples, test_tuples, backend)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,77 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy
+
+import word_analysis as ana
+
+# computes the LCS matrices of many word pairs at once: a block of pairs is padded into integer coded arrays and the
+# dynamic program advances one row at a time for all pairs of the block. the usual traceback of
+# WordSubsequenceIntervals then runs on each pair's matrix. pairs with a word longer than the linear space threshold
+# (see word_analysis.align_word_pair) are aligned one by one in linear space instead, as a block holding them would need
+# a quadratic matrix per pair. requires numpy.
+
+
+def encode_words(words: Sequence[str], length: int, padding: int) -> numpy.ndarray:
+    codes = numpy.full((len(words), length), padding, dtype=numpy.int64)
+    for k, word in enumerate(words):
+        codes[k, :len(word)] = [ord(c) for c in word]
+    return codes
+
+
+def batch_lcs_matrices(word_pairs: Sequence[Tuple[str, str]]) -> numpy.ndarray:
+    # the matrix of pair k is the upper left (len(word_a) + 1) x (len(word_b) + 1) part of result[k], as the cells
+    # beyond a pair's words never influence the cells within
+    rows = max(len(word_a) for word_a, _ in word_pairs) + 1
+    cols = max(len(word_b) for _, word_b in word_pairs) + 1
+    a = encode_words([word_a for word_a, _ in word_pairs], rows - 1, -1)
+    b = encode_words([word_b for _, word_b in word_pairs], cols - 1, -2)
+    lcs = numpy.empty((len(word_pairs), rows, cols), dtype=numpy.int32)
+    lcs[:, 0, :] = numpy.arange(cols)
+    offsets = numpy.arange(1, cols)
+    for i in range(1, rows):
+        d_edit = lcs[:, i - 1, :-1] + (a[:, i - 1, None] != b)
+        d_delete = lcs[:, i - 1, 1:] + 1
+        best = numpy.minimum(d_edit, d_delete)
+        # insert steps chain along the row: lcs[i][j] = min over k <= j of (best[k] + j - k), with best[0] = i
+        lcs[:, i, 0] = i
+        lcs[:, i, 1:] = numpy.minimum(numpy.minimum.accumulate(best - offsets, axis=1), i) + offsets
+    return lcs
+
+
+def batch_subsequence_intervals(word_pairs: Sequence[Tuple[str, str]], block_size: int = 256,
+                                linear_space_threshold: Optional[int] = None) -> List[ana.WordSubsequenceIntervals]:
+    # pairs of similar lengths are put into the same block to keep padding small; results keep the input order
+    if linear_space_threshold is None:
+        linear_space_threshold = ana.LINEAR_SPACE_THRESHOLD
+    results = [None] * len(word_pairs) # type: List[ana.WordSubsequenceIntervals]
+    order = []
+    for k, (word_a, word_b) in enumerate(word_pairs):
+        if max(len(word_a), len(word_b)) > linear_space_threshold:
+            results[k] = ana.WordSubsequenceIntervals.in_linear_space(word_a, word_b)
+        else:
+            order.append(k)
+    order.sort(key=lambda k: (len(word_pairs[k][0]), len(word_pairs[k][1])))
+    for start in range(0, len(order), block_size):
+        block = order[start:start + block_size]
+        block_pairs = [word_pairs[k] for k in block]
+        lcs = batch_lcs_matrices(block_pairs)
+        for k, (word_a, word_b), matrix in zip(block, block_pairs, lcs):
+            matrix = ana.make_matrix_immutable(matrix[:len(word_a) + 1, :len(word_b) + 1].tolist())
+            results[k] = ana.WordSubsequenceIntervals(ana.LCSMatrix(word_a, word_b, matrix))
+    return results
@@ -0,0 +1,55 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+import batch_alignment
+import benchmark_corpus
+import word_analysis
+
+
+class BatchAlignmentTests(unittest.TestCase):
+
+    WORD_PAIRS = [("liegen", "gelegen"), ("halloh", "hello"), ("fasd", "asdf"), ("a", "b"), ("asdf", "asdf"),
+                  ("schmieren", "geschmiert"), ("생각하다", "생각해요")]
+
+    def test_lcs_matrices(self) -> None:
+        lcs = batch_alignment.batch_lcs_matrices(self.WORD_PAIRS)
+        for (word_a, word_b), matrix in zip(self.WORD_PAIRS, lcs):
+            expected = word_analysis.LCSMatrix(word_a, word_b).matrix
+            self.assertEqual(word_analysis.make_matrix_immutable(matrix[:len(word_a) + 1, :len(word_b) + 1].tolist()), expected)
+
+    def test_subsequence_intervals(self) -> None:
+        word_pairs = self.WORD_PAIRS + benchmark_corpus.generate_word_pairs(500)
+        for block_size in [1, 7, 256]:
+            results = batch_alignment.batch_subsequence_intervals(word_pairs, block_size)
+            self.assertEqual(len(results), len(word_pairs))
+            for (word_a, word_b), intervals in zip(word_pairs, results):
+                expected = word_analysis.WordSubsequenceIntervals(word_analysis.LCSMatrix(word_a, word_b))
+                self.assertEqual((intervals.word_a, intervals.word_b), (word_a, word_b))
+                self.assertEqual(intervals.intervals, expected.intervals)
+
+    def test_long_words_in_linear_space(self) -> None:
+        word_pairs = self.WORD_PAIRS + [("ab" * 100, "ba" * 90 + "c"), ("liegen" * 30, "gelegen" * 30)]
+        for threshold in [None, 5]:
+            results = batch_alignment.batch_subsequence_intervals(word_pairs, linear_space_threshold=threshold)
+            for (word_a, word_b), intervals in zip(word_pairs, results):
+                expected = word_analysis.align_word_pair(word_a, word_b, threshold)
+                self.assertEqual((intervals.word_a, intervals.word_b), (word_a, word_b))
+                self.assertEqual(intervals.intervals, expected.intervals)
+
+    def test_invalid_matrix(self) -> None:
+        self.assertRaises(ValueError, word_analysis.LCSMatrix, "ab", "c", ((0, 1), (1, 1)))
@@ -0,0 +1,70 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import random
+from typing import List, Tuple
+
+# generates German-like verb / past participle pairs with a handful of regular and irregular inflection classes,
+# so that benchmarks and memory tests can run on corpora of arbitrary size
+
+ONSETS = ["b", "br", "d", "f", "fl", "g", "gr", "h", "k", "kl", "kr", "l", "m", "n", "p", "pl", "r", "s", "sch",
+          "schm", "schr", "sp", "st", "str", "t", "tr", "w", "z"]
+VOWELS = ["a", "e", "o", "u", "au", "ei", "ä", "ö", "ü"]
+CODAS = ["b", "ch", "ck", "d", "f", "g", "k", "l", "ll", "m", "n", "p", "r", "s", "ss", "t", "tz"]
+PREFIXES = ["an", "auf", "aus", "ein", "mit", "vor", "zu"]
+
+
+def random_stem(rng: random.Random) -> str:
+    return rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+
+
+def inflect(rng: random.Random) -> Tuple[str, str]:
+    stem = random_stem(rng)
+    onset = rng.choice(ONSETS)
+    kind = rng.random()
+    if kind < 0.45:
+        return stem + "en", "ge" + stem + "t"
+    elif kind < 0.55:
+        return stem + "ieren", stem + "iert"
+    elif kind < 0.65:
+        return onset + "iegen", "ge" + onset + "ogen"
+    elif kind < 0.75:
+        coda = rng.choice(["ng", "nk", "nd"])
+        return onset + "i" + coda + "en", "ge" + onset + "u" + coda + "en"
+    elif kind < 0.85:
+        prefix = rng.choice(PREFIXES)
+        return prefix + stem + "en", prefix + "ge" + stem + "t"
+    elif kind < 0.95:
+        return "be" + stem + "en", "be" + stem + "t"
+    return onset + "eiben", "ge" + onset + "ieben"
+
+
+def generate_word_pairs(count: int, seed: int = 0) -> List[Tuple[str, str]]:
+    # word pairs are unique and the same seed always yields the same corpus
+    rng = random.Random(seed)
+    word_pairs = []
+    seen = set()
+    attempts = 0
+    while len(word_pairs) < count:
+        attempts += 1
+        if attempts > 100 * count:
+            raise ValueError("Cannot generate {} distinct word pairs".format(count))
+        word_pair = inflect(rng)
+        if word_pair[0] in seen:
+            continue
+        seen.add(word_pair[0])
+        word_pairs.append(word_pair)
+    return word_pairs
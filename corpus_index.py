@@ -0,0 +1,123 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Iterator, TextIO, Tuple
+
+# a side file next to a corpus that records the byte offset of every line, so that the corpus can be memory mapped
+# and split into contiguous shards without scanning it again. layout: header (magic, line count, corpus size, corpus
+# modification time in nanoseconds), followed by line count + 1 native unsigned 64 bit offsets, the last one being the
+# corpus size. lines end at b"\n" only; open_corpus reads a whole corpus with the same lines.
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"PYWIDX02"
+INDEX_HEADER = struct.Struct("=8sQQQ")
+
+
+def index_name_of(file_name: str) -> str:
+    return file_name + INDEX_SUFFIX
+
+
+def open_corpus(file_name: str) -> TextIO:
+    # str.splitlines and codecs readers also end lines at "\r", "\x85", "\u2028" and the like, which the index does not
+    return open(file_name, "r", encoding="utf-8", newline="\n")
+
+
+def build_index(file_name: str) -> int:
+    offsets = array('Q', [0])
+    with open(file_name, "rb") as f:
+        modified = os.fstat(f.fileno()).st_mtime_ns
+        for line in f:
+            offsets.append(offsets[-1] + len(line))
+    with open(index_name_of(file_name), "wb") as index_file:
+        index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, len(offsets) - 1, offsets[-1], modified))
+        offsets.tofile(index_file)
+    return len(offsets) - 1
+
+
+def has_index(file_name: str) -> bool:
+    return os.path.exists(index_name_of(file_name))
+
+
+def shard_bounds(line_count: int, shard: int, shard_count: int) -> Tuple[int, int]:
+    if shard_count < 1 or not 0 <= shard < shard_count:
+        raise ValueError("Invalid shard {} of {}".format(shard, shard_count))
+    return line_count * shard // shard_count, line_count * (shard + 1) // shard_count
+
+
+class IndexedCorpus:
+
+    def __init__(self, file_name: str) -> None:
+        self.__file_name = file_name
+        self.__offsets = None
+        self.__corpus_map = b""
+        with open(index_name_of(file_name), "rb") as index_file:
+            self.__index_map = self.__map(index_file)
+        try:
+            with open(file_name, "rb") as f:
+                modified = os.fstat(f.fileno()).st_mtime_ns
+                self.__corpus_map = self.__map(f)
+            if len(self.__index_map) < INDEX_HEADER.size or self.__index_map[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                raise ValueError("<{}> is not a corpus index, rebuild it".format(index_name_of(file_name)))
+            _, line_count, size, indexed_modified = INDEX_HEADER.unpack_from(self.__index_map)
+            if size != len(self.__corpus_map) or indexed_modified != modified:
+                raise ValueError("Index of <{}> is stale, rebuild it".format(file_name))
+            self.__line_count = line_count
+            self.__offsets = memoryview(self.__index_map)[INDEX_HEADER.size:].cast('Q')
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def __map(f) -> mmap.mmap:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def file_name(self) -> str:
+        return self.__file_name
+
+    def __len__(self) -> int:
+        return self.__line_count
+
+    def line(self, i: int) -> str:
+        return self.__corpus_map[self.__offsets[i]:self.__offsets[i + 1]].decode("utf-8")
+
+    def lines(self, start: int = 0, stop: int = None) -> Iterator[str]:
+        stop = self.__line_count if stop is None else min(stop, self.__line_count)
+        for i in range(start, stop):
+            yield self.line(i)
+
+    def shard(self, shard: int, shard_count: int) -> Iterator[str]:
+        return self.lines(*shard_bounds(self.__line_count, shard, shard_count))
+
+    def close(self) -> None:
+        if self.__offsets is not None:
+            self.__offsets.release()
+            self.__offsets = None
+        for mapped in [self.__index_map, self.__corpus_map]:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self) -> "IndexedCorpus":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,93 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import os
+import tempfile
+import unittest
+
+import corpus_index
+from corpus_index import IndexedCorpus, build_index, shard_bounds
+
+
+class IndexedCorpusTests(unittest.TestCase):
+
+    LINES = ["liegen, gelegen\n", "läuten, geläutet\r\n", "\n", "생각하다, 생각해요\n", "sagen, gesagt"]
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__file_name = os.path.join(self.__directory.name, "words.txt")
+        with open(self.__file_name, "w", encoding="utf-8", newline="") as f:
+            f.write("".join(self.LINES))
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def test_lines(self) -> None:
+        self.assertFalse(corpus_index.has_index(self.__file_name))
+        self.assertEqual(build_index(self.__file_name), 5)
+        self.assertTrue(corpus_index.has_index(self.__file_name))
+        with IndexedCorpus(self.__file_name) as corpus:
+            self.assertEqual(len(corpus), 5)
+            self.assertEqual(list(corpus.lines()), self.LINES)
+            self.assertEqual(corpus.line(3), "생각하다, 생각해요\n")
+
+    def test_shards(self) -> None:
+        build_index(self.__file_name)
+        with IndexedCorpus(self.__file_name) as corpus:
+            for shard_count in range(1, 7):
+                lines = []
+                for shard in range(shard_count):
+                    lines += list(corpus.shard(shard, shard_count))
+                self.assertEqual(lines, self.LINES)
+        self.assertEqual(shard_bounds(10, 1, 3), (3, 6))
+        self.assertRaises(ValueError, shard_bounds, 10, 3, 3)
+        self.assertRaises(ValueError, shard_bounds, 10, 0, 0)
+
+    def test_stale_index(self) -> None:
+        build_index(self.__file_name)
+        with open(self.__file_name, "a", encoding="utf-8") as f:
+            f.write("\nmachen, gemacht\n")
+        self.assertRaises(ValueError, IndexedCorpus, self.__file_name)
+        # the same size, but written after the index
+        build_index(self.__file_name)
+        modified = os.stat(self.__file_name).st_mtime_ns
+        with open(self.__file_name, "r+b") as f:
+            f.write(b"L")
+        os.utime(self.__file_name, ns=(modified + 10 ** 9, modified + 10 ** 9))
+        self.assertRaises(ValueError, IndexedCorpus, self.__file_name)
+
+    def test_invalid_index(self) -> None:
+        with open(corpus_index.index_name_of(self.__file_name), "wb") as f:
+            f.write(b"PYWIDX01" + bytes(16))
+        self.assertRaises(ValueError, IndexedCorpus, self.__file_name)
+        build_index(self.__file_name)
+        os.remove(self.__file_name)
+        self.assertRaises(FileNotFoundError, IndexedCorpus, self.__file_name)
+
+    def test_same_lines_as_open_corpus(self) -> None:
+        # separators that str.splitlines would also end a line at
+        with open(self.__file_name, "a", encoding="utf-8", newline="") as f:
+            f.write("\nfragen,\u2028gefragt\rsagen\x85\n")
+        build_index(self.__file_name)
+        with corpus_index.open_corpus(self.__file_name) as f, IndexedCorpus(self.__file_name) as corpus:
+            self.assertEqual(list(corpus.lines()), list(f))
+            self.assertEqual(len(corpus), 6)
+
+    def test_empty_corpus(self) -> None:
+        open(self.__file_name, "w").close()
+        self.assertEqual(build_index(self.__file_name), 0)
+        with IndexedCorpus(self.__file_name) as corpus:
+            self.assertEqual(list(corpus.shard(0, 2)), [])
@@ -0,0 +1,407 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import queue
+import socket
+import time
+from multiprocessing.managers import BaseManager
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import word_analysis as ana
+from training import FOREST_SIZE, WordTuple, count_targets, fit_classifier, select_rows
+from training_data_structures import Cluster, ClusterStore, merge_clusters
+
+# map-reduce training over worker processes on any number of machines. the coordinator serves a task queue and a
+# result queue with a multiprocessing manager over TCP, workers (run_worker, see pywords-worker.py) connect to it and
+# process tasks until they are told to stop:
+# - map: a shard of word tuples is analyzed into the transformation of every (base form, target form) pair
+# - reduce: the coordinator groups the pairs of every target by the join key of their transformation. clusters never
+#   span two keys (see ClusterSet), so groups of keys are clustered independently, each in input order
+# the clusters of all keys are numbered by their first pair, which gives the labels and transformations ClusterSet
+# would give. with merge, the clusters are then merged on the coordinator by merge_clusters, and the trees are fitted on
+# the coordinator. the alignment options of the coordinator are sent with every analyze task. workers report when they
+# start a task; a started task without a result within task_timeout seconds is handed out again, e.g. when its worker
+# was lost, and so are the waiting tasks once no worker reported anything for task_timeout seconds. duplicate results
+# are ignored. workers say HELLO when they connect and acknowledge STOP, so that the coordinator only shuts down once
+# every worker it knows has stopped.
+#
+# the manager unpickles whatever authenticated clients send, so the authkey must be secret: there is no default key.
+
+DEFAULT_PORT = 50607
+STOP = "stop"
+HELLO = "hello"
+STARTED = "started"
+
+AnalyzedShard = List[List[Tuple[int, ana.WordTransformation]]]
+KeyGroup = List[Tuple[int, str, str, ana.WordTransformation]]
+
+
+class AnalyzedPair:
+
+    # a word pair with its transformation, all that Cluster requires of a training element
+
+    def __init__(self, word_a: str, word_b: str, transformation: ana.WordTransformation) -> None:
+        self.word_a = word_a
+        self.word_b = word_b
+        self.transformation = transformation
+
+
+def analyze_shard(first_row: int, word_tuples: Sequence[WordTuple], batch_alignment: bool = False,
+                  linear_space_threshold: Optional[int] = None) -> AnalyzedShard:
+    # per target, the row and transformation of every pair; empty target cells mark missing forms and are left out.
+    # the alignment options are those of training.analyze_word_pairs and word_analysis.align_word_pair
+    target_count = len(word_tuples[0]) - 1
+    analyzed = []
+    for t in range(target_count):
+        rows = [first_row + i for i, word_tuple in enumerate(word_tuples) if word_tuple[t + 1] != ""]
+        pairs = [(word_tuple[0], word_tuple[t + 1]) for word_tuple in word_tuples if word_tuple[t + 1] != ""]
+        if batch_alignment:
+            from batch_alignment import batch_subsequence_intervals # requires numpy
+            intervals = batch_subsequence_intervals(pairs, linear_space_threshold=linear_space_threshold)
+        else:
+            intervals = [ana.align_word_pair(word_a, word_b, linear_space_threshold) for word_a, word_b in pairs]
+        analyzed.append([(row, ana.build_word_transformation(pair_intervals))
+                         for row, pair_intervals in zip(rows, intervals)])
+    return analyzed
+
+
+def cluster_key_groups(groups: Sequence[KeyGroup]) -> List[List[Tuple[ana.WordTransformation, List[int]]]]:
+    # clusters every group of pairs with equal join keys greedily in the given order, like ClusterSet.add
+    results = []
+    for group in groups:
+        clusters = [] # type: List[Cluster]
+        rows = [] # type: List[List[int]]
+        for row, word_a, word_b, transformation in group:
+            pair = AnalyzedPair(word_a, word_b, transformation)
+            for c, cluster in enumerate(clusters):
+                if cluster.add_item(pair):
+                    rows[c].append(row)
+                    break
+            else:
+                clusters.append(Cluster(pair))
+                rows.append([row])
+        results.append([(cluster.transformation, cluster_rows) for cluster, cluster_rows in zip(clusters, rows)])
+    return results
+
+
+TASK_HANDLERS = {"analyze": analyze_shard, "cluster": cluster_key_groups} # type: Dict[str, Callable]
+
+__tasks = queue.Queue()
+__results = queue.Queue()
+
+
+def __task_queue() -> queue.Queue:
+    return __tasks
+
+
+def __result_queue() -> queue.Queue:
+    return __results
+
+
+class TrainingManager(BaseManager):
+    pass
+
+
+TrainingManager.register("tasks", callable=__task_queue)
+TrainingManager.register("results", callable=__result_queue)
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    # "host:port" or "host" for the default port
+    host, _, port = address.rpartition(":")
+    if host == "":
+        return port, DEFAULT_PORT
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ValueError("Invalid address <{}>, expected <host>:<port>".format(address))
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes, connect_timeout: float = 30.0) -> int:
+    # processes tasks of the coordinator at address until it sends STOP; returns the number of processed tasks
+    manager = TrainingManager(address=address, authkey=authkey)
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            manager.connect()
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+    worker = "{}:{}".format(socket.gethostname(), os.getpid())
+    processed = 0
+    try:
+        tasks = manager.tasks()
+        results = manager.results()
+        results.put((None, worker, HELLO, None))
+        while True:
+            task = tasks.get()
+            if task == STOP:
+                # passed on so that every other worker sees it as well
+                tasks.put(STOP)
+                results.put((None, worker, STOP, None))
+                return processed
+            task_id, kind, args = task
+            results.put((task_id, worker, STARTED, None))
+            try:
+                results.put((task_id, worker, TASK_HANDLERS[kind](*args), None))
+            except Exception as e:
+                results.put((task_id, worker, None, "{}: {}".format(type(e).__name__, e)))
+            processed += 1
+    except (EOFError, ConnectionError):
+        # the coordinator has shut down
+        return processed
+
+
+class PhaseStats:
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.tasks = 0
+        self.retries = 0
+        self.seconds = 0.0
+        self.workers = set()
+
+    def __repr__(self) -> str:
+        return "<PhaseStats {}, {} tasks, {} retries, {} workers, {:.2f}s>".format(
+            self.name, self.tasks, self.retries, len(self.workers), self.seconds)
+
+
+class Coordinator:
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes, shard_size: int = 1000, task_timeout: float = 600.0,
+                 stop_timeout: float = 10.0) -> None:
+        if len(authkey) == 0:
+            raise ValueError("Coordinator requires a secret authkey")
+        if shard_size < 1:
+            raise ValueError("Coordinator requires a positive shard size")
+        self.__manager = TrainingManager(address=address, authkey=authkey)
+        self.__shard_size = shard_size
+        self.__task_timeout = task_timeout
+        self.__stop_timeout = stop_timeout
+        self.__next_task = 0
+        self.__tasks = None
+        self.__results = None
+        self.__workers = set()
+        self.__stopped_workers = set()
+        self.__clusters_before_merging = [] # type: List[int]
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        # the address workers connect to; a port of 0 is replaced by the one actually bound after start
+        return self.__manager.address
+
+    @property
+    def workers(self) -> Set[str]:
+        # the workers that have connected, as far as their HELLO has been received
+        return set(self.__workers)
+
+    @property
+    def stopped_workers(self) -> Set[str]:
+        return set(self.__stopped_workers)
+
+    @property
+    def clusters_before_merging(self) -> List[int]:
+        # per target, the number of clusters of the last map_reduce before they were merged
+        return list(self.__clusters_before_merging)
+
+    def start(self) -> "Coordinator":
+        self.__manager.start()
+        self.__tasks = self.__manager.tasks()
+        self.__results = self.__manager.results()
+        return self
+
+    def __note(self, worker: str, message: str) -> None:
+        if message == HELLO:
+            self.__workers.add(worker)
+        elif message == STOP:
+            self.__stopped_workers.add(worker)
+
+    def stop(self) -> None:
+        # waits until every worker that said HELLO has acknowledged STOP, or stop_timeout seconds for lost workers.
+        # results of tasks that were handed out twice may still arrive and are dropped
+        if self.__tasks is None:
+            return
+        self.__tasks.put(STOP)
+        deadline = time.monotonic() + self.__stop_timeout
+        while True:
+            try:
+                task_id, worker, result, _ = self.__results.get_nowait()
+            except queue.Empty:
+                if self.__workers <= self.__stopped_workers:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    task_id, worker, result, _ = self.__results.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if task_id is None:
+                self.__note(worker, result)
+        self.__tasks = None
+        self.__results = None
+        self.__manager.shutdown()
+
+    def __enter__(self) -> "Coordinator":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def __run(self, stats: PhaseStats, kind: str, task_args: Sequence[tuple]) -> list:
+        # hands out the tasks and collects their results in task order. only late tasks are handed out again: a started
+        # one task_timeout seconds after its start, one still waiting once no worker reported anything for as long
+        start = time.perf_counter()
+        pending = dict()
+        for args in task_args:
+            pending[self.__next_task] = (kind, args)
+            self.__tasks.put((self.__next_task, kind, args))
+            self.__next_task += 1
+        order = list(pending)
+        results = dict()
+        deadlines = dict() # type: Dict[int, float]
+        last_report = time.monotonic()
+        while len(pending) > 0:
+            now = time.monotonic()
+            idle = now - last_report >= self.__task_timeout
+            late = [task_id for task_id in pending
+                    if (deadlines[task_id] <= now if task_id in deadlines else idle)]
+            for task_id in late:
+                task_kind, args = pending[task_id]
+                self.__tasks.put((task_id, task_kind, args))
+                deadlines.pop(task_id, None)
+                stats.retries += 1
+            if idle:
+                last_report = now
+            deadline = min([deadlines[task_id] for task_id in pending if task_id in deadlines] +
+                           [last_report + self.__task_timeout])
+            try:
+                task_id, worker, result, error = self.__results.get(timeout=max(deadline - now, 0.0))
+            except queue.Empty:
+                continue
+            last_report = time.monotonic()
+            if task_id is None:
+                self.__note(worker, result)
+                continue
+            if isinstance(result, str) and result == STARTED:
+                if task_id in pending:
+                    deadlines[task_id] = last_report + self.__task_timeout
+                continue
+            if error is not None:
+                raise RuntimeError("Worker {} failed on a {} task: {}".format(worker, kind, error))
+            if task_id in pending:
+                del pending[task_id]
+                results[task_id] = result
+                stats.workers.add(worker)
+        stats.tasks += len(order)
+        stats.seconds += time.perf_counter() - start
+        return [results[task_id] for task_id in order]
+
+    def map_reduce(self, word_tuples: Sequence[WordTuple], batch_alignment: bool = False,
+                   linear_space_threshold: Optional[int] = None, merge: bool = False
+                   ) -> Tuple[List[List[int]], List[List[ana.WordTransformation]], List[List[int]], List[PhaseStats]]:
+        # per target, the cluster label of every pair (in row order, leaving out empty target cells), the cluster
+        # transformations and the cluster sizes. the workers align with the threshold of this process by default
+        if self.__tasks is None:
+            raise ValueError("Coordinator has not been started")
+        if linear_space_threshold is None:
+            linear_space_threshold = ana.LINEAR_SPACE_THRESHOLD
+        target_count = count_targets(word_tuples)
+        map_stats = PhaseStats("analyze")
+        shards = [(start, list(word_tuples[start:start + self.__shard_size]), batch_alignment, linear_space_threshold)
+                  for start in range(0, len(word_tuples), self.__shard_size)]
+        analyzed = self.__run(map_stats, "analyze", shards)
+
+        # shuffle: the pairs of every target grouped by join key, keys in the order of their first pair
+        reduce_stats = PhaseStats("cluster")
+        groups = [dict() for _ in range(target_count)] # type: List[Dict[Tuple[Tuple[str, str], ...], KeyGroup]]
+        for shard_result in analyzed:
+            for t, pairs in enumerate(shard_result):
+                for row, transformation in pairs:
+                    groups[t].setdefault(transformation.join_key, []).append(
+                        (row, word_tuples[row][0], word_tuples[row][t + 1], transformation))
+        task_args = []
+        task_targets = []
+        for t in range(target_count):
+            batch = []
+            size = 0
+            for group in groups[t].values():
+                batch.append(group)
+                size += len(group)
+                if size >= self.__shard_size:
+                    task_args.append((batch,))
+                    task_targets.append(t)
+                    batch = []
+                    size = 0
+            if len(batch) > 0:
+                task_args.append((batch,))
+                task_targets.append(t)
+        clustered = self.__run(reduce_stats, "cluster", task_args)
+
+        all_labels = []
+        all_transformations = []
+        all_sizes = []
+        self.__clusters_before_merging = []
+        for t in range(target_count):
+            clusters = [cluster for target, result in zip(task_targets, clustered) if target == t
+                        for group_clusters in result for cluster in group_clusters]
+            # numbered like ClusterSet, in the order of their first pair
+            clusters.sort(key=lambda cluster: cluster[1][0])
+            label_of = dict()
+            for c, (_, rows) in enumerate(clusters):
+                for row in rows:
+                    label_of[row] = c
+            labels = [label_of[row] for row in sorted(label_of)]
+            transformations = [transformation for transformation, _ in clusters]
+            sizes = [len(rows) for _, rows in clusters]
+            self.__clusters_before_merging.append(len(clusters))
+            if merge:
+                # the pairs of the target in row order, aligned with labels
+                pairs = [AnalyzedPair(word_tuples[row][0], word_tuples[row][t + 1], transformation)
+                         for shard_result in analyzed for row, transformation in shard_result[t]]
+                store = merge_clusters(ClusterStore(pairs, labels, transformations))
+                labels = list(store.labels)
+                transformations = list(store.transformations)
+                sizes = [store.size_of(c) for c in range(len(store))]
+            all_labels.append(labels)
+            all_transformations.append(transformations)
+            all_sizes.append(sizes)
+        return all_labels, all_transformations, all_sizes, [map_stats, reduce_stats]
+
+
+def train_distributed(coordinator: Coordinator,
+                      word_tuples: Sequence[WordTuple],
+                      x_data,
+                      backend: str = "tree",
+                      collapse_duplicates: bool = False,
+                      forest_size: int = FOREST_SIZE,
+                      jobs: int = 1,
+                      batch_alignment: bool = False,
+                      merge: bool = False
+                      ) -> Tuple[List[object], List[List[int]], List[List[ana.WordTransformation]], List[List[int]], List[PhaseStats]]:
+    # analysis and clustering on the workers of a started coordinator, fitting on the features x_data of the base forms
+    # locally. returns the classifier, cluster labels, cluster transformations and cluster sizes of every target
+    labels, transformations, sizes, stats = coordinator.map_reduce(word_tuples, batch_alignment, merge=merge)
+    classifiers = []
+    for t, target_labels in enumerate(labels):
+        rows = [i for i, word_tuple in enumerate(word_tuples) if word_tuple[t + 1] != ""]
+        classifiers.append(fit_classifier(select_rows(x_data, rows), target_labels, backend, collapse_duplicates,
+                                          forest_size, jobs))
+    return classifiers, labels, transformations, sizes, stats
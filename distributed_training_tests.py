@@ -0,0 +1,160 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import multiprocessing
+import threading
+import time
+import unittest
+from typing import Optional
+
+import benchmark_corpus
+import distributed_training as dt
+import input_parsing as par
+import training
+from model import TransformationModel
+
+
+class DistributedTrainingTests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        pairs = benchmark_corpus.generate_word_pairs(600, seed=3)
+        # a second target with missing forms
+        self.__word_tuples = [(word_a, word_b, word_b if i % 3 else "") for i, (word_a, word_b) in enumerate(pairs)]
+        self.__coordinator = dt.Coordinator(("127.0.0.1", 0), b"test", shard_size=100).start()
+        self.__workers = [multiprocessing.Process(target=dt.run_worker, args=(self.__coordinator.address, b"test"))
+                          for _ in range(2)]
+        for worker in self.__workers:
+            worker.start()
+
+    def tearDown(self) -> None:
+        self.__coordinator.stop()
+        for worker in self.__workers:
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+
+    def test_same_clusters_as_cluster_set(self) -> None:
+        labels, transformations, sizes, stats = self.__coordinator.map_reduce(self.__word_tuples)
+        for t in range(2):
+            expected = training.cluster_word_pairs([(word_tuple[0], word_tuple[t + 1]) for word_tuple in self.__word_tuples
+                                                    if word_tuple[t + 1] != ""])
+            self.assertEqual(labels[t], list(expected.labels))
+            self.assertEqual(transformations[t], list(expected.transformations))
+            self.assertEqual(sizes[t], [expected.size_of(c) for c in range(len(expected))])
+        self.assertEqual([s.name for s in stats], ["analyze", "cluster"])
+        self.assertEqual(stats[0].tasks, 6)
+        self.assertEqual(stats[0].retries, 0)
+
+    def test_same_trees_as_train_targets(self) -> None:
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in self.__word_tuples])
+        classifiers, _, transformations, sizes, _ = dt.train_distributed(self.__coordinator, self.__word_tuples, x_data)
+        model = TransformationModel(par.StripProcessor(), encoder, ["a", "b"], classifiers, transformations, sizes)
+        results = training.train_targets(self.__word_tuples, x_data)
+        expected = training.build_model(par.StripProcessor(), encoder, ["a", "b"], results)
+        self.assertEqual(model.class_counts, expected.class_counts)
+        # sklearn breaks ties between equally good splits at random, so the trees are compared by their training accuracy
+        for t, (classifier, (clusters, expected_classifier)) in enumerate(zip(model.classifiers, results)):
+            rows = [i for i, word_tuple in enumerate(self.__word_tuples) if word_tuple[t + 1] != ""]
+            self.assertEqual(list(classifier.classes_), list(expected_classifier.classes_))
+            self.assertEqual(classifier.score(x_data[rows], clusters.labels),
+                             expected_classifier.score(x_data[rows], clusters.labels))
+
+    def test_alignment_options_and_merge(self) -> None:
+        # long words are aligned in linear space on the workers, and the clusters are merged like with ClusterSet
+        word_tuples = self.__word_tuples[:200] + [("ab" * 12, "ba" * 12, "")]
+        labels, transformations, sizes, _ = self.__coordinator.map_reduce(word_tuples, batch_alignment=True,
+                                                                          linear_space_threshold=5, merge=True)
+        expected = training.cluster_word_pairs([word_tuple[:2] for word_tuple in word_tuples], merge=True)
+        self.assertEqual(labels[0], list(expected.labels))
+        self.assertEqual(transformations[0], list(expected.transformations))
+        self.assertEqual(sizes[0], [expected.size_of(c) for c in range(len(expected))])
+        self.assertEqual(self.__coordinator.clusters_before_merging[0], expected.clusters_before_merging)
+
+    def test_stop_waits_for_workers(self) -> None:
+        _, _, _, stats = self.__coordinator.map_reduce(self.__word_tuples[:300])
+        self.__coordinator.stop()
+        self.assertGreater(len(self.__coordinator.workers), 0)
+        self.assertLessEqual(stats[0].workers, self.__coordinator.stopped_workers)
+        self.assertEqual(self.__coordinator.stopped_workers, self.__coordinator.workers)
+
+
+class CoordinatorTests(unittest.TestCase):
+
+    def test_parse_address(self) -> None:
+        self.assertEqual(dt.parse_address("example.org:4000"), ("example.org", 4000))
+        self.assertEqual(dt.parse_address("localhost"), ("localhost", dt.DEFAULT_PORT))
+        with self.assertRaises(ValueError):
+            dt.parse_address("localhost:port")
+
+    def test_requires_authkey(self) -> None:
+        self.assertRaises(ValueError, dt.Coordinator, ("127.0.0.1", 0), b"")
+
+    @staticmethod
+    def __thread_worker(address, delay: float, lose_task: bool, taken: threading.Event,
+                        wait_for: Optional[threading.Event]) -> None:
+        # a worker that takes delay seconds per task. with lose_task, it reports the start of its first task, sets
+        # taken and is lost without a result. with wait_for, it takes no task before that event is set
+        manager = dt.TrainingManager(address=address, authkey=b"test")
+        manager.connect()
+        tasks = manager.tasks()
+        results = manager.results()
+        if wait_for is not None:
+            wait_for.wait(10)
+        while True:
+            task = tasks.get()
+            if task == dt.STOP:
+                tasks.put(dt.STOP)
+                return
+            task_id, kind, args = task
+            results.put((task_id, "thread", dt.STARTED, None))
+            if lose_task:
+                taken.set()
+                return
+            time.sleep(delay)
+            results.put((task_id, "thread", dt.TASK_HANDLERS[kind](*args), None))
+
+    def __run_with_thread_workers(self, delay: float, lose_task: bool) -> list:
+        word_tuples = benchmark_corpus.generate_word_pairs(400, seed=3)
+        coordinator = dt.Coordinator(("127.0.0.1", 0), b"test", shard_size=200, task_timeout=1.0).start()
+        taken = threading.Event()
+        workers = [(delay, False, taken, taken if lose_task else None)]
+        if lose_task:
+            workers.append((0.0, True, taken, None))
+        threads = [threading.Thread(target=self.__thread_worker, args=(coordinator.address,) + worker, daemon=True)
+                   for worker in workers]
+        for thread in threads:
+            thread.start()
+        try:
+            _, _, _, stats = coordinator.map_reduce(word_tuples)
+        finally:
+            coordinator.stop()
+        for thread in threads:
+            thread.join(10)
+        return stats
+
+    def test_slow_workers_keep_their_tasks(self) -> None:
+        # the two analyze tasks take longer than task_timeout together, but each one less
+        stats = self.__run_with_thread_workers(0.6, False)
+        self.assertEqual([s.retries for s in stats], [0, 0])
+
+    def test_lost_task_is_handed_out_again(self) -> None:
+        stats = self.__run_with_thread_workers(0.3, True)
+        self.assertEqual([s.retries for s in stats], [1, 0])
+        self.assertEqual(stats[0].tasks, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import random
+from typing import List, Sequence, Tuple
+
+WordTuple = Tuple[str, ...]
+
+
+def split_word_tuples(word_tuples: Sequence[WordTuple],
+                      test_fraction: float = 0.2,
+                      seed: int = 0) -> Tuple[List[WordTuple], List[WordTuple]]:
+    shuffled = list(word_tuples)
+    random.Random(seed).shuffle(shuffled)
+    test_count = int(round(len(shuffled) * test_fraction))
+    return shuffled[test_count:], shuffled[:test_count]
+
+
+def accuracy(model, word_tuples: Sequence[WordTuple], target: int = 0) -> float:
+    # share of (already input processed) word tuples whose target form is predicted correctly;
+    # a predicted transformation that does not apply to the word counts as an error
+    if len(word_tuples) == 0:
+        return 0.0
+    correct = 0
+    for word_tuple in word_tuples:
+        try:
+            if model.predict_processed(word_tuple[0], [target])[0] == word_tuple[target + 1]:
+                correct += 1
+        except ValueError:
+            pass
+    return correct / len(word_tuples)
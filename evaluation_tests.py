@@ -0,0 +1,36 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+import benchmark_corpus
+import evaluation
+
+
+class EvaluationTests(unittest.TestCase):
+
+    def test_split_word_tuples(self) -> None:
+        word_tuples = benchmark_corpus.generate_word_pairs(50)
+        training_tuples, test_tuples = evaluation.split_word_tuples(word_tuples, 0.2)
+        self.assertEqual(len(training_tuples), 40)
+        self.assertEqual(len(test_tuples), 10)
+        self.assertEqual(sorted(training_tuples + test_tuples), sorted(word_tuples))
+        self.assertEqual(evaluation.split_word_tuples(word_tuples, 0.2), (training_tuples, test_tuples))
+
+    def test_generate_word_pairs(self) -> None:
+        word_pairs = benchmark_corpus.generate_word_pairs(100, seed=3)
+        self.assertEqual(len({word_a for word_a, _ in word_pairs}), 100)
+        self.assertEqual(word_pairs, benchmark_corpus.generate_word_pairs(100, seed=3))
@@ -0,0 +1,114 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+from array import array
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+from tree_compaction import smallest_typecode
+
+# the classes of the training words, so that a model resolves words it was trained on with one lookup instead of
+# encoding them and walking the trees. the processed base forms are sorted and stored as one UTF-8 text with the
+# offset of every word (UTF-8 byte order is code point order), and words are found by binary search.
+
+MISSING = -1
+
+
+class ExactMatchTable:
+
+    # word i is text[offsets[i]:offsets[i + 1]], classes[t][i] is its class for target t or MISSING if the training
+    # data has no form of it for this target
+
+    def __init__(self, offsets: Sequence[int], text: bytes, classes: Sequence[Sequence[int]]) -> None:
+        if any(len(target_classes) != len(offsets) - 1 for target_classes in classes):
+            raise ValueError("ExactMatchTable requires a class of every word for every target")
+        self.__offsets = offsets
+        self.__text = text
+        self.__classes = tuple(classes)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_word_tuples(word_tuples: Sequence[Tuple[str, ...]], labels: Sequence[Sequence[int]]) -> "ExactMatchTable":
+        # labels holds the class of every row with a target form per target, as given by ClusterStore.labels. a base
+        # form that occurs more than once gets its most frequent class, ties going to the lower class
+        counts = dict()
+        for t, target_labels in enumerate(labels):
+            rows = (word_tuple[0] for word_tuple in word_tuples if word_tuple[t + 1] != "")
+            for word, label in zip(rows, target_labels):
+                counts.setdefault(word, [Counter() for _ in labels])[t][label] += 1
+        words = sorted(counts)
+        offsets = [0]
+        text = bytearray()
+        for word in words:
+            text += word.encode("utf-8")
+            offsets.append(len(text))
+        classes = []
+        for t in range(len(labels)):
+            target_classes = [min(counts[word][t].items(), key=lambda item: (-item[1], item[0]))[0]
+                              if len(counts[word][t]) > 0 else MISSING for word in words]
+            classes.append(array(smallest_typecode(target_classes), target_classes))
+        return ExactMatchTable(array(smallest_typecode(offsets), offsets), bytes(text), classes)
+
+    @property
+    def arrays(self) -> Tuple[Sequence[int], Sequence[int], List[Sequence[int]]]:
+        return self.__offsets, self.__text, list(self.__classes)
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.__text) + self.__offsets.itemsize * len(self.__offsets) +
+                sum(c.itemsize * len(c) for c in self.__classes))
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self) -> int:
+        return len(self.__offsets) - 1
+
+    def __getstate__(self) -> dict:
+        # the lookup counts belong to the running process
+        state = self.__dict__.copy()
+        state["hits"] = 0
+        state["misses"] = 0
+        return state
+
+    def word(self, index: int) -> str:
+        return str(self.__text[self.__offsets[index]:self.__offsets[index + 1]], "utf-8")
+
+    def find(self, word: str) -> int:
+        # the index of word, or -1. counts as a hit or a miss (not synchronized, so threads may lose counts)
+        key = word.encode("utf-8")
+        offsets = self.__offsets
+        text = self.__text
+        low = 0
+        high = len(offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(text[offsets[middle]:offsets[middle + 1]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(offsets) - 1 and text[offsets[low]:offsets[low + 1]] == key:
+            self.hits += 1
+            return low
+        self.misses += 1
+        return -1
+
+    def class_of(self, index: int, target: int) -> int:
+        return self.__classes[target][index]
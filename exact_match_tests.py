@@ -0,0 +1,63 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import pickle
+import unittest
+
+from exact_match import MISSING, ExactMatchTable
+
+
+class ExactMatchTableTests(unittest.TestCase):
+
+    WORD_TUPLES = [("sagen", "gesagt", "sagt"), ("liegen", "gelegen", ""), ("한국어", "x", "y"), ("lächeln", "gelächelt", "lächelt"),
+                   ("sagen", "sagte", "sagt"), ("sagen", "gesagt", "sagt"), ("abc", "", "")]
+
+    def __build(self) -> ExactMatchTable:
+        # labels of the rows with a form of the target
+        return ExactMatchTable.from_word_tuples(self.WORD_TUPLES, [[0, 1, 2, 3, 4, 0], [0, 1, 2, 0, 0]])
+
+    def test_lookup(self) -> None:
+        table = self.__build()
+        # "abc" has no target forms at all
+        self.assertEqual(len(table), 4)
+        self.assertEqual([table.word(i) for i in range(len(table))], sorted({t[0] for t in self.WORD_TUPLES} - {"abc"}))
+        self.assertEqual([table.class_of(table.find(word), 0) for word in ["sagen", "liegen", "한국어", "lächeln"]],
+                         [0, 1, 2, 3])
+        self.assertEqual([table.class_of(table.find(word), 1) for word in ["sagen", "liegen", "한국어", "lächeln"]],
+                         [0, MISSING, 1, 2])
+        for word in ["", "abc", "sage", "sagenx", "zzz", "한", "lachen"]:
+            self.assertEqual(table.find(word), -1)
+        self.assertEqual((table.hits, table.misses), (8, 7))
+        self.assertAlmostEqual(table.hit_rate, 8 / 15)
+
+    def test_pickle(self) -> None:
+        table = self.__build()
+        table.find("sagen")
+        restored = pickle.loads(pickle.dumps(table))
+        self.assertEqual((restored.hits, restored.misses), (0, 0))
+        self.assertEqual(restored.class_of(restored.find("lächeln"), 1), 2)
+        self.assertEqual(restored.nbytes, table.nbytes)
+
+    def test_empty(self) -> None:
+        table = ExactMatchTable.from_word_tuples([], [[]])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.find("sagen"), -1)
+        self.assertRaises(ValueError, ExactMatchTable, [0, 5], b"sagen", [[0, 1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
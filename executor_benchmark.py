@@ -0,0 +1,89 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import getopt
+import sys
+import time
+
+import benchmark_corpus
+import input_parsing as par
+import training as tr
+from executors import gil_enabled
+from inference import transform_words_in_parallel
+from tree_compaction import compact_model
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [--jobs=<jobs>]".format(sys.argv[0]))
+    print("compares sequential runs with thread and process pools on a generated corpus of three target forms")
+    sys.exit(2)
+
+
+def measure(name: str, count: int, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    print("{:<40} {:>10.3f} {:>12.2f}".format(name, seconds, seconds / count * 1e6))
+    return result
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size=", "jobs="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 5000
+    jobs = 4
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "--jobs":
+            jobs = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    # three targets: the generated form and two suffixed variants of it, so that targets can be trained in parallel
+    word_pairs = benchmark_corpus.generate_word_pairs(size)
+    word_tuples = [(word_a, word_b, word_b + "e", word_b + "n") for word_a, word_b in word_pairs]
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    print("Python {}, GIL {}, {} word pairs, {} jobs".format(sys.version.split()[0],
+                                                             "enabled" if gil_enabled() else "disabled", size, jobs))
+    print("{:<40} {:>10} {:>12}".format("step", "seconds", "us per item"))
+    expected = measure("analysis, sequential", size, tr.analyze_word_pairs, word_pairs)
+    for kind in ["threads", "processes"]:
+        elements = measure("analysis, " + kind, size, tr.analyze_word_pairs, word_pairs, False, jobs, kind)
+        if [e.transformation for e in elements] != [e.transformation for e in expected]:
+            print("error: the analysis in {} differs from the sequential analysis".format(kind))
+            sys.exit(1)
+
+    encoder, x_data = tr.extract_features(base_words, tr.make_encoder("ordinal"))
+    results = measure("3 targets, sequential", size, tr.train_targets, word_tuples, x_data)
+    for kind in ["threads", "processes"]:
+        measure("3 targets, " + kind, size, tr.train_targets, word_tuples, x_data, jobs, "tree", False, False, False, kind)
+
+    model, _ = compact_model(tr.build_model(par.StripProcessor(), encoder, ["a", "b", "c"], results), base_words)
+    expected = measure("inference, sequential", size, transform_words_in_parallel, model, base_words, model.target_names)
+    for kind in ["threads", "processes"]:
+        rows = measure("inference, " + kind, size, transform_words_in_parallel, model, base_words, model.target_names,
+                       0, jobs, kind)
+        if rows != expected:
+            print("error: the inference in {} differs from the sequential inference".format(kind))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
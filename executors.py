@@ -0,0 +1,58 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import sys
+from concurrent.futures import Executor
+from typing import Callable, Optional, Sequence
+
+# process or thread pools for the parallel parts of training and batch inference. process pools pickle every word
+# pair, TrainingSetElement, transformation and model they pass between workers. on free-threaded CPython builds with
+# the GIL disabled, threads run python code in parallel and share these objects directly, so "auto" picks threads
+# there and processes everywhere else.
+#
+# what threads share, and why that is safe without locks:
+# - word_analysis: Interval, IntervalPair, LCSMatrix, WordSubsequenceIntervals and the transformations never change
+#   after construction (IntervalPairBuilder does, but each alignment has its own). LINEAR_SPACE_THRESHOLD is only read.
+# - training_data_structures: TrainingSetElement and ClusterStore never change after construction, ClusterStore hands
+#   out read-only memoryviews. Cluster and ClusterSet do change, and every worker clusters with its own.
+# - model.TransformationModel: the lazily filled lookup tables of predict_top_k may be filled twice by racing threads
+#   with equal values. the PredictionCache locks its entries.
+
+EXECUTOR_KINDS = ("auto", "processes", "threads")
+
+
+def gil_enabled() -> bool:
+    # sys._is_gil_enabled exists from Python 3.13 on; builds before that always have the GIL
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else bool(is_gil_enabled())
+
+
+def resolve_executor_kind(kind: str = "auto") -> str:
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError("Unknown executor <{}>, expected one of {}".format(kind, ", ".join(EXECUTOR_KINDS)))
+    if kind == "auto":
+        return "processes" if gil_enabled() else "threads"
+    return kind
+
+
+def make_executor(jobs: int, kind: str = "auto", initializer: Optional[Callable] = None,
+                  initargs: Sequence = ()) -> Executor:
+    # the pools are imported here, as the process pool pulls in multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    if resolve_executor_kind(kind) == "threads":
+        return ThreadPoolExecutor(max_workers=jobs, initializer=initializer, initargs=tuple(initargs))
+    return ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=tuple(initargs))
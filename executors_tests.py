@@ -0,0 +1,121 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import sys
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+import benchmark_corpus
+import executors
+import input_parsing as par
+import training
+import word_analysis
+from inference import transform_words, transform_words_in_parallel
+from model import PredictionCache
+
+
+class ExecutorTests(unittest.TestCase):
+
+    def test_resolve_executor_kind(self) -> None:
+        with mock.patch.object(sys, "_is_gil_enabled", lambda: False, create=True):
+            self.assertFalse(executors.gil_enabled())
+            self.assertEqual(executors.resolve_executor_kind("auto"), "threads")
+            with executors.make_executor(1) as pool:
+                self.assertIsInstance(pool, ThreadPoolExecutor)
+        with mock.patch.object(sys, "_is_gil_enabled", lambda: True, create=True):
+            self.assertEqual(executors.resolve_executor_kind("auto"), "processes")
+        self.assertEqual(executors.resolve_executor_kind("threads"), "threads")
+        with executors.make_executor(1, "processes") as pool:
+            self.assertIsInstance(pool, ProcessPoolExecutor)
+        self.assertRaises(ValueError, executors.resolve_executor_kind, "fibers")
+
+
+class ConcurrentReadTests(unittest.TestCase):
+
+    # many threads reading the same objects must see what a single thread sees
+
+    THREADS = 8
+
+    def __run_in_threads(self, function) -> list:
+        results = [None] * self.THREADS
+        barrier = threading.Barrier(self.THREADS)
+
+        def run(i: int) -> None:
+            barrier.wait()
+            results[i] = function()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_shared_analysis_objects(self) -> None:
+        word_pairs = benchmark_corpus.generate_word_pairs(300, seed=6)
+        clusters = training.cluster_word_pairs(word_pairs)
+        transformations = list(clusters.transformations)
+
+        def read() -> list:
+            applied = [clusters.transformations[label].apply(element.word_a)
+                       for element, label in zip(clusters.elements, clusters.labels)]
+            members = [[element.word_a for element in clusters.members_of(c)] for c in range(len(clusters))]
+            joined = [t.join(t) == t and hash(t) == hash(t.join_key) for t in transformations]
+            intervals = [element.subsequence_intervals.intervals for element in clusters.elements]
+            return [applied, members, joined, intervals]
+
+        expected = read()
+        self.assertEqual(expected[0], [word_b for _, word_b in word_pairs])
+        for result in self.__run_in_threads(read):
+            self.assertEqual(result, expected)
+
+    def test_analysis_in_pools(self) -> None:
+        word_pairs = benchmark_corpus.generate_word_pairs(100, seed=7)
+        expected = [word_analysis.analyze_word_pair(word_a, word_b) for word_a, word_b in word_pairs]
+        for kind in ["threads", "processes"]:
+            elements = training.analyze_word_pairs(word_pairs, jobs=3, executor=kind)
+            self.assertEqual([element.transformation for element in elements], expected)
+
+    def test_prediction_cache(self) -> None:
+        cache = PredictionCache(16)
+
+        def use() -> int:
+            for i in range(2000):
+                if cache.get(i % 32) is PredictionCache.MISSING:
+                    cache.put(i % 32, i)
+            return len(cache)
+
+        self.assertEqual(self.__run_in_threads(use), [16] * self.THREADS)
+        self.assertEqual(cache.hits + cache.misses, 2000 * self.THREADS)
+
+    def test_parallel_inference(self) -> None:
+        word_tuples = [(word_a, word_b, word_b + "e") for word_a, word_b in benchmark_corpus.generate_word_pairs(200, seed=8)]
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in word_tuples],
+                                                    training.make_encoder("ordinal"))
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "x"], training.train_targets(word_tuples, x_data))
+        model.set_cache_size(64)
+        words = [word_tuple[0] for word_tuple in word_tuples] + ["xyz"]
+        expected = transform_words(model, words, model.target_names)
+        self.assertEqual(expected[0], list(word_tuples[0][1:]))
+        for kind in ["threads", "processes"]:
+            for top_k in [0, 2]:
+                self.assertEqual(transform_words_in_parallel(model, words, model.target_names, top_k, 3, kind, 16),
+                                 transform_words(model, words, model.target_names, top_k))
+        self.assertEqual(transform_words_in_parallel(model, words, ["x"], jobs=2, executor="threads", batch_size=50),
+                         [row[1:] for row in expected])
@@ -0,0 +1,87 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import getopt
+import pickle
+import sys
+import time
+
+import benchmark_corpus
+import evaluation
+import input_parsing as par
+import training as tr
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [--positions=<k>] [<input_file> ...]".format(sys.argv[0]))
+    print("compares the one-hot and the ordinal feature encoding; uses a generated corpus if no input file is given")
+    sys.exit(2)
+
+
+def benchmark(word_tuples, test_tuples, feature_mode: str, positions: int) -> None:
+    start = time.perf_counter()
+    encoder, x_data = tr.extract_features([word_tuple[0] for word_tuple in word_tuples], tr.make_encoder(feature_mode, positions))
+    extraction_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results = tr.train_targets(word_tuples, x_data)
+    training_time = time.perf_counter() - start
+    start = time.perf_counter()
+    classifier = tr.fit_classifier(x_data, results[0][0].labels)
+    fit_time = time.perf_counter() - start
+    model = tr.build_model(par.StripProcessor(), encoder, ["target"], results)
+    print("{:>8} {:>9} {:>10.3f} {:>10.3f} {:>10.3f} {:>7} {:>11} {:>9.3f} {:>9.3f}".format(
+        feature_mode,
+        encoder.feature_count,
+        extraction_time,
+        training_time,
+        fit_time,
+        classifier.tree_.node_count,
+        len(pickle.dumps(model)),
+        evaluation.accuracy(model, word_tuples),
+        evaluation.accuracy(model, test_tuples)
+    ))
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size=", "positions="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 5000
+    positions = 8
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "--positions":
+            positions = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    if len(args) > 0:
+        input_processor = par.CombinedProcessor([par.StripProcessor(), par.HangeulComposer()])
+        word_tuples, _ = tr.read_corpus(args, input_processor)
+    else:
+        word_tuples = benchmark_corpus.generate_word_pairs(size)
+    training_tuples, test_tuples = evaluation.split_word_tuples(word_tuples)
+    print("{} training and {} test word pairs".format(len(training_tuples), len(test_tuples)))
+    print("{:>8} {:>9} {:>10} {:>10} {:>10} {:>7} {:>11} {:>9} {:>9}".format(
+        "features", "columns", "extract/s", "train/s", "fit/s", "nodes", "model/bytes", "train acc", "test acc"))
+    for feature_mode in ["onehot", "ordinal"]:
+        benchmark(training_tuples, test_tuples, feature_mode, positions)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import getopt
+import pickle
+import sys
+import time
+
+import benchmark_corpus
+import evaluation
+import input_parsing as par
+import training as tr
+from backend_benchmark import prediction_latency
+from tree_compaction import compact_model
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [--trees=<trees>] [--jobs=<jobs>] [<input_file> ...]".format(sys.argv[0]))
+    print("compares a single decision tree with a random forest, both compacted; uses a generated corpus if no input "
+          "file is given")
+    sys.exit(2)
+
+
+def benchmark(word_tuples, test_tuples, backend: str, forest_size: int, jobs: int) -> None:
+    # models without exact match table, so that the latency is that of the trees
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    encoder, x_data = tr.extract_features(base_words)
+    clusters = tr.cluster_word_pairs([(word_tuple[0], word_tuple[1]) for word_tuple in word_tuples])
+    start = time.perf_counter()
+    classifier = tr.fit_classifier(x_data, clusters.labels, backend, forest_size=forest_size, jobs=jobs)
+    fit_time = time.perf_counter() - start
+    model = tr.build_model(par.StripProcessor(), encoder, ["target"], [(clusters, classifier)])
+    start = time.perf_counter()
+    model, report = compact_model(model, base_words)
+    compaction_time = time.perf_counter() - start
+    print("{:>7} {:>10.3f} {:>10.3f} {:>8} {:>11} {:>14.1f} {:>9.3f} {:>9.3f}".format(
+        backend,
+        fit_time,
+        compaction_time,
+        report.nodes_after,
+        len(pickle.dumps(model)),
+        prediction_latency(model, test_tuples) * 1e6,
+        evaluation.accuracy(model, word_tuples),
+        evaluation.accuracy(model, test_tuples)
+    ))
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size=", "trees=", "jobs="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 5000
+    forest_size = tr.FOREST_SIZE
+    jobs = 1
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "--trees":
+            forest_size = int(arg)
+        elif opt == "--jobs":
+            jobs = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    if len(args) > 0:
+        input_processor = par.CombinedProcessor([par.StripProcessor(), par.HangeulComposer()])
+        word_tuples, _ = tr.read_corpus(args, input_processor)
+    else:
+        word_tuples = benchmark_corpus.generate_word_pairs(size)
+    training_tuples, test_tuples = evaluation.split_word_tuples(word_tuples)
+    print("{} training and {} test word pairs, forests of {} trees fitted in {} jobs".format(
+        len(training_tuples), len(test_tuples), forest_size, jobs))
+    print("{:>7} {:>10} {:>10} {:>8} {:>11} {:>14} {:>9} {:>9}".format(
+        "backend", "fit/s", "compact/s", "nodes", "model/bytes", "latency/us", "train acc", "test acc"))
+    for backend in ["tree", "forest"]:
+        benchmark(training_tuples, test_tuples, backend, forest_size, jobs)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,84 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import pickle
+from itertools import repeat
+from typing import List, Optional, Sequence
+
+from model import TransformationModel
+from shared_model import is_shared_model, open_shared_model
+
+# everything needed to use a stored model. this module and the modules a compacted or trie model refers to only
+# depend on the standard library, so loading a model and predicting does not pull in sklearn, numpy or graphviz.
+
+
+def load_model(file_name: str) -> TransformationModel:
+    # pickled models and shared model files (see shared_model.py), which are mapped instead of read
+    if is_shared_model(file_name):
+        return open_shared_model(file_name)
+    with open(file_name, "rb") as model_file:
+        model = pickle.load(model_file)
+    if not isinstance(model, TransformationModel):
+        raise ValueError("File <{}> does not contain a TransformationModel".format(file_name))
+    return model
+
+
+def transform_words(model: TransformationModel, words: Sequence[str], target_names: Sequence[str],
+                    top_k: int = 0) -> List[List[Optional[str]]]:
+    # the outputs of the given targets for every word, None where the predicted transformation does not apply. with
+    # top_k > 0 the next most likely of top_k classes is tried instead (see TransformationModel.predict_top_k)
+    if top_k > 0:
+        return [[outputs[name] for name in target_names] for outputs in model.predict_top_k(words, top_k)]
+    rows = []
+    for word in words:
+        outputs = []
+        for name in target_names:
+            try:
+                outputs.append(model.predict_target(word, name))
+            except ValueError:
+                outputs.append(None)
+        rows.append(outputs)
+    return rows
+
+
+__worker_model = None
+
+
+def __set_worker_model(model: TransformationModel) -> None:
+    global __worker_model
+    __worker_model = model
+
+
+def __transform_batch(words: Sequence[str], target_names: Sequence[str], top_k: int) -> List[List[Optional[str]]]:
+    return transform_words(__worker_model, words, target_names, top_k)
+
+
+def transform_words_in_parallel(model: TransformationModel, words: Sequence[str], target_names: Sequence[str],
+                                top_k: int = 0, jobs: int = 1, executor: str = "auto",
+                                batch_size: int = 1024) -> List[List[Optional[str]]]:
+    # transform_words on batches of words in a pool of jobs workers (see executors.make_executor). threads share the
+    # model, worker processes receive it once when they start
+    if jobs <= 1 or len(words) <= batch_size:
+        return transform_words(model, words, target_names, top_k)
+    from executors import make_executor, resolve_executor_kind # imports the pools only when needed
+    batches = [words[start:start + batch_size] for start in range(0, len(words), batch_size)]
+    if resolve_executor_kind(executor) == "threads":
+        with make_executor(jobs, "threads") as pool:
+            results = list(pool.map(transform_words, repeat(model), batches, repeat(target_names), repeat(top_k)))
+    else:
+        with make_executor(jobs, "processes", __set_worker_model, [model]) as pool:
+            results = list(pool.map(__transform_batch, batches, repeat(target_names), repeat(top_k)))
+    return [row for rows in results for row in rows]
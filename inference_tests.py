@@ -0,0 +1,70 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import inference
+import input_parsing as par
+import training
+from tree_compaction import compact_model
+
+
+class InferenceTests(unittest.TestCase):
+
+    WORD_TUPLES = [("liegen", "gelegen"), ("fliegen", "geflogen"), ("wiegen", "gewogen"), ("machen", "gemacht"),
+                   ("sagen", "gesagt"), ("studieren", "studiert")]
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def __store(self, backend: str) -> str:
+        base_words = [word_tuple[0] for word_tuple in self.WORD_TUPLES]
+        encoder, x_data = training.extract_features(base_words, training.make_encoder(backend=backend))
+        model = training.build_model(par.StripProcessor(), encoder, ["pp"],
+                                     training.train_targets(self.WORD_TUPLES, x_data, backend=backend))
+        if backend == "tree":
+            model, _ = compact_model(model, base_words)
+        file_name = os.path.join(self.__directory.name, backend + ".clf")
+        with open(file_name, "wb") as output_file:
+            pickle.dump(model, output_file)
+        return file_name
+
+    def test_load_model(self) -> None:
+        model = inference.load_model(self.__store("tree"))
+        self.assertEqual(model.predict("biegen"), {"pp": "gebogen"})
+        file_name = os.path.join(self.__directory.name, "other.clf")
+        with open(file_name, "wb") as output_file:
+            pickle.dump([1, 2], output_file)
+        self.assertRaises(ValueError, inference.load_model, file_name)
+
+    def test_no_heavy_imports(self) -> None:
+        code = ("import sys, inference\n"
+                "model = inference.load_model(sys.argv[1])\n"
+                "print(model.predict_target('biegen', 'pp'))\n"
+                "print(sorted(m for m in ['sklearn', 'numpy', 'scipy', 'graphviz'] if m in sys.modules))\n")
+        for backend in ["tree", "trie"]:
+            output = subprocess.run([sys.executable, "-c", code, self.__store(backend)], check=True,
+                                    stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    universal_newlines=True).stdout
+            self.assertEqual(output.split("\n")[:2], ["gebogen", "[]"])
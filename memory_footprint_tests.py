@@ -0,0 +1,135 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import gc
+import os
+import tracemalloc
+import unittest
+from typing import Callable, Dict, Tuple
+
+import benchmark_corpus
+import training
+from training_data_structures import ClusterSet, TrainingSetElement
+from word_analysis import LCSMatrix
+
+# memory regression tests: the bytes per word pair that the training data structures keep (retained) and the highest
+# traced memory while building them (peak) must stay within a budget, measured with tracemalloc on a generated corpus.
+# every structure is measured on corpora of several sizes, so that the bytes per word pair cannot grow with the corpus
+# unnoticed. the budgets leave about 50% headroom over the measured footprint (word pairs of 15 letters on average). they
+# can be changed with the environment variable PYWORDS_MEMORY_BUDGETS, e.g. "lcs_matrix_peak=2000,onehot_features_retained=500"
+
+CORPUS_SIZES = (500, 4000)
+
+DEFAULT_BUDGETS = {
+    "lcs_matrix_retained": 1700,
+    "lcs_matrix_peak": 1700,
+    "training_set_element_retained": 2500,
+    "training_set_element_peak": 2500,
+    "cluster_set_retained": 2500,
+    "cluster_set_peak": 2600,
+    "onehot_features_retained": 350,
+    "onehot_features_peak": 1500,
+    "ordinal_features_retained": 150,
+    "ordinal_features_peak": 500
+}
+
+
+def read_budgets(setting: str) -> Dict[str, int]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for entry in setting.split(","):
+        if entry.strip() == "":
+            continue
+        name, _, value = entry.partition("=")
+        if name.strip() not in budgets:
+            raise ValueError("Unknown memory budget <{}>".format(name.strip()))
+        budgets[name.strip()] = int(value)
+    return budgets
+
+
+def measure_footprint(build: Callable[[], object], items: int) -> Tuple[float, float]:
+    # retained and peak bytes per item. the result of build is kept alive until the memory is measured
+    gc.collect()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    if not was_tracing:
+        tracemalloc.stop()
+    del result
+    return (current - baseline) / items, (peak - baseline) / items
+
+
+def cluster(word_pairs) -> ClusterSet:
+    clusters = ClusterSet()
+    for word_a, word_b in word_pairs:
+        clusters.add(TrainingSetElement(word_a, word_b))
+    return clusters
+
+
+class MemoryFootprintTests(unittest.TestCase):
+
+    BUDGETS = read_budgets(os.environ.get("PYWORDS_MEMORY_BUDGETS", ""))
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.word_pairs = benchmark_corpus.generate_word_pairs(max(CORPUS_SIZES), seed=4)
+        cls.base_words = [word_a for word_a, _ in cls.word_pairs]
+
+    def __check(self, name: str, build: Callable[[], object]) -> None:
+        # a first run on a few pairs imports modules and fills caches, which would otherwise count as retained
+        build(self.word_pairs[:10])
+        for size in CORPUS_SIZES:
+            with self.subTest(word_pairs=size):
+                word_pairs = self.word_pairs[:size]
+                retained, peak = measure_footprint(lambda: build(word_pairs), size)
+                self.assertLessEqual(retained, self.BUDGETS[name + "_retained"],
+                                     "{} retains {:.0f} bytes per word pair of {}".format(name, retained, size))
+                self.assertLessEqual(peak, self.BUDGETS[name + "_peak"],
+                                     "{} peaks at {:.0f} bytes per word pair of {}".format(name, peak, size))
+
+    def test_lcs_matrix(self) -> None:
+        self.__check("lcs_matrix", lambda word_pairs: [LCSMatrix(word_a, word_b) for word_a, word_b in word_pairs])
+
+    def test_training_set_element(self) -> None:
+        self.__check("training_set_element",
+                     lambda word_pairs: [TrainingSetElement(word_a, word_b) for word_a, word_b in word_pairs])
+
+    def test_cluster_set(self) -> None:
+        self.__check("cluster_set", cluster)
+
+    def test_onehot_features(self) -> None:
+        self.__check("onehot_features",
+                     lambda word_pairs: training.extract_features([word_a for word_a, _ in word_pairs]))
+
+    def test_ordinal_features(self) -> None:
+        self.__check("ordinal_features",
+                     lambda word_pairs: training.extract_features([word_a for word_a, _ in word_pairs],
+                                                                  training.make_encoder("ordinal")))
+
+    def test_read_budgets(self) -> None:
+        budgets = read_budgets("lcs_matrix_peak=10, cluster_set_retained=20,")
+        self.assertEqual((budgets["lcs_matrix_peak"], budgets["cluster_set_retained"]), (10, 20))
+        self.assertEqual(budgets["ordinal_features_peak"], DEFAULT_BUDGETS["ordinal_features_peak"])
+        self.assertRaises(ValueError, read_budgets, "lcs=10")
+
+    def test_measure_footprint(self) -> None:
+        retained, peak = measure_footprint(lambda: [bytearray(1000) for _ in range(100)], 100)
+        self.assertGreaterEqual(retained, 1000)
+        self.assertGreaterEqual(peak, retained)
@@ -0,0 +1,325 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import threading
+from collections import OrderedDict, abc
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from input_parsing import WordProcessor
+from word_analysis import EditTransformation, WordTransformation, WordTransformationSequence
+
+
+class PredictionCache:
+
+    # bounded least recently used cache, e.g. of (processed word, target) -> processed output, or of (processed word,
+    # target, k) -> processed output or None for top k predictions. safe to share between threads: a lookup moves its
+    # entry, so even reads change the order and all access is locked
+
+    MISSING = object()
+
+    def __init__(self, max_size: int) -> None:
+        if max_size < 1:
+            raise ValueError("PredictionCache requires a positive size")
+        self.__max_size = max_size
+        self.__entries = OrderedDict() # type: OrderedDict
+        self.__lock = threading.Lock()
+        self.bypass = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    def get(self, key: Hashable):
+        with self.__lock:
+            value = self.__entries.get(key, self.MISSING)
+            if value is self.MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            if len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __repr__(self) -> str:
+        return "<PredictionCache, {}/{} entries, {} hits, {} misses, {} evictions{}>".format(
+            len(self), self.max_size, self.hits, self.misses, self.evictions, ", bypassed" if self.bypass else "")
+
+
+def required_substrings(transformation: WordTransformation) -> Tuple[str, ...]:
+    # a transformation applies to a word exactly if the pre pattern and replaced part of each of its edit steps occur in
+    # the word in this order without overlapping, which is what apply_step searches for
+    steps = transformation.transformations if isinstance(transformation, WordTransformationSequence) else [transformation]
+    if not all(isinstance(step, EditTransformation) for step in steps):
+        raise ValueError("Only edit steps have required substrings")
+    return tuple(step.pre_pattern + step.replaced for step in steps)
+
+
+def contains_in_order(word: str, substrings: Sequence[str]) -> bool:
+    position = 0
+    for substring in substrings:
+        position = word.find(substring, position)
+        if position < 0:
+            return False
+        position += len(substring)
+    return True
+
+
+class TransformationModel:
+
+    # bundles everything needed to transform unseen words: the input processor, the feature encoding shared by all
+    # targets and, per target form, a fitted classifier together with the transformation of every class
+
+    def __init__(self,
+                 input_processor: WordProcessor,
+                 encoder,
+                 target_names: Sequence[str],
+                 classifiers: Sequence,
+                 transformations: Sequence[Sequence[WordTransformation]],
+                 class_counts: Optional[Sequence[Sequence[int]]] = None,
+                 exact_matches=None) -> None:
+        # class_counts: number of training words of every class per target, used to rank the classes a classifier gives
+        # no score for in predict_top_k. exact_matches: an exact_match.ExactMatchTable of the training words, which are
+        # then classified by the table instead of the classifiers
+        if not (len(target_names) == len(classifiers) == len(transformations)):
+            raise ValueError("Every target requires exactly one classifier and one list of transformations")
+        if class_counts is not None and [len(c) for c in class_counts] != [len(t) for t in transformations]:
+            raise ValueError("Every class requires a count")
+        self.__input_processor = input_processor
+        self.__encoder = encoder
+        self.__target_names = tuple(target_names)
+        self.__classifiers = tuple(classifiers)
+        # read-only sequences, e.g. the lazily decoded transformation tables of a shared model file, are kept as they are
+        self.__transformations = tuple(t if isinstance(t, abc.Sequence) and not isinstance(t, abc.MutableSequence)
+                                       else tuple(t) for t in transformations)
+        self.__class_counts = None if class_counts is None else tuple(tuple(c) for c in class_counts)
+        self.__exact_matches = exact_matches
+        self.__cache = None # type: Optional[PredictionCache]
+        self.__class_orders = dict() # type: Dict[int, Tuple[List[int], Dict[int, int]]]
+        self.__required_substrings = dict() # type: Dict[Tuple[int, int], Tuple[str, ...]]
+
+    def __getstate__(self) -> dict:
+        # the cache and the lookup tables of predict_top_k belong to the running process and are not stored with the model
+        state = self.__dict__.copy()
+        state["_TransformationModel__cache"] = None
+        state["_TransformationModel__class_orders"] = dict()
+        state["_TransformationModel__required_substrings"] = dict()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__cache = state.get("_TransformationModel__cache")
+        self.__class_counts = state.get("_TransformationModel__class_counts")
+        self.__exact_matches = state.get("_TransformationModel__exact_matches")
+        self.__class_orders = dict()
+        self.__required_substrings = dict()
+
+    @property
+    def input_processor(self) -> WordProcessor:
+        return self.__input_processor
+
+    @property
+    def encoder(self):
+        return self.__encoder
+
+    @property
+    def target_names(self) -> Sequence[str]:
+        return self.__target_names
+
+    @property
+    def classifiers(self) -> Sequence:
+        return self.__classifiers
+
+    @property
+    def transformations(self) -> Sequence[Sequence[WordTransformation]]:
+        return self.__transformations
+
+    @property
+    def class_counts(self) -> Optional[Sequence[Sequence[int]]]:
+        return self.__class_counts
+
+    @property
+    def exact_matches(self):
+        return self.__exact_matches
+
+    @property
+    def cache(self) -> Optional[PredictionCache]:
+        return self.__cache
+
+    def set_cache_size(self, max_size: int) -> None:
+        # caches the outputs of the most recently transformed words; 0 disables the cache
+        self.__cache = PredictionCache(max_size) if max_size > 0 else None
+
+    def target_index(self, target_name: str) -> int:
+        try:
+            return self.__target_names.index(target_name)
+        except ValueError:
+            raise KeyError("Model has no target <{}>".format(target_name))
+
+    def encode(self, processed_word: str):
+        return self.__encoder.transform([processed_word])
+
+    def predict_class(self, x, target: int) -> int:
+        return int(self.__classifiers[target].predict(x)[0])
+
+    def predict_classes(self, processed_word: str, targets: Sequence[int]) -> List[int]:
+        # a training word takes its classes from the exact match table, the word is only encoded for the classifiers if
+        # it is unknown or has no class for one of the targets
+        classes = [-1] * len(targets)
+        if self.__exact_matches is not None:
+            index = self.__exact_matches.find(processed_word)
+            if index >= 0:
+                classes = [self.__exact_matches.class_of(index, t) for t in targets]
+        x = None
+        for i, t in enumerate(targets):
+            if classes[i] < 0:
+                if x is None:
+                    x = self.encode(processed_word)
+                classes[i] = self.predict_class(x, t)
+        return classes
+
+    def predict_processed(self, processed_word: str, targets: Sequence[int]) -> List[str]:
+        cache = self.__cache
+        if cache is None or cache.bypass:
+            return [self.__transformations[t][c].apply(processed_word)
+                    for t, c in zip(targets, self.predict_classes(processed_word, targets))]
+        outputs = [cache.get((processed_word, t)) for t in targets]
+        missing = [t for t, output in zip(targets, outputs) if output is PredictionCache.MISSING]
+        if len(missing) > 0:
+            classes = dict(zip(missing, self.predict_classes(processed_word, missing)))
+            for i, t in enumerate(targets):
+                if outputs[i] is PredictionCache.MISSING:
+                    outputs[i] = self.__transformations[t][classes[t]].apply(processed_word)
+                    cache.put((processed_word, t), outputs[i])
+        return outputs
+
+    def predict(self, word: str) -> Dict[str, str]:
+        processed_word = self.__input_processor.process_input(word)
+        outputs = self.predict_processed(processed_word, range(len(self.__target_names)))
+        return {name: self.__input_processor.process_output(output) for name, output in zip(self.__target_names, outputs)}
+
+    def predict_target(self, word: str, target_name: str) -> str:
+        processed_word = self.__input_processor.process_input(word)
+        output, = self.predict_processed(processed_word, [self.target_index(target_name)])
+        return self.__input_processor.process_output(output)
+
+    def class_scores(self, x, target: int) -> List[Dict[int, float]]:
+        # per encoded word, the classes the classifier considers possible with their scores
+        classifier = self.__classifiers[target]
+        if hasattr(classifier, "predict_proba") and getattr(classifier, "classes_", None) is not None:
+            classes = [int(c) for c in classifier.classes_]
+            return [{c: p for c, p in zip(classes, row) if p > 0} for row in classifier.predict_proba(x)]
+        if hasattr(classifier, "counts_of"):
+            # the suffix trie counts the classes of all training words sharing the longest known ending
+            return [classifier.counts_of(word) for word in x]
+        return [{int(c): 1.0} for c in classifier.predict(x)]
+
+    def class_order(self, target: int) -> Tuple[List[int], Dict[int, int]]:
+        # all classes by descending count in the training data, and the rank of every class in this order
+        order = self.__class_orders.get(target)
+        if order is None:
+            counts = self.__class_counts[target] if self.__class_counts is not None else None
+            classes = sorted(range(len(self.__transformations[target])), key=lambda c: (-counts[c] if counts else 0, c))
+            order = classes, {c: r for r, c in enumerate(classes)}
+            self.__class_orders[target] = order
+        return order
+
+    def ranked_classes(self, scores: Dict[int, float], target: int, k: int) -> List[int]:
+        # the k best classes: by descending score, then by descending count in the training data
+        classes, rank = self.class_order(target)
+        ranked = sorted(scores, key=lambda c: (-scores[c], rank[c]))[:k]
+        for c in classes:
+            if len(ranked) >= k:
+                break
+            if c not in scores:
+                ranked.append(c)
+        return ranked
+
+    def applies(self, processed_word: str, target: int, c: int) -> bool:
+        substrings = self.__required_substrings.get((target, c))
+        if substrings is None:
+            substrings = required_substrings(self.__transformations[target][c])
+            self.__required_substrings[(target, c)] = substrings
+        return contains_in_order(processed_word, substrings)
+
+    def predict_top_k_processed(self, processed_words: Sequence[str], target: int, k: int = 3) -> List[Optional[str]]:
+        # every word gets the output of the best ranked of its k best classes whose transformation applies to it, or
+        # None. with a cache, outputs are kept per (processed word, target, k), and only the words missing from it are
+        # classified
+        cache = self.__cache
+        if cache is None or cache.bypass:
+            return self.__top_k_outputs(processed_words, target, k)
+        outputs = [cache.get((processed_word, target, k)) for processed_word in processed_words]
+        missing = [i for i, output in enumerate(outputs) if output is PredictionCache.MISSING]
+        if len(missing) > 0:
+            missing_outputs = self.__top_k_outputs([processed_words[i] for i in missing], target, k)
+            for i, output in zip(missing, missing_outputs):
+                outputs[i] = output
+                cache.put((processed_words[i], target, k), output)
+        return outputs
+
+    def __top_k_outputs(self, processed_words: Sequence[str], target: int, k: int) -> List[Optional[str]]:
+        # encodes and classifies all words at once
+        if len(processed_words) == 0:
+            return []
+        # a training word has a single class in the exact match table, which always applies to it
+        known = [-1] * len(processed_words)
+        if self.__exact_matches is not None:
+            for i, processed_word in enumerate(processed_words):
+                index = self.__exact_matches.find(processed_word)
+                if index >= 0:
+                    known[i] = self.__exact_matches.class_of(index, target)
+        unknown = [processed_word for processed_word, c in zip(processed_words, known) if c < 0]
+        scores_of_unknown = iter(self.class_scores(self.__encoder.transform(unknown), target) if len(unknown) > 0 else [])
+        outputs = []
+        for processed_word, c in zip(processed_words, known):
+            if c >= 0:
+                outputs.append(self.__transformations[target][c].apply(processed_word))
+                continue
+            scores = next(scores_of_unknown)
+            output = None
+            for c in self.ranked_classes(scores, target, k):
+                if self.applies(processed_word, target, c):
+                    output = self.__transformations[target][c].apply(processed_word)
+                    break
+            outputs.append(output)
+        return outputs
+
+    def predict_top_k(self, words: Sequence[str], k: int = 3) -> List[Dict[str, Optional[str]]]:
+        processed_words = [self.__input_processor.process_input(word) for word in words]
+        columns = [self.predict_top_k_processed(processed_words, t, k) for t in range(len(self.__target_names))]
+        return [{name: None if column[i] is None else self.__input_processor.process_output(column[i])
+                 for name, column in zip(self.__target_names, columns)}
+                for i in range(len(words))]
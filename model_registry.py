@@ -0,0 +1,234 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import gc
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from types import FunctionType, ModuleType
+from typing import Dict, List, Optional, Tuple
+
+from inference import load_model
+from model import TransformationModel
+from tree_compaction import sklearn_tree_nbytes
+
+# serves many stored models from one process: model files in a directory are found by their suffix, loaded on first
+# use and kept in least recently used order within a bound on the number of resident models and on their estimated
+# memory. a model whose file changed is reloaded and replaces the old one only once the new file loaded successfully,
+# so models should be written to a temporary file and renamed into the directory.
+
+MODEL_SUFFIX = ".clf"
+
+
+def model_nbytes(model: TransformationModel) -> int:
+    # estimated memory of a model: sys.getsizeof of every object reachable from it, each counted once. classes,
+    # functions and modules are shared with the rest of the process and not counted. a fitted sklearn tree reports no
+    # referents, so the node arrays of every sklearn decision tree are added separately
+    seen = set()
+    pending = [model]
+    total = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        attributes = getattr(obj, "__dict__", None)
+        if isinstance(attributes, dict) and "tree_" in attributes and "estimators_" not in attributes:
+            total += sklearn_tree_nbytes(obj)
+        pending.extend(gc.get_referents(obj))
+    return total
+
+
+FileSignature = Tuple[int, int, int]
+
+
+def file_signature(file_name: str) -> FileSignature:
+    status = os.stat(file_name)
+    return status.st_ino, status.st_size, status.st_mtime_ns
+
+
+class ResidentModel:
+
+    def __init__(self, model: TransformationModel, signature: FileSignature, checked: float) -> None:
+        self.model = model
+        self.signature = signature
+        self.nbytes = model_nbytes(model)
+        self.checked = checked # time.monotonic() of the last check of the file for changes
+
+
+class ModelRegistry:
+
+    def __init__(self,
+                 directory: str,
+                 max_models: int = 16,
+                 max_bytes: Optional[int] = None,
+                 check_interval: float = 1.0) -> None:
+        # check_interval: seconds between checks of a resident model's file for changes, 0 checks on every use
+        if max_models < 1:
+            raise ValueError("ModelRegistry requires room for at least one model")
+        self.__directory = directory
+        self.__max_models = max_models
+        self.__max_bytes = max_bytes
+        self.__check_interval = check_interval
+        self.__files = dict() # type: Dict[str, str]
+        self.__resident = OrderedDict() # type: OrderedDict
+        self.__lock = threading.RLock()
+        self.__loading = dict() # type: Dict[str, threading.Lock]
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.refresh()
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @property
+    def max_models(self) -> int:
+        return self.__max_models
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        return self.__max_bytes
+
+    def refresh(self) -> None:
+        # rescans the directory; resident models whose file disappeared are dropped
+        files = dict()
+        for entry in os.scandir(self.__directory):
+            if entry.is_file() and entry.name.endswith(MODEL_SUFFIX):
+                files[entry.name[:-len(MODEL_SUFFIX)]] = entry.path
+        with self.__lock:
+            self.__files = files
+            for name in [name for name in self.__resident if name not in files]:
+                del self.__resident[name]
+
+    def names(self) -> List[str]:
+        return sorted(self.__files)
+
+    def resident_names(self) -> List[str]:
+        # least recently used first
+        with self.__lock:
+            return list(self.__resident)
+
+    @property
+    def resident_bytes(self) -> int:
+        with self.__lock:
+            return sum(resident.nbytes for resident in self.__resident.values())
+
+    def get(self, name: str) -> TransformationModel:
+        # files are checked and loaded without holding the registry lock, so that loading a model does not block the
+        # use of the resident ones. a lock per model name keeps concurrent threads from loading the same model twice
+        resident = self.__recently_checked(name, time.monotonic())
+        if resident is not None:
+            return resident.model
+        with self.__loading_lock(name):
+            now = time.monotonic()
+            # another thread may have loaded or checked the model while this one waited
+            resident = self.__recently_checked(name, now)
+            if resident is not None:
+                return resident.model
+            file_name = self.__file_name(name)
+            with self.__lock:
+                resident = self.__resident.get(name)
+            if resident is None:
+                resident = self.__load(file_name, now)
+                self.__insert(name, resident, reload=False)
+                return resident.model
+            try:
+                signature = file_signature(file_name)
+            except FileNotFoundError:
+                # the file is being replaced or was removed; keep serving the loaded model
+                return resident.model
+            if signature == resident.signature:
+                resident.checked = now
+                return resident.model
+            try:
+                resident = self.__load(file_name, now)
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                # e.g. a partially written file: the old model stays in place until the file loads
+                return resident.model
+            self.__insert(name, resident, reload=True)
+            return resident.model
+
+    def __recently_checked(self, name: str, now: float) -> Optional[ResidentModel]:
+        # the resident model if its file was checked within the check interval
+        with self.__lock:
+            resident = self.__resident.get(name)
+            if resident is None or now - resident.checked >= self.__check_interval:
+                return None
+            self.__resident.move_to_end(name)
+            return resident
+
+    def __loading_lock(self, name: str) -> threading.Lock:
+        with self.__lock:
+            return self.__loading.setdefault(name, threading.Lock())
+
+    def __file_name(self, name: str) -> str:
+        if name not in self.__files:
+            self.refresh()
+            if name not in self.__files:
+                raise KeyError("No model <{}> in <{}>".format(name, self.__directory))
+        return self.__files[name]
+
+    @staticmethod
+    def __load(file_name: str, now: float) -> ResidentModel:
+        signature = file_signature(file_name)
+        model = load_model(file_name)
+        if file_signature(file_name) != signature:
+            raise ValueError("Model file <{}> changed while loading".format(file_name))
+        return ResidentModel(model, signature, now)
+
+    def __insert(self, name: str, resident: ResidentModel, reload: bool) -> None:
+        with self.__lock:
+            if reload:
+                self.reloads += 1
+            else:
+                self.loads += 1
+            self.__resident[name] = resident
+            self.__resident.move_to_end(name)
+            self.__evict(keep=name)
+
+    def __evict(self, keep: str) -> None:
+        while len(self.__resident) > 1 and (
+                len(self.__resident) > self.__max_models or
+                (self.__max_bytes is not None and self.resident_bytes > self.__max_bytes)):
+            name = next(iter(self.__resident))
+            if name == keep:
+                break
+            del self.__resident[name]
+            self.evictions += 1
+
+    def evict(self, name: str) -> None:
+        with self.__lock:
+            self.__resident.pop(name, None)
+
+    def predict(self, name: str, word: str) -> Dict[str, str]:
+        return self.get(name).predict(word)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__files
+
+    def __len__(self) -> int:
+        return len(self.__files)
+
+    def __repr__(self) -> str:
+        return "<ModelRegistry, {} models in {}, {} resident ({} bytes), {} loads, {} reloads, {} evictions>".format(
+            len(self), self.__directory, len(self.__resident), self.resident_bytes, self.loads, self.reloads,
+            self.evictions)
@@ -0,0 +1,147 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import benchmark_corpus
+import input_parsing as par
+import model_registry
+import training
+from model_registry import ModelRegistry, model_nbytes
+from tree_compaction import sklearn_tree_nbytes
+
+
+class ModelRegistryTests(unittest.TestCase):
+
+    PAST_PARTICIPLES = [("liegen", "gelegen"), ("fliegen", "geflogen"), ("wiegen", "gewogen"), ("machen", "gemacht"),
+                        ("sagen", "gesagt"), ("studieren", "studiert")]
+    PRESENT_TENSE = [("liegen", "liegt"), ("fliegen", "fliegt"), ("machen", "macht"), ("sagen", "sagt")]
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__store("pp", self.PAST_PARTICIPLES)
+        self.__store("present", self.PRESENT_TENSE)
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def __store(self, name: str, word_tuples) -> None:
+        base_words = [word_tuple[0] for word_tuple in word_tuples]
+        encoder, x_data = training.extract_features(base_words, training.make_encoder(backend="trie"))
+        model = training.build_model(par.StripProcessor(), encoder, ["target"],
+                                     training.train_targets(word_tuples, x_data, backend="trie"))
+        # written to a temporary file and renamed, as a serving directory should be updated
+        file_name = os.path.join(self.__directory.name, name + ".clf")
+        with open(file_name + ".tmp", "wb") as output_file:
+            pickle.dump(model, output_file)
+        os.replace(file_name + ".tmp", file_name)
+
+    def test_lazy_loading(self) -> None:
+        registry = ModelRegistry(self.__directory.name)
+        self.assertEqual(registry.names(), ["pp", "present"])
+        self.assertEqual(registry.resident_names(), [])
+        self.assertEqual(registry.predict("pp", "biegen"), {"target": "gebogen"})
+        self.assertEqual(registry.resident_names(), ["pp"])
+        self.assertIs(registry.get("pp"), registry.get("pp"))
+        self.assertEqual(registry.loads, 1)
+        self.assertRaises(KeyError, registry.get, "past")
+        self.__store("past", self.PAST_PARTICIPLES)
+        self.assertEqual(registry.predict("past", "biegen"), {"target": "gebogen"})
+        self.assertIn("past", registry)
+
+    def test_lru_eviction(self) -> None:
+        registry = ModelRegistry(self.__directory.name, max_models=1)
+        registry.get("pp")
+        registry.get("present")
+        self.assertEqual(registry.resident_names(), ["present"])
+        self.assertEqual(registry.evictions, 1)
+        registry = ModelRegistry(self.__directory.name, max_models=2)
+        registry.get("pp")
+        registry.get("present")
+        registry.get("pp")
+        self.assertEqual(registry.resident_names(), ["present", "pp"])
+
+    def test_memory_budget(self) -> None:
+        registry = ModelRegistry(self.__directory.name)
+        pp_bytes = model_nbytes(registry.get("pp"))
+        self.assertEqual(registry.resident_bytes, pp_bytes)
+        registry = ModelRegistry(self.__directory.name, max_bytes=pp_bytes)
+        registry.get("pp")
+        registry.get("present")
+        self.assertEqual(registry.resident_names(), ["present"])
+        registry = ModelRegistry(self.__directory.name, max_bytes=1)
+        self.assertEqual(registry.predict("pp", "biegen"), {"target": "gebogen"})
+
+    def test_nbytes_of_sklearn_trees(self) -> None:
+        word_pairs = benchmark_corpus.generate_word_pairs(500, seed=1)
+        base_words = [word_a for word_a, _ in word_pairs]
+        for backend in ["tree", "forest"]:
+            encoder, x_data = training.extract_features(base_words, training.make_encoder(backend=backend))
+            model = training.build_model(par.StripProcessor(), encoder, ["target"],
+                                         training.train_targets(word_pairs, x_data, backend=backend))
+            # the node arrays of the trees are not reachable through gc, but must be counted
+            tree_nbytes = sklearn_tree_nbytes(model.classifiers[0])
+            self.assertGreaterEqual(model_nbytes(model.classifiers[0]), tree_nbytes)
+            self.assertGreaterEqual(model_nbytes(model), tree_nbytes)
+
+    def test_reload(self) -> None:
+        registry = ModelRegistry(self.__directory.name, check_interval=0)
+        self.assertEqual(registry.predict("present", "sagen"), {"target": "sagt"})
+        self.__store("present", self.PAST_PARTICIPLES)
+        self.assertEqual(registry.predict("present", "sagen"), {"target": "gesagt"})
+        self.assertEqual(registry.reloads, 1)
+
+    def test_broken_file_keeps_model(self) -> None:
+        registry = ModelRegistry(self.__directory.name, check_interval=0)
+        model = registry.get("pp")
+        with open(os.path.join(self.__directory.name, "pp.clf"), "wb") as output_file:
+            output_file.write(b"\x80\x04 truncated")
+        self.assertIs(registry.get("pp"), model)
+        self.assertEqual(registry.reloads, 0)
+        registry.evict("pp")
+        self.assertRaises((pickle.UnpicklingError, EOFError, ValueError), registry.get, "pp")
+
+    def test_loading_does_not_block_resident_models(self) -> None:
+        registry = ModelRegistry(self.__directory.name)
+        pp = registry.get("pp")
+        loading = threading.Event()
+        release = threading.Event()
+        load_model = model_registry.load_model
+
+        def slow_load(file_name: str):
+            loading.set()
+            release.wait(10)
+            return load_model(file_name)
+
+        results = []
+        with mock.patch.object(model_registry, "load_model", slow_load):
+            loaders = [threading.Thread(target=lambda: results.append(registry.get("present"))) for _ in range(2)]
+            for loader in loaders:
+                loader.start()
+            self.assertTrue(loading.wait(10))
+            # while "present" loads, the resident model is served
+            self.assertIs(registry.get("pp"), pp)
+            release.set()
+            for loader in loaders:
+                loader.join(10)
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(registry.loads, 2)
@@ -0,0 +1,157 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import pickle
+import unittest
+
+import input_parsing as par
+from exact_match import ExactMatchTable
+from model import PredictionCache, TransformationModel, contains_in_order, required_substrings
+from suffix_trie import SuffixTrieClassifier
+from word_analysis import analyze_word_pair
+from word_features import PlainWordEncoder
+
+
+class CountingEncoder(PlainWordEncoder):
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def transform(self, words):
+        self.calls += 1
+        return super().transform(words)
+
+
+class PredictionCacheTests(unittest.TestCase):
+
+    def test_lru(self) -> None:
+        cache = PredictionCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIs(cache.get("b"), PredictionCache.MISSING)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (3, 1, 1, 2))
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (0, 0, 0, 0))
+        self.assertRaises(ValueError, PredictionCache, 0)
+
+
+class TransformationModelTests(unittest.TestCase):
+
+    def __build_model(self) -> TransformationModel:
+        classifier = SuffixTrieClassifier().fit(["machen", "liegen"], [0, 1])
+        transformations = [analyze_word_pair("machen", "gemacht"), analyze_word_pair("liegen", "gelegen")]
+        return TransformationModel(par.StripProcessor(), CountingEncoder(), ["pp"], [classifier], [transformations])
+
+    def test_cache(self) -> None:
+        model = self.__build_model()
+        model.set_cache_size(1)
+        self.assertEqual(model.predict(" machen"), {"pp": "gemacht"})
+        self.assertEqual(model.predict("machen "), {"pp": "gemacht"})
+        self.assertEqual(model.encoder.calls, 1)
+        self.assertEqual(model.predict_target("liegen", "pp"), "gelegen")
+        self.assertEqual(model.predict_target("machen", "pp"), "gemacht")
+        self.assertEqual(model.encoder.calls, 3)
+        self.assertEqual((model.cache.hits, model.cache.misses, model.cache.evictions), (1, 3, 2))
+
+    def test_bypass(self) -> None:
+        model = self.__build_model()
+        model.set_cache_size(10)
+        model.cache.bypass = True
+        model.predict("machen")
+        model.predict("machen")
+        self.assertEqual(model.encoder.calls, 2)
+        self.assertEqual(len(model.cache), 0)
+        model.set_cache_size(0)
+        self.assertIsNone(model.cache)
+
+    def test_cache_not_stored(self) -> None:
+        model = self.__build_model()
+        model.set_cache_size(10)
+        model.predict("machen")
+        restored = pickle.loads(pickle.dumps(model))
+        self.assertIsNone(restored.cache)
+        self.assertIsNotNone(model.cache)
+        self.assertEqual(restored.predict("liegen"), {"pp": "gelegen"})
+
+    def test_exact_matches(self) -> None:
+        classifier = SuffixTrieClassifier().fit(["machen", "liegen"], [0, 1])
+        transformations = [analyze_word_pair("machen", "gemacht"), analyze_word_pair("liegen", "gelegen")]
+        # "liegenachen" is memorized with the class the trie would not give it; "machen" has no form of target "b"
+        memorized = transformations[1].apply("liegenachen")
+        table = ExactMatchTable.from_word_tuples([("liegenachen", memorized, memorized), ("machen", "gemacht", "")],
+                                                 [[1, 0], [1]])
+        model = TransformationModel(par.StripProcessor(), CountingEncoder(), ["a", "b"], [classifier, classifier],
+                                    [transformations, transformations], exact_matches=table)
+        self.assertEqual(model.predict("liegenachen"), {"a": memorized, "b": memorized})
+        self.assertEqual(model.encoder.calls, 0)
+        self.assertEqual(model.predict("machen"), {"a": "gemacht", "b": "gemacht"})
+        self.assertEqual(model.encoder.calls, 1)
+        self.assertEqual(model.predict_top_k(["liegenachen", "lachen", "machen"], k=1),
+                         [{"a": memorized, "b": memorized}, {"a": None, "b": None},
+                          {"a": "gemacht", "b": "gemacht"}])
+        model.set_cache_size(10)
+        self.assertEqual(model.predict_target("liegenachen", "b"), memorized)
+        self.assertEqual(model.encoder.calls, 3)
+        self.assertIs(pickle.loads(pickle.dumps(model)).exact_matches.find("machen"), 1)
+
+    def test_required_substrings(self) -> None:
+        transformation = analyze_word_pair("liegen", "gelegen")
+        self.assertEqual(required_substrings(transformation), ("", "li", "egen"))
+        for word in ["liegen", "biegen", "lieben", "fliegen", "egenli", "liegenachen", ""]:
+            try:
+                transformation.apply(word)
+                applies = True
+            except ValueError:
+                applies = False
+            self.assertEqual(contains_in_order(word, required_substrings(transformation)), applies)
+
+    def test_predict_top_k(self) -> None:
+        model = self.__build_model()
+        # the ending "achen" gives the class of "machen", whose transformation does not apply
+        self.assertRaises(ValueError, model.predict, "liegenachen")
+        self.assertEqual(model.predict_top_k(["liegenachen", "machen", "xy"], k=1),
+                         [{"pp": None}, {"pp": "gemacht"}, {"pp": None}])
+        self.assertEqual(model.predict_top_k(["liegenachen", "machen", "xy"], k=2),
+                         [{"pp": "gelegen"}, {"pp": "gemacht"}, {"pp": None}])
+        self.assertEqual(model.predict_top_k([]), [])
+
+    def test_predict_top_k_cache(self) -> None:
+        model = self.__build_model()
+        model.set_cache_size(10)
+        expected = [{"pp": "gelegen"}, {"pp": "gemacht"}, {"pp": None}]
+        self.assertEqual(model.predict_top_k(["liegenachen", "machen", "xy"], k=2), expected)
+        self.assertEqual((model.cache.hits, model.cache.misses), (0, 3))
+        # words without an applicable class are cached too, and every k has entries of its own
+        self.assertEqual(model.predict_top_k(["xy", "machen", "liegenachen"], k=2), expected[::-1])
+        self.assertEqual((model.cache.hits, model.cache.misses), (3, 3))
+        self.assertEqual(model.predict_top_k(["liegenachen"], k=1), [{"pp": None}])
+        self.assertEqual((model.cache.hits, model.cache.misses), (3, 4))
+
+    def test_ranking(self) -> None:
+        classifier = SuffixTrieClassifier().fit(["machen", "liegen", "sagen"], [0, 1, 1])
+        transformations = [analyze_word_pair("machen", "gemacht"), analyze_word_pair("liegen", "gelegen")]
+        model = TransformationModel(par.StripProcessor(), PlainWordEncoder(), ["pp"], [classifier], [transformations],
+                                    [[1, 2]])
+        self.assertEqual(model.ranked_classes({0: 1.0}, 0, 2), [0, 1])
+        self.assertEqual(model.ranked_classes({}, 0, 2), [1, 0])
+        self.assertEqual(model.ranked_classes({0: 1.0, 1: 1.0}, 0, 1), [1])
+        self.assertRaises(ValueError, TransformationModel, par.StripProcessor(), PlainWordEncoder(), ["pp"],
+                          [classifier], [transformations], [[1]])
+        self.assertEqual(pickle.loads(pickle.dumps(model)).class_counts, ((1, 2),))
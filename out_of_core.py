@@ -0,0 +1,442 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import hashlib
+import heapq
+import mmap
+import os
+import resource
+import struct
+import tempfile
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import word_analysis as ana
+from input_parsing import WordProcessor
+from model import TransformationModel
+from training import expand_input_paths, fit_classifier, make_encoder, parse_word_tuples
+from training_pipeline import read_line_chunks
+from tree_compaction import CompactionReport, compact_classifiers, verify_compaction
+
+# training within a memory budget: the corpus is read in chunks and nothing that grows with the corpus stays in memory.
+# duplicate word tuples are found in a first pass by an external sort of the blake2b digests of all tuples (see
+# find_duplicate_rows), which marks them in a bitmap file. clusters only keep their transformation in memory, the
+# word pairs of their members, the cluster label and row of every analyzed pair and the base words are spilled to
+# compact binary files in a work directory. a second pass over the spilled base words writes the feature matrix into
+# files that are memory-mapped for fitting. sklearn still converts the rows it fits into its own float32 matrix.
+
+BYTES_PER_WORD_PAIR = 4096 # rough memory used while analyzing one word pair, to derive the chunk size from the budget
+MIN_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 100000
+
+LENGTH = struct.Struct("=I")
+DIGEST_RECORD = struct.Struct(">16sQ") # digest and row, sorting by digest and then by row as bytes
+
+
+def peak_rss() -> int:
+    # peak resident memory of this process in bytes (ru_maxrss is in kilobytes on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def chunk_size_for(memory_budget: int) -> int:
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, memory_budget // 8 // BYTES_PER_WORD_PAIR))
+
+
+class StringSpill:
+
+    # append-only file of strings, each stored as its UTF-8 length followed by its UTF-8 bytes
+
+    def __init__(self, file_name: str) -> None:
+        self.__file_name = file_name
+        self.__pending = bytearray()
+        self.__count = 0
+        open(file_name, "wb").close()
+
+    def append(self, strings: Iterable[str]) -> None:
+        for string in strings:
+            encoded = string.encode("utf-8")
+            self.__pending += LENGTH.pack(len(encoded))
+            self.__pending += encoded
+            self.__count += 1
+        if len(self.__pending) > 1 << 16:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self.__pending) > 0:
+            with open(self.__file_name, "ab") as spill_file:
+                spill_file.write(self.__pending)
+            self.__pending = bytearray()
+
+    def __iter__(self) -> Iterator[str]:
+        self.flush()
+        with open(self.__file_name, "rb") as spill_file:
+            while True:
+                header = spill_file.read(LENGTH.size)
+                if len(header) < LENGTH.size:
+                    return
+                length, = LENGTH.unpack(header)
+                yield str(spill_file.read(length), "utf-8")
+
+    def chunks(self, chunk_size: int) -> Iterator[List[str]]:
+        chunk = []
+        for string in self:
+            chunk.append(string)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if len(chunk) > 0:
+            yield chunk
+
+    def __len__(self) -> int:
+        return self.__count
+
+
+class IntSpill:
+
+    # append-only file of integers of one array typecode, memory-mapped as a numpy array once complete
+
+    def __init__(self, file_name: str, typecode: str = "i") -> None:
+        self.__file_name = file_name
+        self.__pending = array(typecode)
+        self.__count = 0
+        open(file_name, "wb").close()
+
+    def append(self, value: int) -> None:
+        self.__pending.append(value)
+        self.__count += 1
+        if len(self.__pending) >= 1 << 14:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self.__pending) > 0:
+            with open(self.__file_name, "ab") as spill_file:
+                self.__pending.tofile(spill_file)
+            del self.__pending[:]
+
+    def mapped(self):
+        import numpy
+        self.flush()
+        if self.__count == 0:
+            return numpy.zeros(0, dtype=numpy.dtype(self.__pending.typecode))
+        return numpy.memmap(self.__file_name, dtype=numpy.dtype(self.__pending.typecode), mode="r")
+
+    def __len__(self) -> int:
+        return self.__count
+
+
+class SpilledClusterSet:
+
+    # the clustering of ClusterSet (elements join the first cluster of their bucket that accepts them) with the member
+    # word pairs of every cluster in its own file instead of in memory. the members are only read back when a join
+    # changes the transformation of a cluster (see Cluster.can_add_item), which happens at most once per letter of
+    # its pre patterns, or when a join is rejected
+
+    def __init__(self, directory: str, member_buffer: int = 64) -> None:
+        self.__directory = directory
+        self.__member_buffer = member_buffer
+        self.__buckets = dict() # type: Dict[Tuple[Tuple[str, str], ...], List[int]]
+        self.__transformations = [] # type: List[ana.WordTransformation]
+        self.__consistent = [] # type: List[bool]
+        self.__sizes = [] # type: List[int]
+        self.__pending = [] # type: List[List[Tuple[str, str]]]
+
+    def __member_file(self, c: int) -> str:
+        return os.path.join(self.__directory, "cluster{}.members".format(c))
+
+    def __flush(self, c: int) -> None:
+        if len(self.__pending[c]) > 0:
+            spill = bytearray()
+            for word_a, word_b in self.__pending[c]:
+                for word in [word_a, word_b]:
+                    encoded = word.encode("utf-8")
+                    spill += LENGTH.pack(len(encoded))
+                    spill += encoded
+            with open(self.__member_file(c), "ab") as member_file:
+                member_file.write(spill)
+            self.__pending[c] = []
+
+    def members(self, c: int) -> Iterator[Tuple[str, str]]:
+        # in the order in which they were added
+        self.__flush(c)
+        with open(self.__member_file(c), "rb") as member_file:
+            while True:
+                words = []
+                for _ in range(2):
+                    header = member_file.read(LENGTH.size)
+                    if len(header) < LENGTH.size:
+                        return
+                    length, = LENGTH.unpack(header)
+                    words.append(str(member_file.read(length), "utf-8"))
+                yield words[0], words[1]
+
+    def __can_add(self, c: int, word_a: str, word_b: str, transformation: ana.WordTransformation) -> bool:
+        current = self.__transformations[c]
+        if not current.maybe_joinable(transformation):
+            return False
+        joined_transformation = current.join(transformation)
+        if not (self.__consistent[c] and joined_transformation == current):
+            for member_a, member_b in self.members(c):
+                if joined_transformation.apply(member_a) != member_b:
+                    return False
+        return joined_transformation.apply(word_a) == word_b
+
+    def add(self, word_a: str, word_b: str, transformation: ana.WordTransformation) -> int:
+        bucket = self.__buckets.setdefault(transformation.join_key, [])
+        for c in bucket:
+            if self.__can_add(c, word_a, word_b, transformation):
+                self.__transformations[c] = self.__transformations[c].join(transformation)
+                self.__consistent[c] = True
+                break
+        else:
+            c = len(self.__transformations)
+            self.__transformations.append(transformation)
+            self.__consistent.append(self.__reproduces(transformation, word_a, word_b))
+            self.__sizes.append(0)
+            self.__pending.append([])
+            bucket.append(c)
+        self.__sizes[c] += 1
+        self.__pending[c].append((word_a, word_b))
+        if len(self.__pending[c]) >= self.__member_buffer:
+            self.__flush(c)
+        return c
+
+    @staticmethod
+    def __reproduces(transformation: ana.WordTransformation, word_a: str, word_b: str) -> bool:
+        try:
+            return transformation.apply(word_a) == word_b
+        except ValueError:
+            return False
+
+    @property
+    def transformations(self) -> Sequence[ana.WordTransformation]:
+        return self.__transformations
+
+    @property
+    def sizes(self) -> Sequence[int]:
+        return self.__sizes
+
+    def __len__(self) -> int:
+        return len(self.__transformations)
+
+
+def tuple_digest(word_tuple: Tuple[str, ...]) -> bytes:
+    # cells never contain a line break, so joining them with one keeps different tuples different
+    return hashlib.blake2b("\n".join(word_tuple).encode("utf-8"), digest_size=16).digest()
+
+
+def read_digest_run(file_name: str) -> Iterator[bytes]:
+    with open(file_name, "rb") as run:
+        while True:
+            record = run.read(DIGEST_RECORD.size)
+            if len(record) < DIGEST_RECORD.size:
+                return
+            yield record
+
+
+class DuplicateRows:
+
+    # bit r of a file mapped into memory is set if word tuple r (counting the parsed tuples of all files) occurred in
+    # an earlier row. one bit per row instead of a set of the seen tuples
+
+    def __init__(self, file_name: str, rows: int) -> None:
+        self.__rows = rows
+        self.__file = open(file_name, "w+b")
+        self.__file.truncate(max((rows + 7) // 8, 1))
+        self.__bits = mmap.mmap(self.__file.fileno(), 0)
+        self.count = 0
+
+    @property
+    def rows(self) -> int:
+        return self.__rows
+
+    def add(self, row: int) -> None:
+        self.__bits[row // 8] |= 1 << (row % 8)
+        self.count += 1
+
+    def __contains__(self, row: int) -> bool:
+        return self.__bits[row // 8] & (1 << (row % 8)) != 0
+
+    def close(self) -> None:
+        self.__bits.close()
+        self.__file.close()
+
+
+def find_duplicate_rows(file_names: Sequence[str], input_processor: WordProcessor, chunk_size: int,
+                        directory: str) -> DuplicateRows:
+    # writes the sorted (digest, row) records of every chunk to a run file and merges the runs: every record with the
+    # digest of the record before it is a later occurrence of the same tuple. 16 byte blake2b digests make a false
+    # match practically impossible, unlike the built-in hash
+    runs = []
+    rows = 0
+    for line_chunk in read_line_chunks(file_names, chunk_size):
+        records = []
+        for word_tuple in parse_word_tuples(line_chunk, input_processor):
+            records.append(DIGEST_RECORD.pack(tuple_digest(word_tuple), rows))
+            rows += 1
+        records.sort()
+        runs.append(os.path.join(directory, "digests{}".format(len(runs))))
+        with open(runs[-1], "wb") as run:
+            run.write(b"".join(records))
+    duplicates = DuplicateRows(os.path.join(directory, "duplicates.bits"), rows)
+    previous = None
+    for record in heapq.merge(*[read_digest_run(run) for run in runs]):
+        digest, row = DIGEST_RECORD.unpack(record)
+        if digest == previous:
+            duplicates.add(row)
+        previous = digest
+    for run in runs:
+        os.remove(run)
+    return duplicates
+
+
+class OutOfCoreReport:
+
+    def __init__(self, word_tuples: int, chunk_size: int, memory_budget: int, peak_rss: int, spilled_bytes: int,
+                 seconds: float) -> None:
+        self.word_tuples = word_tuples
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.peak_rss = peak_rss
+        self.spilled_bytes = spilled_bytes
+        self.seconds = seconds
+
+    @property
+    def within_budget(self) -> bool:
+        return self.peak_rss <= self.memory_budget
+
+    def __repr__(self) -> str:
+        return "<OutOfCoreReport, {} word tuples in chunks of {}, peak RSS {} of {} bytes, {} bytes spilled>".format(
+            self.word_tuples, self.chunk_size, self.peak_rss, self.memory_budget, self.spilled_bytes)
+
+
+def directory_size(directory: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def write_features(encoder, words: StringSpill, chunk_size: int, directory: str):
+    # encodes the spilled words chunk by chunk into files and maps them: a dense float32 matrix for the ordinal
+    # encoding, the arrays of a CSR matrix for the one-hot encoding
+    import numpy
+    rows = len(words)
+    if not hasattr(encoder, "vectorizer"):
+        file_name = os.path.join(directory, "features.f32")
+        with open(file_name, "wb") as feature_file:
+            for chunk in words.chunks(chunk_size):
+                numpy.asarray(encoder.transform(chunk), dtype=numpy.float32).tofile(feature_file)
+        return numpy.memmap(file_name, dtype=numpy.float32, mode="r", shape=(rows, encoder.feature_count))
+    import scipy.sparse
+    names = [os.path.join(directory, name) for name in ["indptr.i64", "indices.i32", "data.f32"]]
+    nonzeros = 0
+    with open(names[0], "wb") as indptr_file, open(names[1], "wb") as indices_file, open(names[2], "wb") as data_file:
+        numpy.zeros(1, dtype=numpy.int64).tofile(indptr_file)
+        for chunk in words.chunks(chunk_size):
+            x_chunk = encoder.transform(chunk).tocsr()
+            x_chunk.sort_indices()
+            (x_chunk.indptr[1:].astype(numpy.int64) + nonzeros).tofile(indptr_file)
+            x_chunk.indices.astype(numpy.int32).tofile(indices_file)
+            x_chunk.data.astype(numpy.float32).tofile(data_file)
+            nonzeros += x_chunk.nnz
+    if nonzeros == 0:
+        return scipy.sparse.csr_matrix((rows, encoder.feature_count), dtype=numpy.float32)
+    indptr = numpy.memmap(names[0], dtype=numpy.int64, mode="r")
+    indices = numpy.memmap(names[1], dtype=numpy.int32, mode="r")
+    data = numpy.memmap(names[2], dtype=numpy.float32, mode="r")
+    return scipy.sparse.csr_matrix((data, indices, indptr), shape=(rows, encoder.feature_count), copy=False)
+
+
+def train_out_of_core(patterns: Iterable[str],
+                      input_processor: WordProcessor,
+                      target_names: Optional[Sequence[str]],
+                      memory_budget: int,
+                      feature_mode: str = "onehot",
+                      positions: int = 8,
+                      deduplicate: bool = True,
+                      compact: bool = True,
+                      work_directory: Optional[str] = None
+                      ) -> Tuple[TransformationModel, OutOfCoreReport, Optional[CompactionReport]]:
+    # trains a tree model on the corpus files in chunks derived from memory_budget (bytes). target_names default to
+    # "target" or "target1", "target2", ...; the spill files live in a temporary directory within work_directory
+    start = time.perf_counter()
+    file_names = expand_input_paths(patterns)
+    chunk_size = chunk_size_for(memory_budget)
+    with tempfile.TemporaryDirectory(prefix="pywords-", dir=work_directory) as directory:
+        base_words = StringSpill(os.path.join(directory, "base_words"))
+        cluster_sets = [] # type: List[SpilledClusterSet]
+        labels = [] # type: List[IntSpill]
+        rows = [] # type: List[IntSpill]
+        duplicates = find_duplicate_rows(file_names, input_processor, chunk_size, directory) if deduplicate else None
+        try:
+            input_row = 0
+            for line_chunk in read_line_chunks(file_names, chunk_size):
+                for word_tuple in parse_word_tuples(line_chunk, input_processor):
+                    input_row += 1
+                    if duplicates is not None and input_row - 1 in duplicates:
+                        # a tuple that occurred in an earlier row
+                        continue
+                    if len(cluster_sets) == 0:
+                        if len(word_tuple) < 2:
+                            raise ValueError("Word tuples require at least a base form and one target form")
+                        for t in range(len(word_tuple) - 1):
+                            target_directory = os.path.join(directory, "target{}".format(t))
+                            os.mkdir(target_directory)
+                            cluster_sets.append(SpilledClusterSet(target_directory))
+                            labels.append(IntSpill(os.path.join(target_directory, "labels.i32"), "i"))
+                            rows.append(IntSpill(os.path.join(target_directory, "rows.i64"), "q"))
+                    if len(word_tuple) != len(cluster_sets) + 1:
+                        raise ValueError("Word tuple <{}> has {} columns, expected {}".format(
+                            ", ".join(word_tuple), len(word_tuple), len(cluster_sets) + 1))
+                    row = len(base_words)
+                    base_words.append([word_tuple[0]])
+                    for t, target_word in enumerate(word_tuple[1:]):
+                        # an empty target cell marks a missing form in the paradigm
+                        if target_word != "":
+                            transformation = ana.analyze_word_pair(word_tuple[0], target_word)
+                            labels[t].append(cluster_sets[t].add(word_tuple[0], target_word, transformation))
+                            rows[t].append(row)
+        finally:
+            if duplicates is not None:
+                duplicates.close()
+        if len(base_words) == 0:
+            raise ValueError("No word tuples given")
+        if target_names is None:
+            target_names = ["target"] if len(cluster_sets) == 1 else ["target{}".format(t + 1) for t in range(len(cluster_sets))]
+        elif len(target_names) != len(cluster_sets):
+            raise ValueError("{} target names given for {} target columns".format(len(target_names), len(cluster_sets)))
+
+        encoder = make_encoder(feature_mode, positions).fit(base_words)
+        x_data = write_features(encoder, base_words, chunk_size, directory)
+        classifiers = []
+        for t in range(len(cluster_sets)):
+            target_rows = rows[t].mapped()
+            x_target = x_data if len(target_rows) == len(base_words) else x_data[target_rows]
+            classifiers.append(fit_classifier(x_target, labels[t].mapped(), "tree"))
+        model = TransformationModel(input_processor, encoder, target_names, classifiers,
+                                    [cluster_set.transformations for cluster_set in cluster_sets],
+                                    [cluster_set.sizes for cluster_set in cluster_sets])
+        compaction_report = None
+        if compact:
+            compact_encoder, trees, compaction_report = compact_classifiers(model.classifiers, model.encoder)
+            for chunk in base_words.chunks(chunk_size):
+                verify_compaction(model, compact_encoder, trees, chunk)
+            model = TransformationModel(input_processor, compact_encoder, target_names, trees, model.transformations,
+                                        model.class_counts)
+        spilled_bytes = sum(directory_size(os.path.join(directory, name)) for name in os.listdir(directory)
+                            if os.path.isdir(os.path.join(directory, name))) + directory_size(directory)
+        del x_data
+    report = OutOfCoreReport(len(base_words), chunk_size, memory_budget, peak_rss(), spilled_bytes,
+                             time.perf_counter() - start)
+    return model, report, compaction_report
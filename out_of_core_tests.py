@@ -0,0 +1,118 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import tempfile
+import unittest
+
+import benchmark_corpus
+import input_parsing as par
+import out_of_core
+import training
+from tree_compaction import CompactTree
+from word_analysis import analyze_word_pair
+
+
+class SpillTests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def test_spills(self) -> None:
+        strings = out_of_core.StringSpill(os.path.join(self.__directory.name, "strings"))
+        words = ["liegen", "", "한국어", "sagen"] * 50
+        strings.append(words)
+        self.assertEqual(list(strings), words)
+        self.assertEqual(len(strings), 200)
+        self.assertEqual([len(chunk) for chunk in strings.chunks(64)], [64, 64, 64, 8])
+        integers = out_of_core.IntSpill(os.path.join(self.__directory.name, "integers"), "q")
+        for value in [3, -1, 2 ** 40]:
+            integers.append(value)
+        self.assertEqual(list(integers.mapped()), [3, -1, 2 ** 40])
+
+    def test_same_clusters_as_cluster_set(self) -> None:
+        pairs = benchmark_corpus.generate_word_pairs(500, seed=2)
+        expected = training.cluster_word_pairs(pairs)
+        clusters = out_of_core.SpilledClusterSet(self.__directory.name, member_buffer=4)
+        labels = [clusters.add(word_a, word_b, analyze_word_pair(word_a, word_b)) for word_a, word_b in pairs]
+        self.assertEqual(labels, list(expected.labels))
+        self.assertEqual(list(clusters.transformations), list(expected.transformations))
+        self.assertEqual(list(clusters.sizes), [expected.size_of(c) for c in range(len(expected))])
+        self.assertEqual(sorted(pair for c in range(len(clusters)) for pair in clusters.members(c)), sorted(pairs))
+
+
+class OutOfCoreTrainingTests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+        pairs = benchmark_corpus.generate_word_pairs(400, seed=3)
+        self.__word_tuples = [(word_a, word_b, word_b + "x") for word_a, word_b in pairs]
+        self.__file_name = os.path.join(self.__directory.name, "words.txt")
+        with open(self.__file_name, "w", encoding="utf-8") as f:
+            f.write("".join(", ".join(word_tuple) + "\n" for word_tuple in self.__word_tuples + self.__word_tuples[:20]))
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def test_predictions(self) -> None:
+        word_tuples, _ = training.read_corpus([self.__file_name], par.StripProcessor())
+        for feature_mode in ["onehot", "ordinal"]:
+            model, report, compaction_report = out_of_core.train_out_of_core(
+                [self.__file_name], par.StripProcessor(), ["pp", "x"], 2 ** 20, feature_mode,
+                work_directory=self.__directory.name)
+            self.assertEqual(report.word_tuples, 400)
+            self.assertEqual(report.chunk_size, out_of_core.MIN_CHUNK_SIZE)
+            self.assertGreater(report.spilled_bytes, 0)
+            self.assertGreater(report.peak_rss, 0)
+            self.assertIsNotNone(compaction_report)
+            self.assertIsInstance(model.classifiers[0], CompactTree)
+            expected = training.cluster_word_pairs([word_tuple[:2] for word_tuple in word_tuples])
+            self.assertEqual(list(model.transformations[0]), list(expected.transformations))
+            # the tree fitted to the training words reproduces all their transformations
+            for word_tuple in word_tuples[:100]:
+                self.assertEqual(model.predict(word_tuple[0]), {"pp": word_tuple[1], "x": word_tuple[2]})
+        self.assertEqual(os.listdir(self.__directory.name), ["words.txt"])
+
+    def test_find_duplicate_rows(self) -> None:
+        second = os.path.join(self.__directory.name, "more.txt")
+        with open(second, "w", encoding="utf-8") as f:
+            f.write("ab, c\na, bc\n" + "".join(", ".join(word_tuple) + "\n" for word_tuple in self.__word_tuples[::7]))
+        # runs of 7 rows, so that duplicates are only found by merging the runs
+        duplicates = out_of_core.find_duplicate_rows([self.__file_name, second], par.StripProcessor(), 7,
+                                                     self.__directory.name)
+        word_tuples = self.__word_tuples + self.__word_tuples[:20] + [("ab", "c"), ("a", "bc")] + self.__word_tuples[::7]
+        seen = set()
+        expected = []
+        for row, word_tuple in enumerate(word_tuples):
+            if word_tuple in seen:
+                expected.append(row)
+            seen.add(word_tuple)
+        self.assertEqual(duplicates.rows, len(word_tuples))
+        self.assertEqual([row for row in range(duplicates.rows) if row in duplicates], expected)
+        self.assertEqual(duplicates.count, len(expected))
+        duplicates.close()
+        self.assertEqual(sorted(os.listdir(self.__directory.name)), ["duplicates.bits", "more.txt", "words.txt"])
+
+    def test_errors(self) -> None:
+        self.assertRaises(ValueError, out_of_core.train_out_of_core, [self.__file_name], par.StripProcessor(),
+                          ["pp"], 2 ** 20)
+        empty = os.path.join(self.__directory.name, "empty.txt")
+        open(empty, "w").close()
+        self.assertRaises(ValueError, out_of_core.train_out_of_core, [empty], par.StripProcessor(), None, 2 ** 20)
@@ -0,0 +1,32 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+
+from corpus_index import build_index, index_name_of
+
+
+def main(argv):
+    if len(argv) == 0 or argv[0] == "-h":
+        print("usage: {} <input_file> [<input_file> ...]".format(sys.argv[0]))
+        print("writes a line offset index next to every input file for sharded reading")
+        sys.exit(2)
+    for file_name in argv:
+        line_count = build_index(file_name)
+        print("{}: indexed {} lines in {}".format(file_name, line_count, index_name_of(file_name)))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,109 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import getopt
+import sys
+
+from corpus_index import IndexedCorpus, open_corpus
+from executors import EXECUTOR_KINDS, resolve_executor_kind
+from inference import load_model, transform_words, transform_words_in_parallel
+
+
+BATCH_SIZE = 1024
+
+
+def exit_with_usage():
+    print("usage: {} [-t <target>|--target=<target>] [-i <input_file>|--infile=<input_file>] [--shard=<i>/<n>] [--cache=<n>] [--top_k=<k>] [-j <jobs>|--jobs=<jobs>] [--executor=auto|processes|threads] <model_file> [<word> ...]".format(sys.argv[0]))
+    print("transforms the given words, or the words in the input file (one per line), with a stored model")
+    print("--cache keeps the outputs of the given number of most recent words and reports its statistics")
+    print("--top_k falls back to the next most likely of the given number of classes when a transformation does not apply")
+    print("--jobs transforms batches of words in parallel, in threads if the GIL is disabled and in processes otherwise (see --executor)")
+    print("--shard only transforms the i-th of n contiguous shares (0 <= i < n) of an indexed input file (see pywords-index.py)")
+    sys.exit(2)
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "ht:i:j:", ["target=", "infile=", "shard=", "cache=", "top_k=", "jobs=",
+                                                   "executor="])
+    except getopt.GetoptError:
+        exit_with_usage()
+
+    target_name = None
+    input_name = None
+    shard = None
+    cache_size = 0
+    top_k = 0
+    jobs = 1
+    executor = "auto"
+    for opt, arg in opts:
+        if opt == "--target" or opt == "-t":
+            target_name = arg
+        elif opt == "--infile" or opt == "-i":
+            input_name = arg
+        elif opt == "--top_k":
+            top_k = int(arg)
+        elif opt == "--jobs" or opt == "-j":
+            jobs = int(arg)
+        elif opt == "--executor":
+            if arg not in EXECUTOR_KINDS:
+                exit_with_usage()
+            executor = arg
+        elif opt == "--cache":
+            cache_size = int(arg)
+        elif opt == "--shard":
+            try:
+                shard = tuple(int(part) for part in arg.split("/"))
+            except ValueError:
+                exit_with_usage()
+            if len(shard) != 2 or not 0 <= shard[0] < shard[1]:
+                exit_with_usage()
+        elif opt == "-h":
+            exit_with_usage()
+
+    if len(args) == 0:
+        exit_with_usage()
+
+    model = load_model(args[0])
+    if target_name is not None and target_name not in model.target_names:
+        print("error: the model has no target <{}>, its targets are {}".format(target_name, ", ".join(model.target_names)))
+        sys.exit(2)
+    model.set_cache_size(cache_size)
+    words = args[1:]
+    if input_name is not None and shard is not None:
+        with IndexedCorpus(input_name) as corpus:
+            words += [line.strip() for line in corpus.shard(*shard) if line.strip() != ""]
+    elif input_name is not None:
+        with open_corpus(input_name) as f:
+            words += [line.strip() for line in f.readlines() if line.strip() != ""]
+    target_names = model.target_names if target_name is None else [target_name]
+    if jobs > 1:
+        rows = transform_words_in_parallel(model, words, target_names, top_k, jobs, executor, BATCH_SIZE)
+    else:
+        rows = (row for start in range(0, len(words), BATCH_SIZE)
+                for row in transform_words(model, words[start:start + BATCH_SIZE], target_names, top_k))
+    for word, outputs in zip(words, rows):
+        print(", ".join([word] + ["?" if output is None else output for output in outputs]))
+    if model.cache is not None:
+        print("cache: {} hits, {} misses, {} evictions".format(model.cache.hits, model.cache.misses, model.cache.evictions),
+              file=sys.stderr)
+    if model.exact_matches is not None and (jobs == 1 or resolve_executor_kind(executor) == "threads"):
+        # worker processes count their lookups in their own copy of the model
+        print("exact matches: {} training words, {} bytes, {} hits, {} misses, hit rate {:.1%}".format(
+            len(model.exact_matches), model.exact_matches.nbytes, model.exact_matches.hits, model.exact_matches.misses,
+            model.exact_matches.hit_rate), file=sys.stderr)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
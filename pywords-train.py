@@ -15,31 +15,81 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
 
-import codecs
 import sys
 import getopt
+import os
 import pickle
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.feature_extraction import DictVectorizer
+import secrets
+import time
 
+import distributed_training as dt
 import input_parsing as par
-from training_data_structures import TrainingSetElement, ClusterSet
-from tree_visualization import visualize_tree
+import out_of_core as ooc
+import training as tr
+import training_pipeline as tp
+import word_analysis as ana
+from exact_match import ExactMatchTable
+from executors import EXECUTOR_KINDS, gil_enabled, resolve_executor_kind
+from model import TransformationModel
+from shared_model import write_shared_model
+from tree_compaction import compact_model
 
 
+def store_model(model, output_name: str, shared_layout: bool) -> None:
+    # sklearn advises to use pickle to store classifiers: http://scikit-learn.org/stable/modules/model_persistence.html
+    print("Storing classifier...")
+    if shared_layout:
+        print("... wrote a shared model file of {} bytes".format(write_shared_model(model, output_name + ".clf")))
+    else:
+        with open(output_name + ".clf", "wb") as output_file:
+            pickle.dump(model, output_file)
+
 def exit_with_usage():
-    print("usage: {} [-v|--visualize] [-o <output_file>|--outfile=<output_file>] [no_saveout] <input_file>".format(sys.argv[0]))
+    print("usage: {} [-v|--visualize] [-o <output_file>|--outfile=<output_file>] [no_saveout] "
+          "[--targets=<name>,<name>,...] [-j <jobs>|--jobs=<jobs>] [--read_with_processes] [--keep_duplicates] "
+          "[--features=onehot|ordinal] [--positions=<k>] [--backend=tree|trie|forest] [--forest_size=<trees>] "
+          "[--no_compact] [--no_exact_matches] [--batch_alignment] "
+          "[--linear_space_threshold=<length>] [--merge_clusters] [--shared_layout] "
+          "[--keep_duplicate_rows] [--pipeline] [--chunk_size=<word pairs>] [--queue_depth=<chunks>] "
+          "[--memory_budget=<MB>] [--executor=auto|processes|threads] [--coordinator=<host>:<port>] [--authkey=<key>] "
+          "<input_file> [<input_file> ...]".format(sys.argv[0]))
     sys.exit(2)
 
 def main(argv):
     try:
-        opts, args = getopt.getopt(argv, "hvo:", ["outfile=", "visualize", "no_saveout"])
+        opts, args = getopt.getopt(argv, "hvo:j:", ["outfile=", "visualize", "no_saveout", "targets=", "jobs=",
+                                                      "read_with_processes", "keep_duplicates", "features=", "positions=",
+                                                      "backend=", "forest_size=", "no_compact", "no_exact_matches", "batch_alignment",
+                                                      "linear_space_threshold=", "merge_clusters", "shared_layout",
+                                                      "keep_duplicate_rows", "pipeline", "chunk_size=", "queue_depth=",
+                                                      "memory_budget=", "executor=", "coordinator=", "authkey="])
     except getopt.GetoptError:
         exit_with_usage()
 
     save_classifier = True
     create_visualization = False
     output_name = "classifier"
+    target_names = None
+    jobs = 1
+    read_with_processes = False
+    deduplicate = True
+    feature_mode = "onehot"
+    positions = 8
+    backend = "tree"
+    forest_size = tr.FOREST_SIZE
+    compact = True
+    exact_matches = True
+    batch_alignment = False
+    merge = False
+    shared_layout = False
+    collapse_duplicates = True
+    pipeline = False
+    chunk_size = 1000
+    queue_depth = 4
+    memory_budget = None
+    executor = "auto"
+    coordinator_address = None
+    authkey = os.environ.get("PYWORDS_AUTHKEY", "").encode("utf-8")
     for opt, arg in opts:
         if opt == "--no_saveout":
             save_classifier = False
@@ -47,66 +97,207 @@ def main(argv):
             create_visualization = True
         elif opt == "--outfile" or opt == "-o":
             output_name = arg
+        elif opt == "--targets":
+            target_names = [name.strip() for name in arg.split(",")]
+        elif opt == "--jobs" or opt == "-j":
+            jobs = int(arg)
+        elif opt == "--read_with_processes":
+            read_with_processes = True
+        elif opt == "--keep_duplicates":
+            deduplicate = False
+        elif opt == "--features":
+            feature_mode = arg
+        elif opt == "--positions":
+            positions = int(arg)
+        elif opt == "--backend":
+            if arg not in tr.BACKENDS:
+                exit_with_usage()
+            backend = arg
+        elif opt == "--forest_size":
+            forest_size = int(arg)
+        elif opt == "--no_compact":
+            compact = False
+        elif opt == "--no_exact_matches":
+            exact_matches = False
+        elif opt == "--batch_alignment":
+            batch_alignment = True
+        elif opt == "--pipeline":
+            pipeline = True
+        elif opt == "--chunk_size":
+            chunk_size = int(arg)
+        elif opt == "--queue_depth":
+            queue_depth = int(arg)
+        elif opt == "--coordinator":
+            try:
+                coordinator_address = dt.parse_address(arg)
+            except ValueError:
+                exit_with_usage()
+        elif opt == "--authkey":
+            authkey = arg.encode("utf-8")
+        elif opt == "--executor":
+            if arg not in EXECUTOR_KINDS:
+                exit_with_usage()
+            executor = arg
+        elif opt == "--memory_budget":
+            memory_budget = int(arg) * 2 ** 20
+        elif opt == "--keep_duplicate_rows":
+            collapse_duplicates = False
+        elif opt == "--shared_layout":
+            shared_layout = True
+        elif opt == "--merge_clusters":
+            merge = True
+        elif opt == "--linear_space_threshold":
+            ana.LINEAR_SPACE_THRESHOLD = int(arg)
         elif opt == "-h":
             exit_with_usage()
 
     if len(args) == 0:
         exit_with_usage()
+    if shared_layout and (backend != "tree" or not compact):
+        print("error: --shared_layout requires compacted trees")
+        sys.exit(2)
 
-    input_name = args[0]
+    if coordinator_address is not None and (pipeline or memory_budget is not None):
+        print("error: --coordinator cannot be combined with --pipeline or --memory_budget")
+        sys.exit(2)
 
-    print("Loading training word pairs...")
     input_processor = par.CombinedProcessor([par.StripProcessor(), par.HangeulComposer()])
-    word_pairs = []
-    with codecs.open(input_name, 'r', encoding='utf-8') as f:
-        for line in f.readlines():
-            word_pairs.append(tuple(input_processor.process_input(part) for part in line.split(",")))
-    print("... read {} word pairs".format(len(word_pairs)))
-
-    print("Analyzing training word pairs...")
-    training_set = [TrainingSetElement(pair[0], pair[1]) for pair in word_pairs]
-
-    print("Clustering training word pairs by local transformations...")
-    clusters = ClusterSet()
-    for training_instance in training_set:
-        clusters.add(training_instance)
-    clusters = clusters.get_clusters()
-    print("... split word pairs into {} clusters of similar transformations".format(len(clusters)))
+    if memory_budget is not None:
+        if backend != "tree" or pipeline:
+            print("error: --memory_budget only supports the tree backend without --pipeline")
+            sys.exit(2)
+        print("Training out of core within a memory budget of {} MB...".format(memory_budget // 2 ** 20))
+        try:
+            model, report, compaction_report = ooc.train_out_of_core(args, input_processor, target_names, memory_budget,
+                                                                     feature_mode, positions, deduplicate, compact)
+        except ValueError as e:
+            print("error: {}".format(e))
+            sys.exit(2)
+        for target_name, counts in zip(model.target_names, model.class_counts):
+            print("... split word pairs for {} into {} clusters of similar transformations".format(target_name, len(counts)))
+        if compaction_report is not None:
+            print("... compacted {} -> {} nodes, {} -> {} features; predictions verified on the training set".format(
+                compaction_report.nodes_before, compaction_report.nodes_after,
+                compaction_report.features_before, compaction_report.features_after))
+        print("... trained on {} word pairs in chunks of {} in {:.2f}s, spilling {} bytes to disk".format(
+            report.word_tuples, report.chunk_size, report.seconds, report.spilled_bytes))
+        print("... peak resident memory {:.1f} MB of a {:.1f} MB budget{}".format(
+            report.peak_rss / 2 ** 20, memory_budget / 2 ** 20, "" if report.within_budget else " (exceeded)"))
+        if save_classifier:
+            store_model(model, output_name, shared_layout)
+        if create_visualization:
+            print("Skipping visualization, which is not available when training out of core")
+        print("done!")
+        return
+
+    if jobs > 1:
+        print("Running {} jobs in {} ({})".format(jobs, resolve_executor_kind(executor),
+                                                  "GIL enabled" if gil_enabled() else "GIL disabled"))
+    print("Loading training word pairs...")
+    start = time.perf_counter()
+    if pipeline:
+        print("... reading, analyzing and clustering in a pipeline of {} word pair chunks".format(chunk_size))
+        word_tuples, pipeline_clusters, stage_stats = tp.cluster_corpus(args, input_processor, jobs, chunk_size, queue_depth,
+                                                                        deduplicate, batch_alignment, merge, executor)
+        for stats in stage_stats:
+            print("... {}: {} chunks, {:.2f}s busy, {:.2f}s waiting for input, {:.2f}s blocked by the next stage, "
+                  "{:.0f} word pairs/s".format(stats.name, stats.items, stats.busy, stats.waiting, stats.blocked,
+                                               stats.throughput))
+        print("... finished the pipeline in {:.2f}s".format(time.perf_counter() - start))
+    else:
+        word_tuples, file_stats = tr.read_corpus(args, input_processor, jobs, read_with_processes, deduplicate)
+        seconds = time.perf_counter() - start
+        for stats in file_stats:
+            print("... {}: {} word pairs, {} duplicates, {:.0f} word pairs/s".format(
+                stats.file_name, stats.word_tuples, stats.duplicates, stats.throughput))
+        print("... read {} files in {:.2f}s".format(len(file_stats), seconds))
+    target_count = tr.count_targets(word_tuples)
+    if target_names is None:
+        target_names = ["target"] if target_count == 1 else ["target{}".format(t + 1) for t in range(target_count)]
+    elif len(target_names) != target_count:
+        print("error: {} target names given for {} target columns".format(len(target_names), target_count))
+        sys.exit(2)
+    print("... read {} word pairs for {} target form(s)".format(len(word_tuples), target_count))
 
     print("Extracting features for training...")
-    x_data = []
-    c_data = []
-    for c, cluster in enumerate(clusters):
-        for training_instance in cluster.items:
-            features = dict()
-            word = training_instance.word_a
-            length = len(word)
-            features["length"] = length
-            for i in range(length):
-                features[i] = word[i]
-                features[i - length] = word[i]
-            x_data.append(features)
-            c_data.append(c)
-
-    vectorizer = DictVectorizer()
-    x_data = vectorizer.fit_transform(x_data)
-    print("... extracted {} features for training the classifier".format(len(vectorizer.get_feature_names())))
-
-    print("Training classifier....")
-    classifier = DecisionTreeClassifier(criterion="entropy")
-    classifier.fit(x_data, c_data)
+    encoder, x_data = tr.extract_features([word_tuple[0] for word_tuple in word_tuples], tr.make_encoder(feature_mode, positions, backend))
+    if backend == "trie":
+        print("... the suffix trie uses the base forms themselves")
+    else:
+        print("... extracted {} features for training the classifier".format(encoder.feature_count))
+
+    if coordinator_address is not None:
+        print("Analyzing and clustering on the workers connecting to {}:{}, training classifier(s)...".format(*coordinator_address))
+        if len(authkey) == 0:
+            # workers run whatever an authenticated client sends them, so there is no default key
+            authkey = secrets.token_hex(16).encode("utf-8")
+            print("... generated the authkey {}, start the workers with --authkey={} or PYWORDS_AUTHKEY".format(
+                authkey.decode("utf-8"), authkey.decode("utf-8")))
+        with dt.Coordinator(coordinator_address, authkey, chunk_size) as coordinator:
+            classifiers, labels, transformations, sizes, phase_stats = dt.train_distributed(coordinator, word_tuples,
+                                                                                            x_data, backend,
+                                                                                            collapse_duplicates,
+                                                                                            forest_size, jobs,
+                                                                                            batch_alignment, merge)
+            clusters_before_merging = coordinator.clusters_before_merging
+        for stats in phase_stats:
+            print("... {}: {} tasks on {} workers in {:.2f}s, {} handed out again".format(
+                stats.name, stats.tasks, len(stats.workers), stats.seconds, stats.retries))
+        for target_name, target_sizes, before in zip(target_names, sizes, clusters_before_merging):
+            print("... split word pairs for {} into {} clusters of similar transformations".format(target_name, len(target_sizes)))
+            if merge:
+                print("... merged {} greedy clusters into {}".format(before, len(target_sizes)))
+        model = TransformationModel(input_processor, encoder, target_names, classifiers, transformations, sizes,
+                                    ExactMatchTable.from_word_tuples(word_tuples, labels) if exact_matches else None)
+        results = []
+    elif pipeline:
+        print("Training classifier(s)...")
+        results = tr.fit_clusters(word_tuples, x_data, pipeline_clusters, backend, collapse_duplicates, forest_size,
+                                  jobs)
+    else:
+        print("Analyzing, clustering and training classifier(s)...")
+        results = tr.train_targets(word_tuples, x_data, jobs, backend, batch_alignment, merge, collapse_duplicates,
+                                   executor, forest_size)
+    for target_name, (clusters, classifier) in zip(target_names, results):
+        print("... split word pairs for {} into {} clusters of similar transformations".format(target_name, len(clusters)))
+        if clusters.bucket_stats is not None:
+            print("... {} buckets of equal edit steps, the largest holding {} clusters; {:.2f} clusters tried per word pair".format(
+                clusters.bucket_stats.buckets, clusters.bucket_stats.largest, clusters.bucket_stats.candidates_per_element))
+        if merge:
+            print("... merged {} greedy clusters into {}".format(clusters.clusters_before_merging, len(clusters)))
+        if collapse_duplicates and backend == "tree":
+            print("... fitted {} rows with equal features and class collapsed into {} weighted rows".format(
+                len(clusters.labels), classifier.tree_.n_node_samples[0]))
+    if coordinator_address is None:
+        model = tr.build_model(input_processor, encoder, target_names, results, word_tuples if exact_matches else None)
+    if backend == "forest":
+        print("... fitted a forest of {} trees per target in {} threads".format(forest_size, jobs))
+    if model.exact_matches is not None:
+        print("... embedded an exact match table of {} training words in {} bytes".format(
+            len(model.exact_matches), model.exact_matches.nbytes))
+
+    if compact and backend in ["tree", "forest"]:
+        print("Compacting trees...")
+        model, report = compact_model(model, [word_tuple[0] for word_tuple in word_tuples])
+        print("... {} -> {} nodes, {} -> {} bytes, {} -> {} features; predictions verified on the training set".format(
+            report.nodes_before, report.nodes_after, report.bytes_before, report.bytes_after,
+            report.features_before, report.features_after))
 
     if save_classifier:
-        # sklearn advises to use pickle to store classifiers: http://scikit-learn.org/stable/modules/model_persistence.html
-        print("Storing classifier...")
-        with open(output_name + ".clf", "wb") as output_file:
-            pickle.dump(classifier, output_file)
+        store_model(model, output_name, shared_layout)
 
-    if create_visualization:
+    if create_visualization and coordinator_address is not None:
+        print("Skipping visualization, which is not available when clustering on workers")
+    elif create_visualization and backend != "tree":
+        print("Skipping visualization, which is only available for the tree backend")
+    elif create_visualization:
         print("Creating tree visualization...")
-        visualize_tree(classifier, input_processor, vectorizer, clusters, output_name)
+        from tree_visualization import visualize_tree # imports graphviz
+        for target_name, (clusters, classifier) in zip(target_names, results):
+            file_name = output_name if target_count == 1 else "{}_{}".format(output_name, target_name)
+            visualize_tree(classifier, input_processor, encoder, clusters, file_name)
 
     print("done!")
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
\ No newline at end of file
+    main(sys.argv[1:])
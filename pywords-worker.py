@@ -0,0 +1,60 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import getopt
+import os
+import sys
+
+import distributed_training as dt
+
+
+def exit_with_usage():
+    print("usage: {} [--authkey=<key>] [--timeout=<seconds>] <host>:<port>".format(sys.argv[0]))
+    print("analyzes and clusters word pairs for the coordinator of pywords-train.py --coordinator=<host>:<port>")
+    sys.exit(2)
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["authkey=", "timeout="])
+    except getopt.GetoptError:
+        exit_with_usage()
+
+    authkey = os.environ.get("PYWORDS_AUTHKEY", "").encode("utf-8")
+    connect_timeout = 30.0
+    for opt, arg in opts:
+        if opt == "--authkey":
+            authkey = arg.encode("utf-8")
+        elif opt == "--timeout":
+            connect_timeout = float(arg)
+        else:
+            exit_with_usage()
+    if len(args) != 1:
+        exit_with_usage()
+    if len(authkey) == 0:
+        print("error: the authkey of the coordinator is required (--authkey or PYWORDS_AUTHKEY)")
+        sys.exit(2)
+    try:
+        address = dt.parse_address(args[0])
+    except ValueError:
+        exit_with_usage()
+
+    print("Connecting to the coordinator at {}:{}...".format(*address))
+    processed = dt.run_worker(address, authkey, connect_timeout)
+    print("... processed {} tasks".format(processed))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,201 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from typing import Dict, Sequence, Tuple
+
+from exact_match import ExactMatchTable
+from model import TransformationModel
+from tree_compaction import CompactTree, smallest_typecode
+from word_analysis import EditTransformation, WordTransformation, WordTransformationSequence
+
+# a model layout for many worker processes: the node arrays of the compacted trees and the strings of all
+# transformations are stored in flat sections of one file that every process maps read-only, so the pages are shared
+# by all workers and never copied by reference counting. transformations are decoded from the mapped strings when a
+# prediction needs them, and so are the words and classes of the exact match table. the leaf class distributions of
+# the trees are sections too. only the input processor, the compact encoder, the section table, the classes of the
+# trees and the class counts are pickled in the header.
+#
+# file layout: HEADER (magic, length of the pickled metadata), the metadata, then the sections, each aligned to
+# ALIGNMENT bytes. a section is described by (typecode, offset from the start of the sections, number of items).
+
+SHARED_MODEL_MAGIC = b"PYWSHM01"
+HEADER = struct.Struct("=8sQ")
+ALIGNMENT = 8
+
+Section = Tuple[str, int, int]
+
+MAPPING_FIELDS = ["Rss", "Pss", "Private_Clean", "Private_Dirty"]
+
+
+def aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class TransformationTable(Sequence):
+
+    # the transformations of one target. transformation c consists of the edit steps
+    # step_offsets[c]:step_offsets[c + 1], and step s of the strings 3 * s (pre pattern), 3 * s + 1 (replaced) and
+    # 3 * s + 2 (insertee), string k being text[string_offsets[k]:string_offsets[k + 1]] in UTF-8
+
+    def __init__(self, step_offsets: Sequence[int], string_offsets: Sequence[int], text: memoryview) -> None:
+        self.__step_offsets = step_offsets
+        self.__string_offsets = string_offsets
+        self.__text = text
+
+    def __string(self, k: int) -> str:
+        return str(self.__text[self.__string_offsets[k]:self.__string_offsets[k + 1]], "utf-8")
+
+    def __getitem__(self, index: int) -> WordTransformation:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("TransformationTable index out of range")
+        steps = [EditTransformation(self.__string(3 * s), self.__string(3 * s + 1), self.__string(3 * s + 2))
+                 for s in range(self.__step_offsets[index], self.__step_offsets[index + 1])]
+        return WordTransformationSequence(steps)
+
+    def __len__(self) -> int:
+        return len(self.__step_offsets) - 1
+
+
+def encode_transformations(transformations: Sequence[WordTransformation]) -> Tuple[array, array, bytes]:
+    step_offsets = [0]
+    string_offsets = [0]
+    text = bytearray()
+    for transformation in transformations:
+        if not isinstance(transformation, WordTransformationSequence):
+            transformation = WordTransformationSequence([transformation])
+        for step in transformation.transformations:
+            if not isinstance(step, EditTransformation):
+                raise ValueError("Shared model files only store sequences of edit steps")
+            for string in [step.pre_pattern, step.replaced, step.insertee]:
+                text += string.encode("utf-8")
+                string_offsets.append(len(text))
+        step_offsets.append(len(string_offsets) // 3)
+    return (array(smallest_typecode(step_offsets), step_offsets),
+            array(smallest_typecode(string_offsets), string_offsets),
+            bytes(text))
+
+
+def write_shared_model(model: TransformationModel, file_name: str) -> int:
+    # returns the file size. the file is written next to its destination and renamed into place, so that processes
+    # mapping or reloading the model never see a partially written file
+    if not all(isinstance(classifier, CompactTree) for classifier in model.classifiers):
+        raise ValueError("Shared model files require a model with compacted trees")
+    sections = bytearray()
+
+    def add(values: array) -> Section:
+        sections.extend(bytes(aligned(len(sections)) - len(sections)))
+        offset = len(sections)
+        sections.extend(values.tobytes())
+        return values.typecode, offset, len(values)
+
+    trees = [tuple(add(array(smallest_typecode(a), a)) for a in classifier.arrays) for classifier in model.classifiers]
+    distributions = []
+    for classifier in model.classifiers:
+        if classifier.distribution_arrays is None:
+            distributions.append(None)
+            continue
+        offsets, class_indices, probabilities = classifier.distribution_arrays
+        distributions.append((add(array(smallest_typecode(offsets), offsets)),
+                              add(array(smallest_typecode(class_indices), class_indices)),
+                              add(array("d", probabilities)), list(classifier.classes_)))
+    tables = []
+    for transformations in model.transformations:
+        step_offsets, string_offsets, text = encode_transformations(transformations)
+        tables.append((add(step_offsets), add(string_offsets), add(array("B", text))))
+    exact_matches = None
+    if model.exact_matches is not None:
+        offsets, text, classes = model.exact_matches.arrays
+        exact_matches = (add(array(smallest_typecode(offsets), offsets)), add(array("B", text)),
+                         [add(array(smallest_typecode(c), c)) for c in classes])
+    metadata = pickle.dumps({
+        "input_processor": model.input_processor,
+        "encoder": model.encoder,
+        "target_names": list(model.target_names),
+        "trees": trees,
+        "distributions": distributions,
+        "tables": tables,
+        "class_counts": model.class_counts,
+        "exact_matches": exact_matches
+    })
+    header = HEADER.pack(SHARED_MODEL_MAGIC, len(metadata))
+    start = aligned(len(header) + len(metadata))
+    temporary_name = file_name + ".tmp"
+    with open(temporary_name, "wb") as output_file:
+        output_file.write(header)
+        output_file.write(metadata)
+        output_file.write(bytes(start - len(header) - len(metadata)))
+        output_file.write(sections)
+    os.replace(temporary_name, file_name)
+    return start + len(sections)
+
+
+def is_shared_model(file_name: str) -> bool:
+    with open(file_name, "rb") as model_file:
+        return model_file.read(len(SHARED_MODEL_MAGIC)) == SHARED_MODEL_MAGIC
+
+
+def open_shared_model(file_name: str) -> TransformationModel:
+    # the mapping stays open as long as the views of the model refer to it
+    with open(file_name, "rb") as model_file:
+        mapped = mmap.mmap(model_file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, metadata_length = HEADER.unpack_from(mapped, 0)
+    if magic != SHARED_MODEL_MAGIC:
+        raise ValueError("File <{}> is not a shared model file".format(file_name))
+    metadata = pickle.loads(mapped[HEADER.size:HEADER.size + metadata_length])
+    start = aligned(HEADER.size + metadata_length)
+    buffer = memoryview(mapped)
+
+    def view(section: Section) -> memoryview:
+        typecode, offset, count = section
+        begin = start + offset
+        return buffer[begin:begin + count * array(typecode).itemsize].cast(typecode)
+
+    classifiers = []
+    for tree, distribution in zip(metadata["trees"], metadata.get("distributions", [None] * len(metadata["trees"]))):
+        arrays = [view(section) for section in tree]
+        if distribution is not None:
+            arrays += [view(section) for section in distribution[:3]] + [distribution[3]]
+        classifiers.append(CompactTree.from_buffers(*arrays))
+    transformations = [TransformationTable(*[view(section) for section in table]) for table in metadata["tables"]]
+    exact_matches = None
+    if metadata.get("exact_matches") is not None:
+        offsets, text, classes = metadata["exact_matches"]
+        exact_matches = ExactMatchTable(view(offsets), view(text), [view(section) for section in classes])
+    return TransformationModel(metadata["input_processor"], metadata["encoder"], metadata["target_names"],
+                               classifiers, transformations, metadata.get("class_counts"), exact_matches)
+
+
+def mapping_memory(file_name: str) -> Dict[str, int]:
+    # Rss, Pss, Private_Clean and Private_Dirty bytes of the mappings of file_name in this process,
+    # from /proc/self/smaps (Linux only). pages of a read-only mapping are never copied, so Private_Dirty stays 0
+    path = os.path.realpath(file_name)
+    memory = {field: 0 for field in MAPPING_FIELDS}
+    in_mapping = False
+    with open("/proc/self/smaps") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if len(fields) > 0 and not fields[0].endswith(":"):
+                in_mapping = len(fields) >= 6 and fields[-1] == path
+            elif in_mapping and fields[0][:-1] in memory:
+                memory[fields[0][:-1]] += int(fields[1]) * 1024
+    return memory
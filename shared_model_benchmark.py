@@ -0,0 +1,108 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import getopt
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+
+import benchmark_corpus
+import input_parsing as par
+import training as tr
+from inference import load_model
+from shared_model import write_shared_model
+from tree_compaction import compact_model
+
+
+def exit_with_usage():
+    print("usage: {} [--size=<word pairs>] [--workers=<workers>]".format(sys.argv[0]))
+    print("compares the private memory of forked workers predicting with a pickled and a shared model file (Linux only)")
+    sys.exit(2)
+
+
+def private_bytes() -> int:
+    # memory of this process that is not shared with any other process
+    total = 0
+    with open("/proc/self/smaps_rollup") as rollup:
+        for line in rollup:
+            fields = line.split()
+            if fields[0] in ("Private_Clean:", "Private_Dirty:"):
+                total += int(fields[1]) * 1024
+    return total
+
+
+def measure(file_name: str, words, workers: int):
+    # the model is loaded before forking, as in a pre-fork server
+    model = load_model(file_name)
+    for word in words:
+        model.predict(word)
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+
+    def work() -> None:
+        for word in words:
+            model.predict(word)
+        results.put(private_bytes())
+        barrier.wait()
+
+    processes = [context.Process(target=work) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    memory = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return memory
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["size=", "workers="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    size = 5000
+    workers = 4
+    for opt, arg in opts:
+        if opt == "--size":
+            size = int(arg)
+        elif opt == "--workers":
+            workers = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    word_tuples = benchmark_corpus.generate_word_pairs(size)
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    encoder, x_data = tr.extract_features(base_words)
+    model = tr.build_model(par.StripProcessor(), encoder, ["target"], tr.train_targets(word_tuples, x_data))
+    model, _ = compact_model(model, base_words)
+    with tempfile.TemporaryDirectory() as directory:
+        pickled_name = os.path.join(directory, "pickled.clf")
+        with open(pickled_name, "wb") as output_file:
+            pickle.dump(model, output_file)
+        shared_name = os.path.join(directory, "shared.clf")
+        write_shared_model(model, shared_name)
+        print("{} word pairs, pickled model {} bytes, shared model file {} bytes".format(
+            size, os.path.getsize(pickled_name), os.path.getsize(shared_name)))
+        print("{:>8} {}".format("layout", " ".join("{:>12}".format("worker {}/kB".format(w + 1)) for w in range(workers))))
+        for layout, file_name in [("pickled", pickled_name), ("shared", shared_name)]:
+            memory = measure(file_name, base_words, workers)
+            print("{:>8} {}".format(layout, " ".join("{:>12.0f}".format(m / 1024) for m in memory)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,147 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import mmap
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+
+import benchmark_corpus
+import inference
+import input_parsing as par
+import training
+from shared_model import TransformationTable, mapping_memory, open_shared_model, write_shared_model
+from tree_compaction import compact_model
+
+
+class SharedModelTests(unittest.TestCase):
+
+    WORD_TUPLES = [("liegen", "gelegen", "liegt"), ("fliegen", "geflogen", "fliegt"), ("wiegen", "gewogen", "wiegt"),
+                   ("machen", "gemacht", "macht"), ("sagen", "gesagt", "sagt"), ("studieren", "studiert", "studiert"),
+                   ("lächeln", "gelächelt", "lächelt")]
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__file_name = os.path.join(self.__directory.name, "model.clf")
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def __train(self, backend: str = "tree"):
+        base_words = [word_tuple[0] for word_tuple in self.WORD_TUPLES]
+        encoder, x_data = training.extract_features(base_words, training.make_encoder(backend=backend))
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "present"],
+                                     training.train_targets(self.WORD_TUPLES, x_data, backend=backend))
+        if backend == "tree":
+            model, _ = compact_model(model, base_words)
+        return model
+
+    @staticmethod
+    def __outcome(model, word: str):
+        # the class of an unseen word may not fit its transformation, then both models must fail
+        try:
+            return model.predict(word)
+        except ValueError:
+            return None
+
+    def test_same_predictions(self) -> None:
+        model = self.__train()
+        write_shared_model(model, self.__file_name)
+        shared = open_shared_model(self.__file_name)
+        self.assertEqual(shared.target_names, model.target_names)
+        for t in range(len(model.target_names)):
+            self.assertIsInstance(shared.transformations[t], TransformationTable)
+            self.assertEqual(list(shared.transformations[t]), list(model.transformations[t]))
+        for word in ["biegen", "lachen", "lächeln", "fragen", "x"]:
+            self.assertEqual(self.__outcome(shared, word), self.__outcome(model, word))
+        words = ["biegen", "lachen", "lächeln", "fragen", "x"]
+        self.assertEqual(shared.predict_top_k(words, 2), model.predict_top_k(words, 2))
+        self.assertEqual(shared.class_scores(shared.encoder.transform(words), 0),
+                         model.class_scores(model.encoder.transform(words), 0))
+        self.assertRaises(IndexError, shared.transformations[0].__getitem__, len(model.transformations[0]))
+
+    def test_exact_matches(self) -> None:
+        base_words = [word_tuple[0] for word_tuple in self.WORD_TUPLES]
+        encoder, x_data = training.extract_features(base_words)
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "present"],
+                                     training.train_targets(self.WORD_TUPLES, x_data), self.WORD_TUPLES)
+        model, _ = compact_model(model, base_words)
+        write_shared_model(model, self.__file_name)
+        shared = open_shared_model(self.__file_name)
+        self.assertEqual(len(shared.exact_matches), len(self.WORD_TUPLES))
+        for word_tuple in self.WORD_TUPLES:
+            self.assertEqual(shared.predict(word_tuple[0]), {"pp": word_tuple[1], "present": word_tuple[2]})
+        self.assertEqual(shared.exact_matches.hits, len(self.WORD_TUPLES))
+
+    def test_load_model(self) -> None:
+        write_shared_model(self.__train(), self.__file_name)
+        self.assertEqual(inference.load_model(self.__file_name).predict_target("biegen", "pp"), "gebogen")
+        self.assertFalse(os.path.exists(self.__file_name + ".tmp"))
+
+    def test_requires_compact_trees(self) -> None:
+        self.assertRaises(ValueError, write_shared_model, self.__train("trie"), self.__file_name)
+
+    def __worker_memory(self, model_file: str, words, workers: int):
+        # the memory of the model mapping in every forked worker, once all workers have predicted all words
+        model = open_shared_model(model_file)
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+
+        def work() -> None:
+            for word in words:
+                self.__outcome(model, word)
+            barrier.wait()
+            # all workers are running and have used the pages of the model
+            results.put(mapping_memory(model_file))
+            barrier.wait()
+
+        processes = [context.Process(target=work) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        memory = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join()
+        return memory
+
+    @unittest.skipUnless(os.path.exists("/proc/self/smaps") and "fork" in multiprocessing.get_all_start_methods(),
+                         "requires fork and /proc/self/smaps")
+    def test_workers_share_pages(self) -> None:
+        workers = 3
+        private = {}
+        for word_count in [500, 8000]:
+            # models with exact matches, trained on a generated corpus; the larger one spans many pages
+            word_pairs = benchmark_corpus.generate_word_pairs(word_count, seed=5)
+            base_words = [word_a for word_a, _ in word_pairs]
+            encoder, x_data = training.extract_features(base_words)
+            model = training.build_model(par.StripProcessor(), encoder, ["pp"],
+                                         training.train_targets(word_pairs, x_data), word_pairs)
+            model, _ = compact_model(model, base_words)
+            file_name = os.path.join(self.__directory.name, "model{}.clf".format(word_count))
+            write_shared_model(model, file_name)
+            memory = self.__worker_memory(file_name, base_words + ["biegen", "lachen", "x"], workers)
+            for worker_memory in memory:
+                self.assertGreater(worker_memory["Rss"], 0)
+                # no worker holds a private copy of a model page, each page is shared by all processes
+                self.assertLessEqual(worker_memory["Pss"], worker_memory["Rss"] // workers)
+            private[word_count] = max(worker_memory["Private_Clean"] + worker_memory["Private_Dirty"]
+                                      for worker_memory in memory)
+            if word_count == 8000:
+                self.assertGreaterEqual(min(worker_memory["Rss"] for worker_memory in memory), 16 * mmap.PAGESIZE)
+        # the private memory of a worker does not grow with the model
+        self.assertEqual(private, {500: 0, 8000: 0})
@@ -0,0 +1,106 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import getopt
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmark_corpus
+import input_parsing as par
+import training as tr
+from tree_compaction import compact_model
+
+
+def exit_with_usage():
+    print("usage: {} [--target=<ms>] [--runs=<runs>]".format(sys.argv[0]))
+    print("measures cold import plus first prediction in fresh interpreters and checks it against the target")
+    sys.exit(2)
+
+
+LOAD_AND_PREDICT = """
+import inference
+model = inference.load_model({!r})
+try:
+    model.predict_target("machen", "target")
+except ValueError:
+    pass
+"""
+
+
+def cold_start(code: str, runs: int) -> float:
+    # best wall time of a fresh interpreter running code, in seconds
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def store_models(directory: str):
+    word_tuples = benchmark_corpus.generate_word_pairs(2000)
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    encoder, x_data = tr.extract_features(base_words)
+    model = tr.build_model(par.StripProcessor(), encoder, ["target"], tr.train_targets(word_tuples, x_data))
+    compacted, _ = compact_model(model, base_words)
+    file_names = []
+    for name, stored in [("sklearn", model), ("compact", compacted)]:
+        file_name = os.path.join(directory, name + ".clf")
+        with open(file_name, "wb") as output_file:
+            pickle.dump(stored, output_file)
+        file_names.append(file_name)
+    return file_names
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "h", ["target=", "runs="])
+    except getopt.GetoptError:
+        exit_with_usage()
+    target = 100.0
+    runs = 5
+    for opt, arg in opts:
+        if opt == "--target":
+            target = float(arg)
+        elif opt == "--runs":
+            runs = int(arg)
+        elif opt == "-h":
+            exit_with_usage()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sklearn_model, compact = store_models(directory)
+        interpreter = cold_start("pass", runs)
+        sklearn_time = cold_start(LOAD_AND_PREDICT.format(sklearn_model), runs)
+        compact_time = cold_start(LOAD_AND_PREDICT.format(compact), runs)
+
+    print("interpreter startup:                      {:8.1f} ms".format(interpreter * 1000))
+    print("import + load + first prediction, sklearn: {:8.1f} ms (+{:.1f} ms)".format(
+        sklearn_time * 1000, (sklearn_time - interpreter) * 1000))
+    print("import + load + first prediction, compact: {:8.1f} ms (+{:.1f} ms)".format(
+        compact_time * 1000, (compact_time - interpreter) * 1000))
+    overhead = (compact_time - interpreter) * 1000
+    if overhead > target:
+        print("FAILED: {:.1f} ms exceed the target of {:.1f} ms beyond interpreter startup".format(overhead, target))
+        sys.exit(1)
+    print("OK: within the target of {:.1f} ms beyond interpreter startup".format(target))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
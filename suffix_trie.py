@@ -0,0 +1,104 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from collections import Counter
+from typing import Dict, List, Sequence
+
+# a classifier for word transformations that only looks at word endings: the training words are stored reversed in a
+# trie whose nodes count the class labels of all words ending in the node's suffix. a word is classified by the
+# majority label of the longest training suffix it ends with. only the standard library is required.
+
+WORD_START = "" # marks the start of a word in the trie, cannot be confused with a letter
+
+
+class SuffixTrieClassifier:
+
+    def __init__(self) -> None:
+        self.__children = [] # type: List[Dict[str, int]]
+        self.__counts = [] # type: List[Dict[int, int]]
+        self.__majority = [] # type: List[int]
+
+    def fit(self, words: Sequence[str], labels: Sequence[int]) -> "SuffixTrieClassifier":
+        if len(words) != len(labels):
+            raise ValueError("Every word requires exactly one label")
+        if len(words) == 0:
+            raise ValueError("SuffixTrieClassifier requires at least one training word")
+        children = [dict()] # type: List[Dict[str, int]]
+        counts = [Counter()]
+        for word, label in zip(words, labels):
+            node = 0
+            counts[node][label] += 1
+            for letter in self.__path(word):
+                child = children[node].get(letter)
+                if child is None:
+                    child = len(children)
+                    children[node][letter] = child
+                    children.append(dict())
+                    counts.append(Counter())
+                node = child
+                counts[node][label] += 1
+        self.__compact(children, counts)
+        return self
+
+    def __compact(self, children: List[Dict[str, int]], counts: List[Counter]) -> None:
+        # subtrees below a node whose words all share one label cannot change any prediction and are dropped
+        self.__children = []
+        self.__counts = []
+        self.__majority = []
+        pending = [(0, -1, "")]
+        while len(pending) > 0:
+            node, parent, letter = pending.pop()
+            index = len(self.__children)
+            if parent >= 0:
+                self.__children[parent][letter] = index
+            # ties are broken by the smaller label to keep predictions independent of the input order
+            self.__majority.append(min(counts[node], key=lambda label: (-counts[node][label], label)))
+            self.__counts.append(dict(counts[node]))
+            self.__children.append(dict())
+            if len(counts[node]) > 1:
+                for child_letter, child in children[node].items():
+                    pending.append((child, index, child_letter))
+
+    @staticmethod
+    def __path(word: str):
+        yield from reversed(word)
+        yield WORD_START
+
+    @property
+    def node_count(self) -> int:
+        return len(self.__children)
+
+    def node_of(self, word: str) -> int:
+        # the node of the longest training suffix of word
+        children = self.__children
+        node = 0
+        for letter in self.__path(word):
+            child = children[node].get(letter)
+            if child is None:
+                break
+            node = child
+        return node
+
+    def counts_of(self, word: str) -> Dict[int, int]:
+        return dict(self.__counts[self.node_of(word)])
+
+    def predict_word(self, word: str) -> int:
+        if len(self.__children) == 0:
+            raise ValueError("SuffixTrieClassifier has not been fitted")
+        return self.__majority[self.node_of(word)]
+
+    def predict(self, words: Sequence[str]) -> List[int]:
+        return [self.predict_word(word) for word in words]
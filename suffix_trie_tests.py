@@ -0,0 +1,48 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from suffix_trie import SuffixTrieClassifier
+
+
+class SuffixTrieClassifierTests(unittest.TestCase):
+
+    WORDS = ["liegen", "fliegen", "wiegen", "machen", "sagen", "studieren", "gen"]
+    LABELS = [0, 1, 1, 2, 2, 3, 4]
+
+    def test_training_words(self) -> None:
+        classifier = SuffixTrieClassifier().fit(self.WORDS, self.LABELS)
+        self.assertEqual(classifier.predict(self.WORDS), self.LABELS)
+
+    def test_longest_suffix(self) -> None:
+        classifier = SuffixTrieClassifier().fit(self.WORDS, self.LABELS)
+        self.assertEqual(classifier.predict_word("biegen"), 1)
+        self.assertEqual(classifier.predict_word("lachen"), 2)
+        self.assertEqual(classifier.predict_word("rasieren"), 3)
+        self.assertEqual(classifier.counts_of("biegen"), {0: 1, 1: 2})
+        # majority ties are broken by the smaller label
+        self.assertEqual(classifier.predict_word("xyz"), 1)
+
+    def test_pure_subtrees_are_dropped(self) -> None:
+        classifier = SuffixTrieClassifier().fit(["machen", "lachen", "sagen"], [2, 2, 2])
+        self.assertEqual(classifier.node_count, 1)
+        self.assertEqual(classifier.predict_word("hugo"), 2)
+
+    def test_invalid(self) -> None:
+        self.assertRaises(ValueError, SuffixTrieClassifier().fit, ["a"], [])
+        self.assertRaises(ValueError, SuffixTrieClassifier().fit, [], [])
+        self.assertRaises(ValueError, SuffixTrieClassifier().predict_word, "a")
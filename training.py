@@ -0,0 +1,373 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from corpus_index import INDEX_SUFFIX, IndexedCorpus, has_index, open_corpus
+from exact_match import ExactMatchTable
+from executors import make_executor
+from input_parsing import WordProcessor
+from model import TransformationModel
+from training_data_structures import TrainingSetElement, ClusterSet, ClusterStore, merge_clusters
+from suffix_trie import SuffixTrieClassifier
+from word_features import OneHotFeatureEncoder, OrdinalFeatureEncoder, PlainWordEncoder
+
+WordTuple = Tuple[str, ...]
+
+
+def parse_word_tuples(lines: Iterable[str], input_processor: WordProcessor) -> List[WordTuple]:
+    word_tuples = []
+    for line in lines:
+        if line.strip() == "":
+            continue
+        word_tuples.append(tuple(input_processor.process_input(part) for part in line.split(",")))
+    return word_tuples
+
+
+def read_word_tuples(file_name: str, input_processor: WordProcessor) -> List[WordTuple]:
+    with open_corpus(file_name) as f:
+        return parse_word_tuples(f.readlines(), input_processor)
+
+
+def read_word_tuple_shard(file_name: str, input_processor: WordProcessor, shard: int, shard_count: int) -> List[WordTuple]:
+    # reads a contiguous share of the lines of an indexed corpus (see corpus_index) without scanning the whole file
+    with IndexedCorpus(file_name) as corpus:
+        return parse_word_tuples(corpus.shard(shard, shard_count), input_processor)
+
+
+class CorpusFileStats:
+
+    def __init__(self, file_name: str, word_tuples: int, unique_word_tuples: int, seconds: float) -> None:
+        self.__file_name = file_name
+        self.__word_tuples = word_tuples
+        self.__unique_word_tuples = unique_word_tuples
+        self.__seconds = seconds
+
+    @property
+    def file_name(self) -> str:
+        return self.__file_name
+
+    @property
+    def word_tuples(self) -> int:
+        return self.__word_tuples
+
+    @property
+    def unique_word_tuples(self) -> int:
+        # word tuples of this file that were not already read from this or a preceding file
+        return self.__unique_word_tuples
+
+    @property
+    def duplicates(self) -> int:
+        return self.__word_tuples - self.__unique_word_tuples
+
+    @property
+    def seconds(self) -> float:
+        # time spent reading and preprocessing, summed over all shards of the file
+        return self.__seconds
+
+    @property
+    def throughput(self) -> float:
+        # word tuples per second
+        if self.__seconds <= 0:
+            return float("inf")
+        return self.__word_tuples / self.__seconds
+
+    def __repr__(self) -> str:
+        return "<CorpusFileStats, {}: {} word tuples, {} duplicates, {:.3f}s>".format(
+            self.file_name, self.word_tuples, self.duplicates, self.seconds)
+
+
+def expand_input_paths(patterns: Iterable[str]) -> List[str]:
+    # wildcard patterns are expanded in sorted order, skipping corpus index files, and raise a ValueError if they match
+    # no file. file names without wildcards are kept as they are, so that reading a missing one reports it. a file
+    # given more than once is read once, at its first position
+    file_names = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(name for name in glob.glob(pattern) if not name.endswith(INDEX_SUFFIX))
+        else:
+            matches = [pattern]
+        if len(matches) == 0:
+            raise ValueError("Input pattern <{}> does not match any file".format(pattern))
+        for file_name in matches:
+            if file_name not in file_names:
+                file_names.append(file_name)
+    return file_names
+
+
+def read_timed_word_tuples(file_name: str,
+                           input_processor: WordProcessor,
+                           shard: int = 0,
+                           shard_count: int = 1) -> Tuple[List[WordTuple], float]:
+    start = time.perf_counter()
+    if shard_count > 1:
+        word_tuples = read_word_tuple_shard(file_name, input_processor, shard, shard_count)
+    else:
+        word_tuples = read_word_tuples(file_name, input_processor)
+    return word_tuples, time.perf_counter() - start
+
+
+def read_corpus(patterns: Iterable[str],
+                input_processor: WordProcessor,
+                jobs: int = 1,
+                use_processes: bool = False,
+                deduplicate: bool = True) -> Tuple[List[WordTuple], List[CorpusFileStats]]:
+    file_names = expand_input_paths(patterns)
+    # indexed files are split into one shard per job, all other files are read as a whole by a single job
+    shard_counts = [jobs if jobs > 1 and has_index(file_name) else 1 for file_name in file_names]
+    tasks = [(file_name, shard, shard_count)
+             for file_name, shard_count in zip(file_names, shard_counts) for shard in range(shard_count)]
+    names, shards, counts = zip(*tasks)
+    if jobs > 1 and len(tasks) > 1:
+        executor_type = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_type(max_workers=min(jobs, len(tasks))) as executor:
+            task_results = list(executor.map(read_timed_word_tuples, names, repeat(input_processor), shards, counts))
+    else:
+        task_results = [read_timed_word_tuples(name, input_processor, shard, count) for name, shard, count in tasks]
+
+    # files and shards are merged in the order they were given, so the result does not depend on which worker finished first
+    word_tuples = []
+    stats = []
+    seen = set()
+    task_index = 0
+    for file_name, shard_count in zip(file_names, shard_counts):
+        file_word_tuples = []
+        seconds = 0.0
+        for shard_word_tuples, shard_seconds in task_results[task_index:task_index + shard_count]:
+            file_word_tuples += shard_word_tuples
+            seconds += shard_seconds
+        task_index += shard_count
+        unique = 0
+        for word_tuple in file_word_tuples:
+            if deduplicate:
+                if word_tuple in seen:
+                    continue
+                seen.add(word_tuple)
+            word_tuples.append(word_tuple)
+            unique += 1
+        stats.append(CorpusFileStats(file_name, len(file_word_tuples), unique, seconds))
+    return word_tuples, stats
+
+
+def count_targets(word_tuples: Sequence[WordTuple]) -> int:
+    # every line holds a base form followed by the same number of target forms
+    if len(word_tuples) == 0:
+        raise ValueError("No word tuples given")
+    columns = len(word_tuples[0])
+    for word_tuple in word_tuples:
+        if len(word_tuple) != columns:
+            raise ValueError("Word tuple <{}> has {} columns, expected {}".format(
+                ", ".join(word_tuple), len(word_tuple), columns)
+            )
+    if columns < 2:
+        raise ValueError("Word tuples require at least a base form and one target form")
+    return columns - 1
+
+
+def analyze_word_pairs(word_pairs: Sequence[Tuple[str, str]],
+                       batch_alignment: bool = False,
+                       jobs: int = 1,
+                       executor: str = "auto") -> List[TrainingSetElement]:
+    # with jobs > 1 the word pairs are analyzed in one contiguous chunk per job (see executors.make_executor)
+    if jobs > 1 and len(word_pairs) > 1:
+        chunk_size = -(-len(word_pairs) // jobs)
+        chunks = [word_pairs[start:start + chunk_size] for start in range(0, len(word_pairs), chunk_size)]
+        with make_executor(len(chunks), executor) as pool:
+            return [element for elements in pool.map(analyze_word_pairs, chunks, repeat(batch_alignment))
+                    for element in elements]
+    if batch_alignment:
+        from batch_alignment import batch_subsequence_intervals # requires numpy
+        return [TrainingSetElement(word_a, word_b, intervals)
+                for (word_a, word_b), intervals in zip(word_pairs, batch_subsequence_intervals(word_pairs))]
+    return [TrainingSetElement(word_a, word_b) for word_a, word_b in word_pairs]
+
+
+def cluster_word_pairs(word_pairs: Sequence[Tuple[str, str]],
+                       batch_alignment: bool = False,
+                       merge: bool = False) -> ClusterStore:
+    clusters = ClusterSet()
+    for training_instance in analyze_word_pairs(word_pairs, batch_alignment):
+        clusters.add(training_instance)
+    if merge:
+        return merge_clusters(clusters.get_clusters())
+    return clusters.get_clusters()
+
+
+BACKENDS = ["tree", "trie", "forest"]
+
+FOREST_SIZE = 32
+
+# sklearn and numpy are imported where they are needed, so that reading, analysis and the trie backend work without them
+
+
+def make_encoder(feature_mode: str = "onehot", positions: int = 8, backend: str = "tree"):
+    if backend == "trie":
+        return PlainWordEncoder()
+    if feature_mode == "onehot":
+        from sklearn.feature_extraction import DictVectorizer
+        return OneHotFeatureEncoder(DictVectorizer())
+    elif feature_mode == "ordinal":
+        return OrdinalFeatureEncoder(positions)
+    raise ValueError("Unknown feature mode <{}>".format(feature_mode))
+
+
+def extract_features(base_words: Sequence[str], encoder=None):
+    if encoder is None:
+        encoder = make_encoder()
+    x_data = encoder.fit_transform(base_words)
+    if isinstance(encoder, OrdinalFeatureEncoder):
+        import numpy
+        x_data = numpy.array(x_data, dtype=numpy.int32).reshape(len(base_words), encoder.feature_count)
+    return encoder, x_data
+
+
+def select_rows(x_data, rows: Sequence[int]):
+    if isinstance(x_data, list):
+        return [x_data[i] for i in rows]
+    return x_data[rows]
+
+
+def row_keys(x_data) -> List[Hashable]:
+    # a hashable value per row that is equal for equal rows: the word itself for the trie backend, the bytes of the row
+    # for numpy arrays and the bytes of the sorted indices and values for scipy sparse matrices
+    if isinstance(x_data, list):
+        return x_data
+    if hasattr(x_data, "tocsr"):
+        x_data = x_data.tocsr().sorted_indices()
+        indptr, indices, data = x_data.indptr, x_data.indices, x_data.data
+        return [(indices[indptr[i]:indptr[i + 1]].tobytes(), data[indptr[i]:indptr[i + 1]].tobytes())
+                for i in range(x_data.shape[0])]
+    return [row.tobytes() for row in x_data]
+
+
+def collapse_duplicate_rows(x_data, labels: Sequence[int]) -> Tuple[object, List[int], List[int]]:
+    # rows with equal features and class become one row, weighted by their count. the entropy of every split is the
+    # same with the weights as with the repeated rows, so the fitted tree does not change
+    first_rows = dict() # type: Dict[Tuple[Hashable, int], int]
+    rows = []
+    weights = []
+    for i, (key, label) in enumerate(zip(row_keys(x_data), labels)):
+        index = first_rows.setdefault((key, label), len(rows))
+        if index == len(rows):
+            rows.append(i)
+            weights.append(1)
+        else:
+            weights[index] += 1
+    return select_rows(x_data, rows), [labels[i] for i in rows], weights
+
+
+def fit_classifier(x_data, labels: Sequence[int], backend: str = "tree", collapse_duplicates: bool = False,
+                   forest_size: int = FOREST_SIZE, jobs: int = 1):
+    # collapse_duplicates only applies to the tree backend: the suffix trie counts every training word itself and the
+    # trees of a forest draw their bootstrap samples from the rows. the trees of a forest are fitted in jobs threads
+    if backend == "tree":
+        from sklearn.tree import DecisionTreeClassifier
+        classifier = DecisionTreeClassifier(criterion="entropy")
+        if collapse_duplicates:
+            x_data, labels, weights = collapse_duplicate_rows(x_data, labels)
+            classifier.fit(x_data, labels, sample_weight=weights)
+            return classifier
+    elif backend == "forest":
+        from sklearn.ensemble import RandomForestClassifier
+        classifier = RandomForestClassifier(forest_size, criterion="entropy", n_jobs=jobs)
+    elif backend == "trie":
+        classifier = SuffixTrieClassifier()
+    else:
+        raise ValueError("Unknown backend <{}>".format(backend))
+    classifier.fit(x_data, labels)
+    return classifier
+
+
+def train_target(base_words: Sequence[str],
+                 target_words: Sequence[str],
+                 x_data,
+                 backend: str = "tree",
+                 batch_alignment: bool = False,
+                 merge: bool = False,
+                 collapse_duplicates: bool = False,
+                 forest_size: int = FOREST_SIZE,
+                 jobs: int = 1) -> Tuple[ClusterStore, object]:
+    # an empty target cell marks a missing form in the paradigm; such rows are left out for this target
+    rows = [i for i, word in enumerate(target_words) if word != ""]
+    clusters = cluster_word_pairs([(base_words[i], target_words[i]) for i in rows], batch_alignment, merge)
+    classifier = fit_classifier(select_rows(x_data, rows), clusters.labels, backend, collapse_duplicates, forest_size,
+                                jobs)
+    return clusters, classifier
+
+
+def fit_clusters(word_tuples: Sequence[WordTuple],
+                 x_data,
+                 clusters: Sequence[ClusterStore],
+                 backend: str = "tree",
+                 collapse_duplicates: bool = False,
+                 forest_size: int = FOREST_SIZE,
+                 jobs: int = 1) -> List[Tuple[ClusterStore, object]]:
+    # fits the classifier of every target to clusters built beforehand, e.g. by training_pipeline.cluster_corpus
+    results = []
+    for t, target_clusters in enumerate(clusters):
+        rows = [i for i, word_tuple in enumerate(word_tuples) if word_tuple[t + 1] != ""]
+        results.append((target_clusters,
+                        fit_classifier(select_rows(x_data, rows), target_clusters.labels, backend, collapse_duplicates,
+                                       forest_size, jobs)))
+    return results
+
+
+def train_targets(word_tuples: Sequence[WordTuple],
+                  x_data,
+                  jobs: int = 1,
+                  backend: str = "tree",
+                  batch_alignment: bool = False,
+                  merge: bool = False,
+                  collapse_duplicates: bool = False,
+                  executor: str = "auto",
+                  forest_size: int = FOREST_SIZE) -> List[Tuple[ClusterStore, object]]:
+    # with jobs > 1 the targets are clustered and fitted in parallel (see executors.make_executor), except for forests,
+    # which fit their trees in jobs threads instead
+    target_count = count_targets(word_tuples)
+    base_words = [word_tuple[0] for word_tuple in word_tuples]
+    target_columns = [[word_tuple[t + 1] for word_tuple in word_tuples] for t in range(target_count)]
+    if backend == "forest":
+        return [train_target(base_words, column, x_data, backend, batch_alignment, merge, collapse_duplicates,
+                             forest_size, jobs)
+                for column in target_columns]
+    if jobs > 1 and target_count > 1:
+        with make_executor(min(jobs, target_count), executor) as pool:
+            futures = [pool.submit(train_target, base_words, column, x_data, backend, batch_alignment, merge,
+                                   collapse_duplicates)
+                       for column in target_columns]
+            return [future.result() for future in futures]
+    return [train_target(base_words, column, x_data, backend, batch_alignment, merge, collapse_duplicates)
+            for column in target_columns]
+
+
+def build_model(input_processor: WordProcessor,
+                encoder,
+                target_names: Sequence[str],
+                results: Sequence[Tuple[ClusterStore, object]],
+                word_tuples: Optional[Sequence[WordTuple]] = None) -> TransformationModel:
+    # with the training word tuples, the model classifies them by an exact match table of their cluster labels
+    exact_matches = None
+    if word_tuples is not None:
+        exact_matches = ExactMatchTable.from_word_tuples(word_tuples, [clusters.labels for clusters, _ in results])
+    return TransformationModel(input_processor, encoder, target_names,
+                               [classifier for _, classifier in results],
+                               [clusters.transformations for clusters, _ in results],
+                               [[clusters.size_of(c) for c in range(len(clusters))] for clusters, _ in results],
+                               exact_matches)
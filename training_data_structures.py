@@ -14,17 +14,22 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-from typing import List, Set, Dict
+from array import array
+from typing import List, Dict, Iterable, Sequence, Iterator, Optional, Tuple, Union
 
 import word_analysis as ana
+from alphabet import Alphabet
 
 class TrainingSetElement:
 
-    def __init__(self, word_a: str, word_b: str) -> None:
+    def __init__(self, word_a: str, word_b: str, subsequence_intervals: Optional[ana.WordSubsequenceIntervals] = None,
+                 alphabet: Optional[Alphabet] = None) -> None:
+        # subsequence intervals of the word pair may be passed in if they were computed elsewhere (e.g. in a batch),
+        # otherwise the pair is aligned, on its int coded letters if an alphabet is given
         self.__word_a = word_a
         self.__word_b = word_b
-        lcs_matrix = ana.LCSMatrix(word_a, word_b)
-        subsequence_intervals = ana.WordSubsequenceIntervals(lcs_matrix)
+        if subsequence_intervals is None:
+            subsequence_intervals = ana.align_word_pair(word_a, word_b, alphabet=alphabet)
         transformation = ana.build_word_transformation(subsequence_intervals)
         self.__subsequence_intervals = subsequence_intervals
         self.__transformation = transformation
@@ -52,18 +57,47 @@ class TrainingSetElement:
         return "({}, {}, {})".format(self.word_a, self.word_b, repr(self.transformation))
 
 
+class MemberView(Sequence):
+
+    # read-only view on the members of a cluster: indexes into a shared sequence of elements without copying them
+
+    def __init__(self, elements: Sequence[TrainingSetElement], members: Sequence[int]) -> None:
+        self.__elements = elements
+        self.__members = members
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[TrainingSetElement, "MemberView"]:
+        if isinstance(index, slice):
+            return MemberView(self.__elements, self.__members[index])
+        return self.__elements[self.__members[index]]
+
+    def __len__(self) -> int:
+        return len(self.__members)
+
+    def __iter__(self) -> Iterator[TrainingSetElement]:
+        elements = self.__elements
+        for member in self.__members:
+            yield elements[member]
+
+    def __repr__(self) -> str:
+        return "[{}]".format(", ".join(repr(item) for item in self))
+
+
 class Cluster:
 
     def __init__(self, first_item: TrainingSetElement):
         self.__transformation = first_item.transformation # type: ana.WordTransformation
-        self.__items = {first_item} # type: Set[TrainingSetElement]
+        self.__items = [first_item] # type: List[TrainingSetElement]
+        # whether the transformation is known to produce word_b for every item. then a join that leaves the
+        # transformation as it is only has to be checked on the new item
+        self.__consistent = transforms_all(first_item.transformation, [first_item])
 
     def can_add_item(self, item: TrainingSetElement) -> bool:
         if self.__transformation.maybe_joinable(item.transformation):
             joined_transformation = self.__transformation.join(item.transformation)
-            for e in self.__items:
-                if joined_transformation.apply(e.word_a) != e.word_b:
-                    return False
+            if not (self.__consistent and joined_transformation == self.__transformation):
+                for e in self.__items:
+                    if joined_transformation.apply(e.word_a) != e.word_b:
+                        return False
             if joined_transformation.apply(item.word_a) != item.word_b:
                 return False
             return True
@@ -73,7 +107,8 @@ class Cluster:
         if self.can_add_item(item):
             joined_transformation = self.__transformation.join(item.transformation)
             self.__transformation = joined_transformation
-            self.__items.add(item)
+            self.__items.append(item)
+            self.__consistent = True
             return True
         return False
 
@@ -82,48 +117,235 @@ class Cluster:
         return self.__transformation
 
     @property
-    def items(self) -> Set[TrainingSetElement]:
-        return self.__items.copy()
+    def items(self) -> MemberView:
+        return MemberView(self.__items, range(len(self.__items)))
+
+    def __len__(self) -> int:
+        return len(self.__items)
 
     def __repr__(self) -> str:
-        return "<Cluster, {}, [{}] {} elements>".format(str(self.transformation), self.__items, len(self.__items))
+        return "<Cluster, {}, {} {} elements>".format(str(self.transformation), self.items, len(self))
 
 
 class FrozenCluster():
 
-    def __init__(self, cluster: Cluster) -> None:
-        self.__cluster = cluster
+    def __init__(self, store: "ClusterStore", index: int) -> None:
+        self.__store = store
+        self.__index = index
+
+    @property
+    def index(self) -> int:
+        return self.__index
 
     @property
     def transformation(self) -> ana.WordTransformation:
-        return self.__cluster.transformation
+        return self.__store.transformations[self.__index]
+
+    @property
+    def items(self) -> MemberView:
+        return self.__store.members_of(self.__index)
+
+    def __len__(self) -> int:
+        return self.__store.size_of(self.__index)
+
+    def __repr__(self) -> str:
+        return "<FrozenCluster, {}, {} {} elements>".format(str(self.transformation), self.items, len(self))
+
+
+class BucketStats:
+
+    # how the clusters of a ClusterSet are spread over the buckets of their join keys. every cluster of an element's
+    # bucket may have to be tried before the element is placed, so a large bucket means long scans
+
+    def __init__(self, bucket_sizes: Sequence[int], candidates: int, elements: int) -> None:
+        self.bucket_sizes = tuple(bucket_sizes)
+        self.candidates = candidates
+        self.elements = elements
+
+    @property
+    def buckets(self) -> int:
+        return len(self.bucket_sizes)
+
+    @property
+    def largest(self) -> int:
+        return max(self.bucket_sizes, default=0)
+
+    @property
+    def mean_size(self) -> float:
+        return sum(self.bucket_sizes) / len(self.bucket_sizes) if len(self.bucket_sizes) > 0 else 0.0
 
     @property
-    def items(self) -> Set[TrainingSetElement]:
-        return self.__cluster.items
+    def candidates_per_element(self) -> float:
+        # clusters tried per added element
+        return self.candidates / self.elements if self.elements > 0 else 0.0
 
     def __repr__(self) -> str:
-        return repr(self.__cluster)
+        return "<BucketStats, {} buckets, largest {}, mean {:.2f}, {:.2f} candidates per element>".format(
+            self.buckets, self.largest, self.mean_size, self.candidates_per_element)
+
+
+class ClusterStore(Sequence):
+
+    # columnar storage of frozen clusters: the members of cluster c are the elements indexed by
+    # members[offsets[c]:offsets[c + 1]], in the order in which they were added to the cluster
+
+    def __init__(self,
+                 elements: Sequence[TrainingSetElement],
+                 labels: Sequence[int],
+                 transformations: Sequence[ana.WordTransformation],
+                 clusters_before_merging: Optional[int] = None,
+                 bucket_stats: Optional[BucketStats] = None) -> None:
+        if len(elements) != len(labels):
+            raise ValueError("Every element requires exactly one cluster label")
+        self.__elements = tuple(elements)
+        self.__labels = array('i', labels)
+        self.__transformations = tuple(transformations)
+        offsets = array('i', bytes(array('i').itemsize * (len(self.__transformations) + 1)))
+        for label in self.__labels:
+            offsets[label + 1] += 1
+        for c in range(len(self.__transformations)):
+            offsets[c + 1] += offsets[c]
+        members = array('i', bytes(array('i').itemsize * len(self.__labels)))
+        fill = offsets[:-1]
+        for i, label in enumerate(self.__labels):
+            members[fill[label]] = i
+            fill[label] += 1
+        self.__offsets = offsets
+        self.__members = members
+        self.__clusters_before_merging = len(self.__transformations) if clusters_before_merging is None else clusters_before_merging
+        self.__bucket_stats = bucket_stats
+
+    @property
+    def elements(self) -> Sequence[TrainingSetElement]:
+        return self.__elements
+
+    @property
+    def labels(self) -> memoryview:
+        # class label of every element, aligned with elements
+        return memoryview(self.__labels).toreadonly()
+
+    @property
+    def members(self) -> memoryview:
+        return memoryview(self.__members).toreadonly()
+
+    @property
+    def offsets(self) -> memoryview:
+        return memoryview(self.__offsets).toreadonly()
+
+    @property
+    def transformations(self) -> Sequence[ana.WordTransformation]:
+        return self.__transformations
+
+    @property
+    def clusters_before_merging(self) -> int:
+        # number of clusters the greedy clustering produced before merge_clusters, equal to len(self) if not merged
+        return self.__clusters_before_merging
+
+    @property
+    def bucket_stats(self) -> Optional[BucketStats]:
+        # bucket statistics of the ClusterSet that produced the clusters, if any
+        return self.__bucket_stats
+
+    def size_of(self, index: int) -> int:
+        return self.__offsets[index + 1] - self.__offsets[index]
+
+    def members_of(self, index: int) -> MemberView:
+        return MemberView(self.__elements, self.members[self.__offsets[index]:self.__offsets[index + 1]])
+
+    def __getitem__(self, index: int) -> FrozenCluster:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("ClusterStore index out of range")
+        return FrozenCluster(self, index)
+
+    def __len__(self) -> int:
+        return len(self.__transformations)
+
+    def __repr__(self) -> str:
+        return "<ClusterStore, {} clusters of {} elements>".format(len(self), len(self.__elements))
 
 
 class ClusterSet:
 
+    # clusters are bucketed by the join key of their transformation, only clusters of the element's bucket can accept it
+
     def __init__(self) -> None:
-        self.__clusters = dict() # type: Dict[int, List[Cluster]]
+        self.__buckets = dict() # type: Dict[Tuple[Tuple[str, str], ...], List[int]]
+        self.__clusters = [] # type: List[Cluster]
+        self.__elements = [] # type: List[TrainingSetElement]
+        self.__labels = array('i')
+        self.__candidates = 0
 
-    def add(self, elem: TrainingSetElement) -> None:
-        key = hash(elem)
-        if key not in self.__clusters:
-            self.__clusters[key] = [Cluster(elem)]
+    def add(self, elem: TrainingSetElement) -> int:
+        bucket = self.__buckets.setdefault(elem.transformation.join_key, [])
+        for c in bucket:
+            self.__candidates += 1
+            if self.__clusters[c].add_item(elem):
+                break
         else:
-            for cluster in self.__clusters[key]:
-                if cluster.add_item(elem):
-                    return
-            self.__clusters[key].append(Cluster(elem))
-
-    def get_clusters(self) -> List[FrozenCluster]:
-        result = []
-        for _, clusterset in self.__clusters.items():
-            for cluster in clusterset:
-                result.append(FrozenCluster(cluster))
-        return result
\ No newline at end of file
+            c = len(self.__clusters)
+            self.__clusters.append(Cluster(elem))
+            bucket.append(c)
+        self.__elements.append(elem)
+        self.__labels.append(c)
+        return c
+
+    @property
+    def bucket_stats(self) -> BucketStats:
+        return BucketStats([len(bucket) for bucket in self.__buckets.values()], self.__candidates, len(self.__elements))
+
+    def get_clusters(self) -> ClusterStore:
+        return ClusterStore(self.__elements, self.__labels, [cluster.transformation for cluster in self.__clusters],
+                            bucket_stats=self.bucket_stats)
+
+
+def transforms_all(transformation: ana.WordTransformation, items: Iterable[TrainingSetElement]) -> bool:
+    try:
+        return all(transformation.apply(item.word_a) == item.word_b for item in items)
+    except ValueError:
+        return False
+
+
+def merge_clusters(store: ClusterStore) -> ClusterStore:
+    # ClusterSet.add is greedy: an element joins the first cluster of its bucket that accepts it, so the clusters depend
+    # on the input order. this post-pass runs union-find over the compatibility graph of the clusters (clusters of one
+    # bucket with joinable transformations, largest pairs first) and accepts a union only if the joined transformation
+    # still produces word_b for every member of both sides
+    parents = list(range(len(store)))
+    transformations = list(store.transformations)
+    members = [list(store.members_of(c)) for c in range(len(store))]
+
+    def find(c: int) -> int:
+        while parents[c] != c:
+            parents[c] = parents[parents[c]]
+            c = parents[c]
+        return c
+
+    buckets = dict() # type: Dict[Tuple[Tuple[str, str], ...], List[int]]
+    for c, transformation in enumerate(store.transformations):
+        buckets.setdefault(transformation.join_key, []).append(c)
+    for bucket in buckets.values():
+        edges = [(a, b) for i, a in enumerate(bucket) for b in bucket[i + 1:]
+                 if transformations[a].maybe_joinable(transformations[b])]
+        edges.sort(key=lambda edge: (-store.size_of(edge[0]) - store.size_of(edge[1]), edge))
+        for a, b in edges:
+            a, b = sorted((find(a), find(b)))
+            if a == b or not transformations[a].maybe_joinable(transformations[b]):
+                continue
+            joined_transformation = transformations[a].join(transformations[b])
+            if transforms_all(joined_transformation, members[a]) and transforms_all(joined_transformation, members[b]):
+                parents[b] = a
+                transformations[a] = joined_transformation
+                members[a] += members[b]
+                members[b] = []
+
+    # merged clusters are numbered in the order of their first original cluster
+    new_labels = dict() # type: Dict[int, int]
+    for c in range(len(store)):
+        new_labels.setdefault(find(c), len(new_labels))
+    return ClusterStore(store.elements,
+                        [new_labels[find(label)] for label in store.labels],
+                        [transformations[root] for root in new_labels],
+                        store.clusters_before_merging,
+                        store.bucket_stats)
@@ -16,7 +16,7 @@
 
 import unittest
 
-from training_data_structures import TrainingSetElement, Cluster, FrozenCluster, ClusterSet
+from training_data_structures import TrainingSetElement, Cluster, FrozenCluster, ClusterSet, ClusterStore, merge_clusters
 
 class ClusterSetTests(unittest.TestCase):
 
@@ -44,3 +44,83 @@ class ClusterSetTests(unittest.TestCase):
                               frozenset({self.TestElem(value=2, hash=2), self.TestElem(value=2, hash=2)}),
                               frozenset({self.TestElem(value=3, hash=2)})})
         self.assertEqual(c.get_clusters(), expected)
+
+
+class ClusterStoreTests(unittest.TestCase):
+
+    def __build_store(self) -> ClusterStore:
+        c = ClusterSet()
+        for word_a, word_b in [("liegen", "gelegen"), ("fliegen", "geflogen"), ("wiegen", "gewogen"),
+                               ("biegen", "gebogen"), ("schmieren", "geschmiert")]:
+            c.add(TrainingSetElement(word_a, word_b))
+        return c.get_clusters()
+
+    def test_labels(self) -> None:
+        store = self.__build_store()
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store.labels), [0, 1, 1, 1, 2])
+        self.assertEqual(len(store.elements), 5)
+
+    def test_member_views(self) -> None:
+        store = self.__build_store()
+        cluster = store[1]
+        self.assertEqual(len(cluster), 3)
+        self.assertEqual(len(cluster.items), 3)
+        self.assertEqual([e.word_a for e in cluster.items], ["fliegen", "wiegen", "biegen"])
+        self.assertEqual(cluster.items[-1].word_b, "gebogen")
+        self.assertEqual([e.word_a for e in cluster.items[1:]], ["wiegen", "biegen"])
+        for c, cluster in enumerate(store):
+            for item in cluster.items:
+                self.assertEqual(cluster.transformation.apply(item.word_a), item.word_b)
+                self.assertEqual(store.labels[store.elements.index(item)], c)
+
+    def test_read_only(self) -> None:
+        store = self.__build_store()
+        with self.assertRaises(TypeError):
+            store.labels[0] = 2
+        with self.assertRaises(TypeError):
+            store.members[0] = 2
+        self.assertRaises(IndexError, store.__getitem__, 3)
+
+    def test_bucket_stats(self) -> None:
+        stats = self.__build_store().bucket_stats
+        # fliegen, wiegen and biegen share the steps (, ge), (ie, o), (, ) and are tried against one cluster each
+        self.assertEqual(stats.bucket_sizes, (1, 1, 1))
+        self.assertEqual((stats.buckets, stats.largest, stats.elements, stats.candidates), (3, 1, 5, 2))
+        self.assertAlmostEqual(stats.candidates_per_element, 0.4)
+        self.assertEqual(merge_clusters(self.__build_store()).bucket_stats.bucket_sizes, (1, 1, 1))
+
+    def test_offsets(self) -> None:
+        store = self.__build_store()
+        self.assertEqual(list(store.offsets), [0, 1, 4, 5])
+        self.assertEqual(list(store.members), [0, 1, 2, 3, 4])
+
+
+class MergeClustersTests(unittest.TestCase):
+
+    def test_merges_compatible_clusters(self) -> None:
+        elements = [TrainingSetElement("fliegen", "geflogen"), TrainingSetElement("liegen", "gelegen"),
+                    TrainingSetElement("wiegen", "gewogen")]
+        # a split the greedy clustering would not produce: compatible elements in separate clusters
+        store = ClusterStore(elements, [0, 1, 0], [elements[0].transformation.join(elements[2].transformation),
+                                                   elements[1].transformation])
+        merged = merge_clusters(store)
+        self.assertEqual(len(merged), 2)
+        store = ClusterStore(elements[::2], [0, 1], [elements[0].transformation, elements[2].transformation])
+        merged = merge_clusters(store)
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged.clusters_before_merging, 2)
+        self.assertEqual(list(merged.labels), [0, 0])
+        for item in merged[0].items:
+            self.assertEqual(merged[0].transformation.apply(item.word_a), item.word_b)
+
+    def test_keeps_greedy_clusters(self) -> None:
+        c = ClusterSet()
+        for word_a, word_b in [("liegen", "gelegen"), ("fliegen", "geflogen"), ("wiegen", "gewogen"),
+                               ("biegen", "gebogen"), ("schmieren", "geschmiert")]:
+            c.add(TrainingSetElement(word_a, word_b))
+        store = c.get_clusters()
+        merged = merge_clusters(store)
+        self.assertEqual(list(merged.labels), list(store.labels))
+        self.assertEqual(merged.clusters_before_merging, 3)
+        self.assertEqual(store.clusters_before_merging, 3)
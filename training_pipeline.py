@@ -0,0 +1,278 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from corpus_index import open_corpus
+from executors import make_executor
+from input_parsing import WordProcessor
+from training import WordTuple, analyze_word_pairs, expand_input_paths, parse_word_tuples
+from training_data_structures import ClusterSet, ClusterStore, TrainingSetElement, merge_clusters
+
+# pipelined reading and clustering: reading lines, parsing them into word tuples, analyzing the word pairs and
+# clustering them run as concurrent stages that pass chunks through bounded queues, so reading overlaps the analysis
+# and at most queue_depth chunks wait between two stages. the analysis runs in a pool of jobs workers if jobs > 1
+# (processes, or threads on free-threaded builds, see executors.py), all other stages are threads. chunks are clustered
+# in the order of the input, so the clusters are the same as those of read_corpus followed by train_targets.
+
+DONE = object()
+
+
+class StageStats:
+
+    # items: chunks the stage processed. waiting: seconds spent waiting for input from the previous stage (starved),
+    # blocked: seconds spent waiting for room in the queue to the next stage (backpressure)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items = 0
+        self.word_tuples = 0
+        self.seconds = 0.0
+        self.waiting = 0.0
+        self.blocked = 0.0
+
+    @property
+    def busy(self) -> float:
+        return max(self.seconds - self.waiting - self.blocked, 0.0)
+
+    @property
+    def throughput(self) -> float:
+        # word tuples per busy second
+        return self.word_tuples / self.busy if self.busy > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return "<StageStats {}, {} chunks, {} word tuples, {:.3f}s busy, {:.3f}s waiting, {:.3f}s blocked>".format(
+            self.name, self.items, self.word_tuples, self.busy, self.waiting, self.blocked)
+
+
+class StageFailure:
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class Pipeline:
+
+    # every wait on a queue polls the stop event, so that stop() returns even if a stage fails while the others are
+    # waiting for input or for room. after a failure, stages waiting for input get it in place of their next chunk
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, queue_depth: int) -> None:
+        if queue_depth < 1:
+            raise ValueError("Pipeline queues require a positive depth")
+        self.__queue_depth = queue_depth
+        self.__stop = threading.Event()
+        self.__failure = None # type: Optional[StageFailure]
+        self.__threads = [] # type: List[threading.Thread]
+        self.stats = [] # type: List[StageStats]
+
+    def new_queue(self) -> queue.Queue:
+        return queue.Queue(maxsize=self.__queue_depth)
+
+    def put(self, output: queue.Queue, item, stats: StageStats) -> bool:
+        # returns False if the pipeline was stopped while waiting for room
+        start = time.perf_counter()
+        try:
+            while not self.__stop.is_set():
+                try:
+                    output.put(item, timeout=self.POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        finally:
+            stats.blocked += time.perf_counter() - start
+
+    def get(self, source: queue.Queue, stats: StageStats):
+        # the next item, or the failure of a stage, or DONE once the pipeline was stopped
+        start = time.perf_counter()
+        try:
+            while not self.__stop.is_set():
+                try:
+                    return source.get(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+            return self.__failure if self.__failure is not None else DONE
+        finally:
+            stats.waiting += time.perf_counter() - start
+
+    def stage(self, name: str, run: Callable[[StageStats], None], output: queue.Queue) -> None:
+        # runs a stage in a thread; a failure is passed on in place of the next chunk and stops the other stages
+        stats = StageStats(name)
+        self.stats.append(stats)
+
+        def target() -> None:
+            start = time.perf_counter()
+            try:
+                run(stats)
+                self.put(output, DONE, stats)
+            except BaseException as error:
+                self.fail(error, output)
+            finally:
+                stats.seconds = time.perf_counter() - start
+
+        thread = threading.Thread(target=target, name="pywords " + name, daemon=True)
+        self.__threads.append(thread)
+        thread.start()
+
+    def fail(self, error: BaseException, output: Optional[queue.Queue] = None) -> None:
+        # the first failure is kept; a full output queue is not waited for, as the stop event reaches the next stage
+        if self.__failure is None:
+            self.__failure = StageFailure(error)
+        self.__stop.set()
+        if output is not None:
+            try:
+                output.put_nowait(self.__failure)
+            except queue.Full:
+                pass
+
+    def stop(self) -> None:
+        self.__stop.set()
+        for thread in self.__threads:
+            thread.join()
+
+
+def read_line_chunks(file_names: Sequence[str], chunk_size: int) -> Iterator[List[str]]:
+    for file_name in file_names:
+        with open_corpus(file_name) as f:
+            chunk = []
+            for line in f:
+                chunk.append(line)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+            if len(chunk) > 0:
+                yield chunk
+
+
+def analyze_chunk(word_tuples: Sequence[WordTuple], target_count: int, batch_alignment: bool = False) -> List[List[TrainingSetElement]]:
+    # the analyzed word pairs of every target; empty target cells mark missing forms and are left out
+    return [analyze_word_pairs([(word_tuple[0], word_tuple[t + 1]) for word_tuple in word_tuples
+                                if word_tuple[t + 1] != ""], batch_alignment)
+            for t in range(target_count)]
+
+
+def cluster_corpus(patterns: Iterable[str],
+                   input_processor: WordProcessor,
+                   jobs: int = 1,
+                   chunk_size: int = 1000,
+                   queue_depth: int = 4,
+                   deduplicate: bool = True,
+                   batch_alignment: bool = False,
+                   merge: bool = False,
+                   executor: str = "auto") -> Tuple[List[WordTuple], List[ClusterStore], List[StageStats]]:
+    file_names = expand_input_paths(patterns)
+    pipeline = Pipeline(queue_depth)
+    lines = pipeline.new_queue()
+    parsed = pipeline.new_queue()
+    analyzed = pipeline.new_queue()
+    word_tuples = [] # type: List[WordTuple]
+    target_counts = [] # type: List[int]
+
+    def read(stats: StageStats) -> None:
+        for chunk in read_line_chunks(file_names, chunk_size):
+            stats.items += 1
+            stats.word_tuples += len(chunk)
+            if not pipeline.put(lines, chunk, stats):
+                return
+
+    def parse(stats: StageStats) -> None:
+        seen = set()
+        while True:
+            chunk = pipeline.get(lines, stats)
+            if chunk is DONE or isinstance(chunk, StageFailure):
+                if isinstance(chunk, StageFailure):
+                    raise chunk.error
+                return
+            chunk_tuples = []
+            for word_tuple in parse_word_tuples(chunk, input_processor):
+                if deduplicate:
+                    if word_tuple in seen:
+                        continue
+                    seen.add(word_tuple)
+                if len(target_counts) == 0:
+                    if len(word_tuple) < 2:
+                        raise ValueError("Word tuples require at least a base form and one target form")
+                    target_counts.append(len(word_tuple) - 1)
+                if len(word_tuple) != target_counts[0] + 1:
+                    raise ValueError("Word tuple <{}> has {} columns, expected {}".format(
+                        ", ".join(word_tuple), len(word_tuple), target_counts[0] + 1))
+                chunk_tuples.append(word_tuple)
+            word_tuples.extend(chunk_tuples)
+            stats.items += 1
+            stats.word_tuples += len(chunk_tuples)
+            if len(chunk_tuples) > 0 and not pipeline.put(parsed, chunk_tuples, stats):
+                return
+
+    pool = make_executor(jobs, executor) if jobs > 1 else None
+
+    def analyze(stats: StageStats) -> None:
+        # with a pool, the futures are queued in input order and resolved by the clustering stage
+        while True:
+            chunk = pipeline.get(parsed, stats)
+            if chunk is DONE or isinstance(chunk, StageFailure):
+                if isinstance(chunk, StageFailure):
+                    raise chunk.error
+                return
+            if pool is not None:
+                result = pool.submit(analyze_chunk, chunk, target_counts[0], batch_alignment)
+            else:
+                result = analyze_chunk(chunk, target_counts[0], batch_alignment)
+            stats.items += 1
+            stats.word_tuples += len(chunk)
+            if not pipeline.put(analyzed, result, stats):
+                return
+
+    pipeline.stage("read", read, lines)
+    pipeline.stage("parse", parse, parsed)
+    pipeline.stage("analyze", analyze, analyzed)
+    cluster_stats = StageStats("cluster")
+    cluster_sets = [] # type: List[ClusterSet]
+    start = time.perf_counter()
+    try:
+        while True:
+            result = pipeline.get(analyzed, cluster_stats)
+            if result is DONE:
+                break
+            if isinstance(result, StageFailure):
+                raise result.error
+            if isinstance(result, Future):
+                wait_start = time.perf_counter()
+                result = result.result()
+                cluster_stats.waiting += time.perf_counter() - wait_start
+            if len(cluster_sets) == 0:
+                cluster_sets = [ClusterSet() for _ in result]
+            for cluster_set, elements in zip(cluster_sets, result):
+                for element in elements:
+                    cluster_set.add(element)
+            cluster_stats.items += 1
+            cluster_stats.word_tuples += max((len(elements) for elements in result), default=0)
+    finally:
+        cluster_stats.seconds = time.perf_counter() - start
+        pipeline.stop()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    if len(word_tuples) == 0:
+        raise ValueError("No word tuples given")
+    clusters = [cluster_set.get_clusters() for cluster_set in cluster_sets]
+    if merge:
+        clusters = [merge_clusters(store) for store in clusters]
+    return word_tuples, clusters, pipeline.stats + [cluster_stats]
@@ -0,0 +1,116 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import os
+import tempfile
+import threading
+import unittest
+
+import benchmark_corpus
+import input_parsing as par
+import training
+import training_pipeline
+
+
+class TrainingPipelineTests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def __write(self, name: str, lines) -> str:
+        file_name = os.path.join(self.__directory.name, name)
+        with open(file_name, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        return file_name
+
+    def test_same_clusters_as_sequential_training(self) -> None:
+        pairs = benchmark_corpus.generate_word_pairs(300, seed=1)
+        first = self.__write("a.txt", ["{}, {}".format(*pair) for pair in pairs[:200]])
+        second = self.__write("b.txt", ["{}, {}".format(*pair) for pair in pairs[150:]])
+        word_tuples, _ = training.read_corpus([first, second], par.StripProcessor())
+        expected = training.cluster_word_pairs(word_tuples)
+        for jobs in [1, 2]:
+            pipelined_tuples, clusters, stats = training_pipeline.cluster_corpus(
+                [first, second], par.StripProcessor(), jobs, chunk_size=32, queue_depth=2)
+            self.assertEqual(pipelined_tuples, word_tuples)
+            self.assertEqual(list(clusters[0].labels), list(expected.labels))
+            self.assertEqual(clusters[0].transformations, expected.transformations)
+            self.assertEqual([s.name for s in stats], ["read", "parse", "analyze", "cluster"])
+            self.assertEqual(stats[0].word_tuples, 350)
+            self.assertEqual(stats[-1].word_tuples, 300)
+
+    def test_missing_forms(self) -> None:
+        file_name = self.__write("words.txt", ["liegen, gelegen,", "sagen, gesagt, sagte", "liegen, gelegen,"])
+        word_tuples, clusters, _ = training_pipeline.cluster_corpus([file_name], par.StripProcessor(), chunk_size=1)
+        self.assertEqual(len(word_tuples), 2)
+        self.assertEqual([len(c.elements) for c in clusters], [2, 1])
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in word_tuples])
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "pret"],
+                                     training.fit_clusters(word_tuples, x_data, clusters))
+        self.assertEqual(model.predict("sagen"), {"pp": "gesagt", "pret": "sagte"})
+
+    def test_errors(self) -> None:
+        file_name = self.__write("words.txt", ["liegen, gelegen", "sagen, gesagt, sagte"])
+        self.assertRaises(ValueError, training_pipeline.cluster_corpus, [file_name], par.StripProcessor())
+        self.assertRaises(ValueError, training_pipeline.cluster_corpus, [self.__write("empty.txt", [])],
+                          par.StripProcessor())
+        self.assertRaises(ValueError, training_pipeline.cluster_corpus, [file_name], par.StripProcessor(), queue_depth=0)
+
+    def test_stop_after_failure_in_consumer(self) -> None:
+        # the producer is blocked by a full queue and the idle stage waits for input that never comes when the
+        # consuming stage fails; stop() must still return
+        pipeline = training_pipeline.Pipeline(1)
+        produced = pipeline.new_queue()
+        idle_input = pipeline.new_queue()
+        idle_output = pipeline.new_queue()
+
+        def produce(stats: training_pipeline.StageStats) -> None:
+            while pipeline.put(produced, "chunk", stats):
+                pass
+
+        def idle(stats: training_pipeline.StageStats) -> None:
+            pipeline.get(idle_input, stats)
+
+        pipeline.stage("produce", produce, pipeline.new_queue())
+        pipeline.stage("idle", idle, idle_output)
+        consumer_stats = training_pipeline.StageStats("consume")
+        with self.assertRaises(ValueError):
+            try:
+                pipeline.get(produced, consumer_stats)
+                raise ValueError("consumer failed")
+            finally:
+                stopper = threading.Thread(target=pipeline.stop, daemon=True)
+                stopper.start()
+                stopper.join(5)
+                self.assertFalse(stopper.is_alive())
+
+    def test_failure_reaches_waiting_stage(self) -> None:
+        pipeline = training_pipeline.Pipeline(1)
+        source = pipeline.new_queue()
+        failed = pipeline.new_queue()
+
+        def fail(stats: training_pipeline.StageStats) -> None:
+            raise KeyError("stage failed")
+
+        pipeline.stage("fail", fail, failed)
+        # the stage waiting on another queue sees the failure instead of DONE
+        item = pipeline.get(source, training_pipeline.StageStats("wait"))
+        self.assertIsInstance(item, training_pipeline.StageFailure)
+        self.assertIsInstance(item.error, KeyError)
+        pipeline.stop()
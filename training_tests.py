@@ -0,0 +1,169 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import os
+import tempfile
+import unittest
+
+import corpus_index
+import input_parsing as par
+import training
+
+
+class TrainingTests(unittest.TestCase):
+
+    WORD_TUPLES = [("liegen", "gelegen", "lag"), ("fliegen", "geflogen", "flog"), ("wiegen", "gewogen", "wog"),
+                   ("machen", "gemacht", "machte"), ("sagen", "gesagt", "sagte")]
+
+    def __train(self, jobs: int, feature_mode: str = "onehot"):
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in self.WORD_TUPLES],
+                                                    training.make_encoder(feature_mode, positions=3))
+        results = training.train_targets(self.WORD_TUPLES, x_data, jobs)
+        return training.build_model(par.StripProcessor(), encoder, ["pp", "pret"], results)
+
+    def test_read_word_tuples(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "words.txt")
+            with open(file_name, "w", encoding="utf-8") as f:
+                f.write("liegen, gelegen, lag\n\nsagen, gesagt, sagte\n")
+            word_tuples = training.read_word_tuples(file_name, par.StripProcessor())
+        self.assertEqual(word_tuples, [("liegen", "gelegen", "lag"), ("sagen", "gesagt", "sagte")])
+
+    def test_count_targets(self) -> None:
+        self.assertEqual(training.count_targets(self.WORD_TUPLES), 2)
+        self.assertRaises(ValueError, training.count_targets, [("liegen", "gelegen"), ("sagen",)])
+        self.assertRaises(ValueError, training.count_targets, [("liegen",)])
+        self.assertRaises(ValueError, training.count_targets, [])
+
+    def test_multi_target_model(self) -> None:
+        model = self.__train(jobs=1)
+        for word_tuple in self.WORD_TUPLES:
+            self.assertEqual(model.predict(word_tuple[0]), {"pp": word_tuple[1], "pret": word_tuple[2]})
+        self.assertEqual(model.predict_target("sagen", "pret"), "sagte")
+        self.assertRaises(KeyError, model.predict_target, "sagen", "3sg")
+
+    def test_ordinal_features(self) -> None:
+        model = self.__train(jobs=1, feature_mode="ordinal")
+        self.assertEqual(model.encoder.feature_count, 7)
+        for word_tuple in self.WORD_TUPLES:
+            self.assertEqual(model.predict(word_tuple[0]), {"pp": word_tuple[1], "pret": word_tuple[2]})
+        self.assertRaises(ValueError, training.make_encoder, "binary")
+
+    def test_trie_backend(self) -> None:
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in self.WORD_TUPLES],
+                                                    training.make_encoder(backend="trie"))
+        results = training.train_targets(self.WORD_TUPLES, x_data, backend="trie")
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "pret"], results)
+        for word_tuple in self.WORD_TUPLES:
+            self.assertEqual(model.predict(word_tuple[0]), {"pp": word_tuple[1], "pret": word_tuple[2]})
+        self.assertRaises(ValueError, training.fit_classifier, x_data, [0] * len(x_data), "svm")
+
+    def test_forest_backend(self) -> None:
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in self.WORD_TUPLES])
+        results = training.train_targets(self.WORD_TUPLES, x_data, jobs=2, backend="forest", forest_size=4)
+        self.assertEqual([len(classifier.estimators_) for _, classifier in results], [4, 4])
+        self.assertEqual(results[0][1].n_jobs, 2)
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "pret"], results)
+        self.assertEqual(len(model.predict_top_k(["biegen"], 2)), 1)
+
+    def test_batch_alignment(self) -> None:
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in self.WORD_TUPLES])
+        for (clusters, _), (batched_clusters, _) in zip(training.train_targets(self.WORD_TUPLES, x_data),
+                                                         training.train_targets(self.WORD_TUPLES, x_data, batch_alignment=True)):
+            self.assertEqual(list(clusters.labels), list(batched_clusters.labels))
+            self.assertEqual(clusters.transformations, batched_clusters.transformations)
+
+    def test_parallel_training(self) -> None:
+        sequential = self.__train(jobs=1)
+        parallel = self.__train(jobs=2)
+        for word_tuple in self.WORD_TUPLES:
+            self.assertEqual(sequential.predict(word_tuple[0]), parallel.predict(word_tuple[0]))
+
+    def test_missing_forms(self) -> None:
+        word_tuples = [("liegen", "gelegen", ""), ("sagen", "gesagt", "sagte")]
+        encoder, x_data = training.extract_features([word_tuple[0] for word_tuple in word_tuples])
+        results = training.train_targets(word_tuples, x_data)
+        self.assertEqual(len(results[0][0].elements), 2)
+        self.assertEqual(len(results[1][0].elements), 1)
+
+    def test_collapse_duplicate_rows(self) -> None:
+        word_tuples = self.WORD_TUPLES * 3 + [("liegen", "gelegen", "lag")]
+        base_words = [word_tuple[0] for word_tuple in word_tuples]
+        for feature_mode in ["onehot", "ordinal"]:
+            encoder, x_data = training.extract_features(base_words, training.make_encoder(feature_mode, positions=3))
+            labels = training.cluster_word_pairs([word_tuple[:2] for word_tuple in word_tuples]).labels
+            collapsed, collapsed_labels, weights = training.collapse_duplicate_rows(x_data, labels)
+            self.assertEqual(collapsed.shape[0], 5)
+            self.assertEqual(collapsed_labels, list(labels[:5]))
+            self.assertEqual(weights, [4, 3, 3, 3, 3])
+            classifier = training.fit_classifier(x_data, labels, collapse_duplicates=True)
+            self.assertEqual(classifier.tree_.n_node_samples[0], 5)
+            self.assertEqual(list(classifier.predict(x_data)),
+                             list(training.fit_classifier(x_data, labels).predict(x_data)))
+        self.assertEqual(training.collapse_duplicate_rows(["a", "b", "a"], [0, 1, 1])[2], [1, 1, 1])
+
+    def test_collapse_duplicates_in_training(self) -> None:
+        base_words = [word_tuple[0] for word_tuple in self.WORD_TUPLES]
+        encoder, x_data = training.extract_features(base_words + base_words)
+        results = training.train_targets(self.WORD_TUPLES * 2, x_data, collapse_duplicates=True)
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "pret"], results)
+        self.assertEqual(model.predict("liegen"), {"pp": "gelegen", "pret": "lag"})
+        self.assertEqual(results[0][1].tree_.n_node_samples[0], 5)
+
+
+class CorpusReadingTests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+        contents = {"a.txt": "liegen, gelegen\nsagen, gesagt\n",
+                    "b.txt": "sagen, gesagt\nmachen, gemacht\nmachen, gemacht\n",
+                    "c.csv": "wiegen, gewogen\n"}
+        for file_name, content in contents.items():
+            with open(os.path.join(self.__directory.name, file_name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self) -> None:
+        self.__directory.cleanup()
+
+    def __path(self, file_name: str) -> str:
+        return os.path.join(self.__directory.name, file_name)
+
+    def test_expand_input_paths(self) -> None:
+        self.assertEqual(training.expand_input_paths([self.__path("*.txt"), self.__path("c.csv"), self.__path("a.txt")]),
+                         [self.__path("a.txt"), self.__path("b.txt"), self.__path("c.csv")])
+        self.assertRaises(ValueError, training.expand_input_paths, [self.__path("*.tsv")])
+
+    def test_deduplication(self) -> None:
+        for jobs, use_processes in [(1, False), (2, False), (2, True)]:
+            word_tuples, stats = training.read_corpus([self.__path("*.txt")], par.StripProcessor(), jobs, use_processes)
+            self.assertEqual(word_tuples, [("liegen", "gelegen"), ("sagen", "gesagt"), ("machen", "gemacht")])
+            self.assertEqual([s.word_tuples for s in stats], [2, 3])
+            self.assertEqual([s.duplicates for s in stats], [0, 2])
+
+    def test_indexed_shards(self) -> None:
+        corpus_index.build_index(self.__path("b.txt"))
+        expected, _ = training.read_corpus([self.__path("*.txt")], par.StripProcessor())
+        for use_processes in [False, True]:
+            word_tuples, stats = training.read_corpus([self.__path("*.txt")], par.StripProcessor(), 3, use_processes)
+            self.assertEqual(word_tuples, expected)
+            self.assertEqual([s.duplicates for s in stats], [0, 2])
+        self.assertEqual(training.read_word_tuple_shard(self.__path("b.txt"), par.StripProcessor(), 0, 2),
+                         [("sagen", "gesagt")])
+
+    def test_keep_duplicates(self) -> None:
+        word_tuples, stats = training.read_corpus([self.__path("b.txt")], par.StripProcessor(), deduplicate=False)
+        self.assertEqual(len(word_tuples), 3)
+        self.assertEqual(stats[0].duplicates, 0)
@@ -0,0 +1,438 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from model import TransformationModel
+
+# turns fitted sklearn decision trees into small flat int arrays for inference. the compact trees work on feature rows
+# given as dicts of feature id -> integer value (missing features are 0) and need nothing but the standard library.
+
+LEAF = -1
+
+
+def smallest_typecode(values: Sequence[int]) -> str:
+    low = min(values, default=0)
+    high = max(values, default=0)
+    for typecode in ["b", "h", "i"]:
+        bits = array(typecode).itemsize * 8
+        if -2 ** (bits - 1) <= low and high < 2 ** (bits - 1):
+            return typecode
+    return "q"
+
+
+def flatten_sklearn_tree(tree, leaf_value: Callable[[int], int],
+                         leaves: Optional[List[List[int]]] = None) -> Tuple[List[int], List[int], List[int], List[int]]:
+    # the node arrays of a fitted sklearn tree_ in the layout of CompactTree, leaf_value giving the value of a leaf.
+    # thresholds are floored, which is exact as all features take integer values. if given, leaves is filled with the
+    # reachable sklearn leaves below every node, so that a leaf collapsed from a subtree can combine their samples
+    feature = []
+    value = []
+    left = []
+    right = []
+
+    def add(node: int, bounds: Dict[int, Tuple[float, float]]) -> int:
+        # bounds hold what the path to node already implies for a feature: lower < row[feature] <= upper
+        while tree.children_left[node] >= 0:
+            f = int(tree.feature[node])
+            threshold = int(tree.threshold[node] // 1)
+            lower, upper = bounds.get(f, (float("-inf"), float("inf")))
+            if upper <= threshold:
+                node = tree.children_left[node]
+            elif lower >= threshold:
+                node = tree.children_right[node]
+            else:
+                break
+        index = len(feature)
+        feature.append(LEAF)
+        value.append(0)
+        left.append(0)
+        right.append(0)
+        if leaves is not None:
+            leaves.append([node])
+        if tree.children_left[node] < 0:
+            value[index] = leaf_value(node)
+            return index
+        f = int(tree.feature[node])
+        threshold = int(tree.threshold[node] // 1)
+        lower, upper = bounds.get(f, (float("-inf"), float("inf")))
+        left_index = add(tree.children_left[node], {**bounds, f: (lower, threshold)})
+        right_index = add(tree.children_right[node], {**bounds, f: (threshold, upper)})
+        if (feature[left_index] == LEAF and feature[right_index] == LEAF and
+                value[left_index] == value[right_index]):
+            # both subtrees predict the same, so the test does not matter; they are the last nodes added
+            value[index] = value[left_index]
+            if leaves is not None:
+                leaves[index] = leaves[left_index] + leaves[right_index]
+                del leaves[index + 1:]
+            del feature[index + 1:], value[index + 1:], left[index + 1:], right[index + 1:]
+            return index
+        feature[index] = f
+        value[index] = threshold
+        left[index] = left_index
+        right[index] = right_index
+        return index
+
+    add(0, dict())
+    return feature, value, left, right
+
+
+class CompactTree:
+
+    # node n is a leaf if feature[n] == LEAF, then value[n] is its class. otherwise row[feature[n]] <= value[n] leads
+    # to node left[n] and everything else to node right[n]. node 0 is the root. optionally, the class distribution of
+    # the training words of every leaf is kept as in CompactForest: left[n] of leaf n is the index d of its distribution,
+    # which gives the probability probabilities[k] to the class classes[class_indices[k]] for k in
+    # distributions[d]:distributions[d + 1]. trees without distributions (e.g. pickled before they were kept) have no
+    # classes_, so TransformationModel.class_scores only knows the predicted class of a word
+
+    def __init__(self, feature: Sequence[int], value: Sequence[int], left: Sequence[int], right: Sequence[int],
+                 distributions: Optional[Sequence[int]] = None, class_indices: Optional[Sequence[int]] = None,
+                 probabilities: Optional[Sequence[float]] = None, classes: Optional[Sequence[int]] = None) -> None:
+        if not (len(feature) == len(value) == len(left) == len(right)) or len(feature) == 0:
+            raise ValueError("CompactTree requires equally long, non-empty node arrays")
+        self.__feature = array(smallest_typecode(feature), feature)
+        self.__value = array(smallest_typecode(value), value)
+        self.__left = array(smallest_typecode(left), left)
+        self.__right = array(smallest_typecode(right), right)
+        self.__distributions = None
+        self.__class_indices = None
+        self.__probabilities = None
+        self.__classes = None
+        if distributions is not None:
+            if class_indices is None or probabilities is None or classes is None:
+                raise ValueError("CompactTree requires class indices, probabilities and classes with its distributions")
+            self.__distributions = array(smallest_typecode(distributions), distributions)
+            self.__class_indices = array(smallest_typecode(class_indices), class_indices)
+            self.__probabilities = array("d", probabilities)
+            self.__classes = tuple(classes)
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        for name in ["distributions", "class_indices", "probabilities", "classes"]:
+            self.__dict__.setdefault("_CompactTree__" + name, None)
+
+    @classmethod
+    def from_buffers(cls, feature: Sequence[int], value: Sequence[int], left: Sequence[int], right: Sequence[int],
+                     distributions: Optional[Sequence[int]] = None, class_indices: Optional[Sequence[int]] = None,
+                     probabilities: Optional[Sequence[float]] = None, classes: Optional[Sequence[int]] = None) -> "CompactTree":
+        # wraps existing node buffers, e.g. read-only memoryviews of a mapped model file, without copying them
+        tree = cls.__new__(cls)
+        tree.__feature = feature
+        tree.__value = value
+        tree.__left = left
+        tree.__right = right
+        tree.__distributions = distributions
+        tree.__class_indices = class_indices
+        tree.__probabilities = probabilities
+        tree.__classes = None if classes is None else tuple(classes)
+        return tree
+
+    @staticmethod
+    def from_sklearn(classifier) -> "CompactTree":
+        # the distribution of a leaf collapsed from a subtree sums the class counts of the sklearn leaves below it
+        classes = [int(c) for c in classifier.classes_]
+        tree = classifier.tree_
+        leaves = [] # type: List[List[int]]
+        feature, value, left, right = flatten_sklearn_tree(
+            tree, lambda node: classes[int(tree.value[node][0].argmax())], leaves)
+        distributions = [0]
+        class_indices = []
+        probabilities = []
+        distribution_ids = dict() # type: Dict[Tuple[Tuple[int, float], ...], int]
+        for n in range(len(feature)):
+            if feature[n] != LEAF:
+                continue
+            counts = sum(tree.value[leaf][0] for leaf in leaves[n])
+            distribution = tuple((int(c), float(p)) for c, p in enumerate(counts / counts.sum()) if p > 0)
+            d = distribution_ids.get(distribution)
+            if d is None:
+                d = distribution_ids[distribution] = len(distribution_ids)
+                class_indices.extend(c for c, _ in distribution)
+                probabilities.extend(p for _, p in distribution)
+                distributions.append(len(class_indices))
+            left[n] = d
+        return CompactTree(feature, value, left, right, distributions, class_indices, probabilities, classes)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.__feature)
+
+    @property
+    def arrays(self) -> Tuple[Sequence[int], Sequence[int], Sequence[int], Sequence[int]]:
+        return self.__feature, self.__value, self.__left, self.__right
+
+    @property
+    def distribution_arrays(self) -> Optional[Tuple[Sequence[int], Sequence[int], Sequence[float]]]:
+        if self.__distributions is None:
+            return None
+        return self.__distributions, self.__class_indices, self.__probabilities
+
+    @property
+    def classes_(self) -> Optional[Sequence[int]]:
+        # named like the attribute of sklearn classifiers, so that TransformationModel.class_scores ranks by the leaf
+        # distributions; None if the tree has none
+        return self.__classes
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.__feature, self.__value, self.__left, self.__right]
+        if self.__distributions is not None:
+            arrays += [self.__distributions, self.__class_indices, self.__probabilities]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    @property
+    def used_features(self) -> List[int]:
+        return sorted({f for f in self.__feature if f != LEAF})
+
+    def remap_features(self, mapping: Dict[int, int]) -> "CompactTree":
+        return CompactTree([f if f == LEAF else mapping[f] for f in self.__feature],
+                           self.__value, self.__left, self.__right, self.__distributions, self.__class_indices,
+                           self.__probabilities, self.__classes)
+
+    def leaf_of(self, row: Dict[int, int]) -> int:
+        feature = self.__feature
+        value = self.__value
+        node = 0
+        while feature[node] != LEAF:
+            if row.get(feature[node], 0) <= value[node]:
+                node = self.__left[node]
+            else:
+                node = self.__right[node]
+        return node
+
+    def predict_row(self, row: Dict[int, int]) -> int:
+        return self.__value[self.leaf_of(row)]
+
+    def predict(self, rows: Sequence[Dict[int, int]]) -> List[int]:
+        return [self.predict_row(row) for row in rows]
+
+    def predict_proba(self, rows: Sequence[Dict[int, int]]) -> List[List[float]]:
+        # the class distribution of the leaf of every row, in the order of classes_
+        if self.__distributions is None:
+            raise ValueError("CompactTree has no class distributions")
+        probabilities = []
+        for row in rows:
+            d = self.__left[self.leaf_of(row)]
+            row_probabilities = [0.0] * len(self.__classes)
+            for k in range(self.__distributions[d], self.__distributions[d + 1]):
+                row_probabilities[self.__class_indices[k]] = self.__probabilities[k]
+            probabilities.append(row_probabilities)
+        return probabilities
+
+
+class CompactForest:
+
+    # the trees of a random forest in one set of flat node arrays, laid out like CompactTree. tree i starts at node
+    # roots[i]. the value of a leaf is the index of its class distribution: leaf distribution d gives the probability
+    # probabilities[k] to the class with the index class_indices[k] for k in distributions[d]:distributions[d + 1].
+    # equal distributions are stored once. the forest predicts the class with the highest sum of probabilities over
+    # all trees, the first class on ties, like the sklearn forest
+
+    def __init__(self, roots: Sequence[int], feature: Sequence[int], value: Sequence[int], left: Sequence[int],
+                 right: Sequence[int], distributions: Sequence[int], class_indices: Sequence[int],
+                 probabilities: Sequence[float], classes: Sequence[int]) -> None:
+        if not (len(feature) == len(value) == len(left) == len(right)) or len(roots) == 0:
+            raise ValueError("CompactForest requires equally long node arrays and at least one tree")
+        self.__roots = array(smallest_typecode(roots), roots)
+        self.__feature = array(smallest_typecode(feature), feature)
+        self.__value = array(smallest_typecode(value), value)
+        self.__left = array(smallest_typecode(left), left)
+        self.__right = array(smallest_typecode(right), right)
+        self.__distributions = array(smallest_typecode(distributions), distributions)
+        self.__class_indices = array(smallest_typecode(class_indices), class_indices)
+        self.__probabilities = array("d", probabilities)
+        self.__classes = tuple(classes)
+
+    @staticmethod
+    def from_sklearn(classifier) -> "CompactForest":
+        # the leaf probabilities are normalized like in DecisionTreeClassifier.predict_proba
+        roots = []
+        feature = []
+        value = []
+        left = []
+        right = []
+        distributions = [0]
+        class_indices = []
+        probabilities = []
+        distribution_ids = dict() # type: Dict[Tuple[Tuple[int, float], ...], int]
+        for estimator in classifier.estimators_:
+            tree = estimator.tree_
+
+            def leaf_value(node: int) -> int:
+                counts = tree.value[node][0]
+                distribution = tuple((int(c), float(p)) for c, p in enumerate(counts / counts.sum()) if p > 0)
+                d = distribution_ids.get(distribution)
+                if d is None:
+                    d = distribution_ids[distribution] = len(distribution_ids)
+                    class_indices.extend(c for c, _ in distribution)
+                    probabilities.extend(p for _, p in distribution)
+                    distributions.append(len(class_indices))
+                return d
+
+            root = len(feature)
+            tree_feature, tree_value, tree_left, tree_right = flatten_sklearn_tree(tree, leaf_value)
+            roots.append(root)
+            feature.extend(tree_feature)
+            value.extend(tree_value)
+            left.extend(l + root for l in tree_left)
+            right.extend(r + root for r in tree_right)
+        return CompactForest(roots, feature, value, left, right, distributions, class_indices, probabilities,
+                             [int(c) for c in classifier.classes_])
+
+    @property
+    def classes_(self) -> Sequence[int]:
+        # named like the attribute of sklearn classifiers, so that TransformationModel.class_scores ranks by the votes
+        return self.__classes
+
+    @property
+    def tree_count(self) -> int:
+        return len(self.__roots)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.__feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in [self.__roots, self.__feature, self.__value, self.__left, self.__right,
+                                                 self.__distributions, self.__class_indices, self.__probabilities])
+
+    @property
+    def used_features(self) -> List[int]:
+        return sorted({f for f in self.__feature if f != LEAF})
+
+    def remap_features(self, mapping: Dict[int, int]) -> "CompactForest":
+        return CompactForest(self.__roots, [f if f == LEAF else mapping[f] for f in self.__feature], self.__value,
+                             self.__left, self.__right, self.__distributions, self.__class_indices,
+                             self.__probabilities, self.__classes)
+
+    def scores_of(self, row: Dict[int, int]) -> List[float]:
+        # the summed probabilities of every class, in the order of classes_
+        feature = self.__feature
+        value = self.__value
+        left = self.__left
+        right = self.__right
+        distributions = self.__distributions
+        class_indices = self.__class_indices
+        probabilities = self.__probabilities
+        scores = [0.0] * len(self.__classes)
+        for node in self.__roots:
+            while feature[node] != LEAF:
+                if row.get(feature[node], 0) <= value[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            d = value[node]
+            for k in range(distributions[d], distributions[d + 1]):
+                scores[class_indices[k]] += probabilities[k]
+        return scores
+
+    def predict_row(self, row: Dict[int, int]) -> int:
+        scores = self.scores_of(row)
+        return self.__classes[max(range(len(scores)), key=scores.__getitem__)]
+
+    def predict(self, rows: Sequence[Dict[int, int]]) -> List[int]:
+        return [self.predict_row(row) for row in rows]
+
+    def predict_proba(self, rows: Sequence[Dict[int, int]]) -> List[List[float]]:
+        count = len(self.__roots)
+        return [[score / count for score in self.scores_of(row)] for row in rows]
+
+
+def compact_classifier(classifier):
+    if hasattr(classifier, "estimators_"):
+        return CompactForest.from_sklearn(classifier)
+    return CompactTree.from_sklearn(classifier)
+
+
+def sklearn_trees(classifier) -> List:
+    # the fitted trees of a decision tree or a random forest
+    if hasattr(classifier, "estimators_"):
+        return [estimator.tree_ for estimator in classifier.estimators_]
+    return [classifier.tree_]
+
+
+def sklearn_node_count(classifier) -> int:
+    return sum(tree.node_count for tree in sklearn_trees(classifier))
+
+
+def sklearn_tree_nbytes(classifier) -> int:
+    return sum(a.nbytes for tree in sklearn_trees(classifier)
+               for a in [tree.children_left, tree.children_right, tree.feature, tree.threshold, tree.value,
+                         tree.impurity, tree.n_node_samples, tree.weighted_n_node_samples])
+
+
+def sklearn_predict(classifier, x_data) -> List[int]:
+    # the probabilities of the trees of a forest are summed in order, as CompactForest does; the sklearn forest adds
+    # them in whatever order its jobs finish, which may round differently on exact ties
+    if not hasattr(classifier, "estimators_"):
+        return [int(c) for c in classifier.predict(x_data)]
+    scores = 0
+    for estimator in classifier.estimators_:
+        scores = scores + estimator.predict_proba(x_data)
+    return [int(classifier.classes_[i]) for i in scores.argmax(axis=1)]
+
+
+class CompactionReport:
+
+    def __init__(self, nodes_before: int, nodes_after: int, bytes_before: int, bytes_after: int,
+                 features_before: int, features_after: int) -> None:
+        self.nodes_before = nodes_before
+        self.nodes_after = nodes_after
+        self.bytes_before = bytes_before
+        self.bytes_after = bytes_after
+        self.features_before = features_before
+        self.features_after = features_after
+
+    def __repr__(self) -> str:
+        return "<CompactionReport, nodes {} -> {}, bytes {} -> {}, features {} -> {}>".format(
+            self.nodes_before, self.nodes_after, self.bytes_before, self.bytes_after,
+            self.features_before, self.features_after)
+
+
+def compact_classifiers(classifiers: Sequence, encoder) -> Tuple[object, List, CompactionReport]:
+    # all trees share one feature encoding, so the compact encoder keeps the features used by any of them
+    trees = [compact_classifier(classifier) for classifier in classifiers]
+    used_features = sorted({f for tree in trees for f in tree.used_features})
+    mapping = {f: i for i, f in enumerate(used_features)}
+    trees = [tree.remap_features(mapping) for tree in trees]
+    compact_encoder = encoder.compact(used_features)
+    report = CompactionReport(sum(sklearn_node_count(classifier) for classifier in classifiers),
+                              sum(tree.node_count for tree in trees),
+                              sum(sklearn_tree_nbytes(classifier) for classifier in classifiers),
+                              sum(tree.nbytes for tree in trees),
+                              encoder.feature_count,
+                              compact_encoder.feature_count)
+    return compact_encoder, trees, report
+
+
+def verify_compaction(model: TransformationModel, compact_encoder, trees: Sequence, words: Sequence[str]) -> None:
+    x_data = model.encoder.transform(words)
+    compact_rows = compact_encoder.transform(words)
+    for target_name, classifier, tree in zip(model.target_names, model.classifiers, trees):
+        if sklearn_predict(classifier, x_data) != tree.predict(compact_rows):
+            raise ValueError("Compacted tree for target <{}> does not reproduce the predictions of the original tree".format(target_name))
+
+
+def compact_model(model: TransformationModel, training_words: Sequence[str]) -> Tuple[TransformationModel, CompactionReport]:
+    # the compact model must predict exactly the same classes as the original one for all training words
+    compact_encoder, trees, report = compact_classifiers(model.classifiers, model.encoder)
+    verify_compaction(model, compact_encoder, trees, training_words)
+    compacted = TransformationModel(model.input_processor, compact_encoder, model.target_names, trees, model.transformations,
+                                    model.class_counts, model.exact_matches)
+    return compacted, report
@@ -0,0 +1,147 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import pickle
+import unittest
+from types import SimpleNamespace
+
+import numpy
+
+import input_parsing as par
+import training
+from tree_compaction import CompactForest, CompactTree, LEAF, compact_model, sklearn_predict, smallest_typecode
+
+
+def make_classifier(children_left, children_right, feature, threshold, leaf_classes, classes):
+    # a stand-in for a fitted DecisionTreeClassifier; leaves get a one-hot class distribution
+    value = numpy.zeros((len(children_left), 1, len(classes)))
+    for node, c in leaf_classes.items():
+        value[node][0][c] = 1
+    tree = SimpleNamespace(children_left=numpy.array(children_left), children_right=numpy.array(children_right),
+                           feature=numpy.array(feature), threshold=numpy.array(threshold), value=value,
+                           node_count=len(children_left))
+    return SimpleNamespace(tree_=tree, classes_=numpy.array(classes))
+
+
+class CompactTreeTests(unittest.TestCase):
+
+    def test_smallest_typecode(self) -> None:
+        self.assertEqual(smallest_typecode([-1, 100]), "b")
+        self.assertEqual(smallest_typecode([0, 300]), "h")
+        self.assertEqual(smallest_typecode([0, 70000]), "i")
+        self.assertEqual(smallest_typecode([]), "b")
+
+    def test_collapse_equal_leaves(self) -> None:
+        # 0: f0 <= 0.5 ? 1 : 2;  1: f1 <= 0.5 ? 3 (class 7) : 4 (class 7);  2: leaf class 5
+        classifier = make_classifier([1, 3, -1, -1, -1], [2, 4, -1, -1, -1], [0, 1, -2, -2, -2],
+                                     [0.5, 0.5, -2, -2, -2], {2: 0, 3: 1, 4: 1}, [5, 7])
+        tree = CompactTree.from_sklearn(classifier)
+        self.assertEqual(tree.node_count, 3)
+        self.assertEqual(tree.used_features, [0])
+        self.assertEqual(tree.predict([{}, {0: 1}, {1: 1}, {0: 1, 1: 1}]), [7, 5, 7, 5])
+
+    def test_leaf_distributions(self) -> None:
+        # 0: f0 <= 0.5 ? 1 : 2;  1: f1 <= 0.5 ? 3 : 4, both mostly class 7;  2: mostly class 5
+        classifier = make_classifier([1, 3, -1, -1, -1], [2, 4, -1, -1, -1], [0, 1, -2, -2, -2],
+                                     [0.5, 0.5, -2, -2, -2], {}, [5, 7, 9])
+        classifier.tree_.value[2][0] = [3, 1, 0]
+        classifier.tree_.value[3][0] = [1, 3, 0]
+        classifier.tree_.value[4][0] = [0, 2, 2]
+        tree = CompactTree.from_sklearn(classifier)
+        self.assertEqual(tree.node_count, 3)
+        self.assertEqual(tree.classes_, (5, 7, 9))
+        # the collapsed leaf holds the words of both sklearn leaves
+        self.assertEqual(tree.predict_proba([{}, {0: 1}]), [[1 / 8, 5 / 8, 2 / 8], [3 / 4, 1 / 4, 0.0]])
+        self.assertEqual(tree.remap_features({0: 1}).predict_proba([{1: 1}]), [[3 / 4, 1 / 4, 0.0]])
+        restored = pickle.loads(pickle.dumps(tree))
+        self.assertEqual(restored.predict_proba([{}]), tree.predict_proba([{}]))
+        plain = CompactTree(*tree.arrays)
+        self.assertIsNone(plain.classes_)
+        self.assertRaises(ValueError, plain.predict_proba, [{}])
+
+    def test_drop_implied_tests(self) -> None:
+        # 0: f0 <= 2.5 ? 1 : 2;  1: f0 <= 4.5 (always true here) ? 3 (class 1) : 4 (class 2);  2: leaf class 0
+        classifier = make_classifier([1, 3, -1, -1, -1], [2, 4, -1, -1, -1], [0, 0, -2, -2, -2],
+                                     [2.5, 4.5, -2, -2, -2], {2: 0, 3: 1, 4: 2}, [0, 1, 2])
+        tree = CompactTree.from_sklearn(classifier)
+        self.assertEqual(tree.node_count, 3)
+        self.assertEqual(tree.predict([{0: 2}, {0: 3}, {0: 5}]), [1, 0, 0])
+
+    def test_remap_features(self) -> None:
+        tree = CompactTree([3, LEAF, LEAF], [0, 1, 2], [1, 0, 0], [2, 0, 0]).remap_features({3: 0})
+        self.assertEqual(tree.used_features, [0])
+        self.assertEqual(tree.predict([{0: 1}, {3: 1}]), [2, 1])
+        self.assertRaises(ValueError, CompactTree, [], [], [], [])
+
+
+class CompactForestTests(unittest.TestCase):
+
+    def test_votes(self) -> None:
+        # the first tree splits f0 <= 0.5 into class 5 and 7, the second always gives 7 and the third splits f1 the
+        # other way round
+        trees = [make_classifier([1, -1, -1], [2, -1, -1], [0, -2, -2], [0.5, -2, -2], {1: 0, 2: 1}, [5, 7]),
+                 make_classifier([-1], [-1], [-2], [-2], {0: 1}, [5, 7]),
+                 make_classifier([1, -1, -1], [2, -1, -1], [1, -2, -2], [0.5, -2, -2], {1: 1, 2: 0}, [5, 7])]
+        forest = CompactForest.from_sklearn(SimpleNamespace(estimators_=trees, classes_=numpy.array([5, 7])))
+        self.assertEqual((forest.tree_count, forest.node_count), (3, 7))
+        self.assertEqual(forest.used_features, [0, 1])
+        self.assertEqual(forest.predict([{}, {0: 1}, {1: 1}, {0: 1, 1: 1}]), [7, 7, 5, 7])
+        # the first two trees tie on f0 = 0, then the first class wins
+        pair = CompactForest.from_sklearn(SimpleNamespace(estimators_=trees[:2], classes_=numpy.array([5, 7])))
+        self.assertEqual(pair.predict([{}, {0: 1}]), [5, 7])
+        self.assertEqual(forest.predict_proba([{1: 1}]), [[2 / 3, 1 / 3]])
+        self.assertEqual(forest.remap_features({0: 1, 1: 0}).predict([{0: 1}]), [5])
+        self.assertRaises(ValueError, CompactForest, [], [], [], [], [], [0], [], [], [])
+
+    def test_same_predictions_as_sklearn(self) -> None:
+        base_words = [word_tuple[0] for word_tuple in CompactModelTests.WORD_TUPLES]
+        encoder, x_data = training.extract_features(base_words)
+        results = training.train_targets(CompactModelTests.WORD_TUPLES, x_data, backend="forest", forest_size=8)
+        model = training.build_model(par.StripProcessor(), encoder, ["pp", "pret"], results)
+        compacted, report = compact_model(model, base_words)
+        self.assertEqual(report.nodes_before, sum(e.tree_.node_count for _, f in results for e in f.estimators_))
+        self.assertLess(report.bytes_after, report.bytes_before)
+        words = base_words + ["biegen", "lachen", "x"]
+        for t, (_, forest) in enumerate(results):
+            self.assertEqual(compacted.classifiers[t].predict(compacted.encoder.transform(words)),
+                             sklearn_predict(forest, encoder.transform(words)))
+            self.assertEqual(compacted.classifiers[t].tree_count, 8)
+
+
+class CompactModelTests(unittest.TestCase):
+
+    WORD_TUPLES = [("liegen", "gelegen", "lag"), ("fliegen", "geflogen", "flog"), ("wiegen", "gewogen", "wog"),
+                   ("machen", "gemacht", "machte"), ("sagen", "gesagt", "sagte"), ("studieren", "studiert", "studierte")]
+
+    def test_compact_model(self) -> None:
+        base_words = [word_tuple[0] for word_tuple in self.WORD_TUPLES]
+        for feature_mode in ["onehot", "ordinal"]:
+            encoder, x_data = training.extract_features(base_words, training.make_encoder(feature_mode))
+            results = training.train_targets(self.WORD_TUPLES, x_data)
+            model = training.build_model(par.StripProcessor(), encoder, ["pp", "pret"], results)
+            compacted, report = compact_model(model, base_words)
+            self.assertLess(report.features_after, report.features_before)
+            self.assertLess(report.bytes_after, report.bytes_before)
+            self.assertEqual(compacted.encoder.feature_count, report.features_after)
+            for word in base_words + ["biegen", "lachen", "x"]:
+                for t in range(2):
+                    self.assertEqual(compacted.predict_class(compacted.encode(word), t), model.predict_class(model.encode(word), t))
+            # top k predictions rank the classes by the distribution of the leaf, not only by the training counts
+            rows = compacted.encoder.transform(base_words + ["biegen", "lachen", "x"])
+            for t in range(2):
+                for scores, c in zip(compacted.class_scores(rows, t), compacted.classifiers[t].predict(rows)):
+                    self.assertAlmostEqual(sum(scores.values()), 1.0)
+                    self.assertEqual(max(scores, key=scores.get), c)
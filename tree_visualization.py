@@ -14,49 +14,28 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-from typing import List
-
-import graphviz
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.feature_extraction import DictVectorizer
+from typing import Sequence
 
 from input_parsing import WordProcessor
-from training_data_structures import Cluster
+from training_data_structures import FrozenCluster
 
 __all__ = ["visualize_tree"]
 
 
-def make_leaf_label(class_index: int, clusters: List[Cluster], input_processor: WordProcessor) -> str:
+def make_leaf_label(class_index: int, clusters: Sequence[FrozenCluster], input_processor: WordProcessor) -> str:
     cluster = clusters[class_index]
     transf = cluster.transformation
-    training_instance = cluster.items.pop()
+    training_instance = cluster.items[0]
     return "{}\n e.g. {} -> {}\n(applies to {} instances)".format(
         input_processor.process_output(str(transf).replace(",",",\n")),
         input_processor.process_output(training_instance.word_a),
         input_processor.process_output(training_instance.word_b),
-        len(cluster.items)
+        len(cluster)
     )
 
 
-def count_suffix(nr) -> str:
-    if nr % 10 == 1 and nr != 11:
-        return "1st"
-    elif nr % 10 == 2 and nr != 12:
-        return "2nd"
-    elif nr % 10 == 3 and nr != 13:
-        return "3rd"
-    else:
-        return "{}th".format(nr)
-
-
-def make_node_label(feature: int, vectorizer: DictVectorizer) -> str:
-    feature_name = vectorizer.get_feature_names()[feature]
-    a = feature_name.split(vectorizer.separator)
-    if a[0] == "length":
-        return "<word length dependence>"
-    ind = int(a[0])
-    char = a[1]
-    return "is {} letter from {} a {}?".format(count_suffix(ind+1) if ind >= 0 else count_suffix(-ind), "front" if ind >= 0 else "back", char)
+def make_node_label(feature: int, threshold: float, encoder) -> str:
+    return encoder.describe_split(feature, threshold)
 
 background_colors = [
     "FF0000", "00FF00", "0000FF", "FFFF00", "FF00FF", "00FFFF",
@@ -70,12 +49,13 @@ background_colors = [
 ]
 
 
-def visualize_tree(classifier: DecisionTreeClassifier,
+def visualize_tree(classifier,
                    input_processor: WordProcessor,
-                   vectorizer: DictVectorizer,
-                   clusters: List[Cluster],
+                   encoder,
+                   clusters: Sequence[FrozenCluster],
                    file_name: str,
                    format: str = "svg") -> None:
+    import graphviz # imported on demand, as it is only required for visualizations
     tree = classifier.tree_
     graph = graphviz.Digraph(format=format)
     graph.node_attr.update(shape="box", style="rounded, filled", color="black", fontname="helvetica")
@@ -88,7 +68,7 @@ def visualize_tree(classifier: DecisionTreeClassifier,
             graph.node(str(i), label="{}".format(make_leaf_label(c, clusters, input_processor)), fillcolor="#" + background_colors[c] + "AA",
                        margin="0.2")
         else:
-            graph.node(str(i), label="{}".format(make_node_label(tree.feature[i], vectorizer)), fillcolor="#FFFFFFFF")
+            graph.node(str(i), label="{}".format(make_node_label(tree.feature[i], tree.threshold[i], encoder)), fillcolor="#FFFFFFFF")
             graph.edge(str(i), str(tree.children_left[i]), label="False", labeldistance="2.5")
             graph.edge(str(i), str(tree.children_right[i]), label="True", labeldistance="2.5")
     graph.render(file_name)
@@ -14,9 +14,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-from typing import List, Tuple, TypeVar, Optional
+from typing import Iterable, Iterator, List, Tuple, TypeVar, Optional
 import abc
-from functools import reduce
+
+from alphabet import Alphabet
 
 MutableMatrix = List[List[int]]
 Matrix = Tuple[Tuple[int]]
@@ -136,10 +137,15 @@ class IntervalPairBuilder:
 
 class LCSMatrix:
 
-    def __init__(self, word_a: str, word_b: str) -> None:
+    def __init__(self, word_a: str, word_b: str, matrix: Optional[Matrix] = None) -> None:
+        # a matrix computed elsewhere (e.g. by batch_alignment) may be passed in instead of computing it here
         self.__word_a = word_a
         self.__word_b = word_b
-        self.__matrix = self.__compute_lcs_matrix(self.__word_a, self.__word_b)
+        if matrix is None:
+            matrix = self.__compute_lcs_matrix(self.__word_a, self.__word_b)
+        elif len(matrix) != len(word_a) + 1 or any(len(row) != len(word_b) + 1 for row in matrix):
+            raise ValueError("LCS matrix does not match the lengths of <{}> and <{}>".format(word_a, word_b))
+        self.__matrix = matrix
 
     @staticmethod
     def __compute_lcs_matrix(word_a: str, word_b: str) -> Matrix:
@@ -175,6 +181,104 @@ class LCSMatrix:
         return self.matrix[-1][-1]
 
 
+def traceback_step(word_a: str, word_b: str, i: int, j: int, row_above: List[int], row: List[int]) -> Tuple[int, int]:
+    # one step back from (i, j) through the LCS matrix, which only requires its rows i - 1 and i
+    if word_a[i - 1] == word_b[j - 1]:
+        return i - 1, j - 1
+    # prioritizing delete steps in draws gives more favorable results. but always?
+    # it splits "liegen" and "gelegen" into |  |l|i|egen|
+    #                                       |ge|l| |egen|
+    # instead of | li|egen|
+    #            |gel|egen|
+    step, _ = indmin([row_above[j], row_above[j - 1], row[j - 1]])
+    assert (step in range(0, 4))
+    if step == 0:  # delete step
+        return i - 1, j
+    elif step == 1:  # edit step
+        return i - 1, j - 1
+    return i, j - 1  # insert step
+
+
+def traceback_path(word_a: str, word_b: str, lcs_matrix: Matrix) -> Iterator[Tuple[int, int]]:
+    # the positions visited when tracing back from the end of both words until one of them is exhausted
+    i, j = len(word_a), len(word_b)
+    yield i, j
+    while i > 0 and j > 0:
+        i, j = traceback_step(word_a, word_b, i, j, lcs_matrix[i - 1], lcs_matrix[i])
+        yield i, j
+
+
+def lcs_row(word_a: str, word_b: str, row_above: List[int], i: int) -> List[int]:
+    # row i of the LCS matrix, computed from row i - 1 with the same costs as LCSMatrix
+    row = [i] * (len(word_b) + 1)
+    letter = word_a[i - 1]
+    for j in range(1, len(word_b) + 1):
+        step_cost = 0 if letter == word_b[j - 1] else 1
+        row[j] = min(row_above[j - 1] + step_cost, row[j - 1] + 1, row_above[j] + 1)
+    return row
+
+
+LINEAR_SPACE_BLOCK_ROWS = 16
+
+
+def __trace_segment(word_a: str, word_b: str, lo: int, row_lo: List[int], hi: int, path: List[Tuple[int, int]]) -> None:
+    # continues the path, which is at row hi, until it reaches row lo or column 0. the rows in between are recomputed
+    # from row lo: directly for short segments, otherwise the lower half is traced first from the recomputed middle
+    # row and the upper half afterwards, so that only O(log(rows)) rows are kept at any time
+    i, j = path[-1]
+    if i == lo or j == 0:
+        return
+    if hi - lo <= LINEAR_SPACE_BLOCK_ROWS:
+        rows = [row_lo]
+        for r in range(lo + 1, hi + 1):
+            rows.append(lcs_row(word_a, word_b, rows[-1], r))
+        while i > lo and j > 0:
+            i, j = traceback_step(word_a, word_b, i, j, rows[i - 1 - lo], rows[i - lo])
+            path.append((i, j))
+        return
+    mid = (lo + hi) // 2
+    row_mid = row_lo
+    for r in range(lo + 1, mid + 1):
+        row_mid = lcs_row(word_a, word_b, row_mid, r)
+    __trace_segment(word_a, word_b, mid, row_mid, hi, path)
+    __trace_segment(word_a, word_b, lo, row_lo, mid, path)
+
+
+def linear_space_path(word_a: str, word_b: str) -> List[Tuple[int, int]]:
+    # the same path as traceback_path, without keeping the whole LCS matrix in memory (divide and conquer over rows)
+    path = [(len(word_a), len(word_b))]
+    __trace_segment(word_a, word_b, 0, list(range(len(word_b) + 1)), len(word_a), path)
+    return path
+
+
+def intervals_from_path(word_a: str, word_b: str, path: Iterable[Tuple[int, int]]) -> Tuple[IntervalPair]:
+    intervals = []
+    interval_pair_builder = IntervalPairBuilder() # allows us to conveniently keep track of last interval borders and build intervals sequentially
+    interval_pair_builder.set_end_a(len(word_a))
+    interval_pair_builder.set_end_b(len(word_b))
+    last_letter_common = word_a[-1] == word_b[-1]
+    if last_letter_common:
+        interval_pair_builder.set_common()
+    path = iter(path)
+    i, j = next(path)
+    for next_i, next_j in path:
+        current_letter_common = (word_a[i - 1] == word_b[j - 1])
+        if current_letter_common != last_letter_common:
+            interval_pair_builder.set_start_a(i)
+            interval_pair_builder.set_start_b(j)
+            intervals.append(interval_pair_builder.build())
+            interval_pair_builder.prepare_next()
+        last_letter_common = current_letter_common
+        i, j = next_i, next_j
+    interval_pair_builder.set_start_a(i)
+    interval_pair_builder.set_start_b(j)
+    intervals.append(interval_pair_builder.build())
+    if (i > 0 or j > 0) and last_letter_common:
+        interval_pair_builder.prepare_next()
+        intervals.append(interval_pair_builder.build())
+    return tuple(reversed(intervals))
+
+
 class WordSubsequenceIntervals:
 
     def __init__(self, word_pair_lcs_matrix: LCSMatrix) -> None:
@@ -186,50 +290,21 @@ class WordSubsequenceIntervals:
     def __get_common_subsequence_intervals(word_pair_lcs_matrix: LCSMatrix) -> Tuple[IntervalPair]:
         word_a = word_pair_lcs_matrix.word_a
         word_b = word_pair_lcs_matrix.word_b
-        lcs_matrix = word_pair_lcs_matrix.matrix
-        intervals = []
-        interval_pair_builder = IntervalPairBuilder() # allows us to conveniently keep track of last interval borders and build intervals sequentially
-        interval_pair_builder.set_end_a(len(word_a))
-        interval_pair_builder.set_end_b(len(word_b))
-        last_letter_common = word_a[-1] == word_b[-1]
-        if last_letter_common:
-            interval_pair_builder.set_common()
-        i, j = len(word_a), len(word_b)
-        while i > 0 and j > 0:
-            old_i = i
-            old_j = j
-            current_letter_common = (word_a[i - 1] == word_b[j - 1])
-            if current_letter_common:
-                i = i - 1
-                j = j - 1
-            else:
-                # prioritizing delete steps in draws gives more favorable results. but always?
-                # it splits "liegen" and "gelegen" into |  |l|i|egen|
-                #                                       |ge|l| |egen|
-                # instead of | li|egen|
-                #            |gel|egen|
-                step, _ = indmin([lcs_matrix[i - 1][j], lcs_matrix[i - 1][j - 1], lcs_matrix[i][j - 1]])
-                assert (step in range(0, 4))
-                if step == 0:  # delete step
-                    i = i - 1
-                elif step == 1:  # edit step
-                    i = i - 1
-                    j = j - 1
-                elif step == 2:  # insert step
-                    j = j - 1
-            if current_letter_common != last_letter_common:
-                interval_pair_builder.set_start_a(old_i)
-                interval_pair_builder.set_start_b(old_j)
-                intervals.append(interval_pair_builder.build())
-                interval_pair_builder.prepare_next()
-            last_letter_common = current_letter_common
-        interval_pair_builder.set_start_a(i)
-        interval_pair_builder.set_start_b(j)
-        intervals.append(interval_pair_builder.build())
-        if (i > 0 or j > 0) and last_letter_common:
-            interval_pair_builder.prepare_next()
-            intervals.append(interval_pair_builder.build())
-        return tuple(reversed(intervals))
+        return intervals_from_path(word_a, word_b, traceback_path(word_a, word_b, word_pair_lcs_matrix.matrix))
+
+    @classmethod
+    def from_intervals(cls, word_a: str, word_b: str, intervals: Tuple[IntervalPair]) -> "WordSubsequenceIntervals":
+        # wraps intervals that were extracted elsewhere, e.g. from the int coded words of an Alphabet
+        result = cls.__new__(cls)
+        result.__word_a = word_a
+        result.__word_b = word_b
+        result.__intervals = intervals
+        return result
+
+    @classmethod
+    def in_linear_space(cls, word_a: str, word_b: str) -> "WordSubsequenceIntervals":
+        # same result as WordSubsequenceIntervals(LCSMatrix(word_a, word_b)) without building the whole LCS matrix
+        return cls.from_intervals(word_a, word_b, intervals_from_path(word_a, word_b, linear_space_path(word_a, word_b)))
 
     @property
     def word_a(self) -> str:
@@ -271,6 +346,13 @@ class WordTransformation(metaclass=abc.ABCMeta):
         transformed, _ = self.apply_step("", transformee)
         return transformed
 
+    @property
+    @abc.abstractmethod
+    def join_key(self) -> Tuple[Tuple[str, str], ...]:
+        # the (replaced, insertee) pair of every edit step in order. joins only shorten pre patterns, so joinable
+        # transformations and the result of joining them always have equal keys
+        pass
+
     @abc.abstractmethod
     def maybe_joinable(self, other: "WordTransformation") -> bool:
         pass
@@ -297,6 +379,18 @@ class EditTransformation(WordTransformation):
             )
         return (transformed + transformee[:i] + self.__pre_pattern + self.__insertee), transformee[i + length:]
 
+    @property
+    def pre_pattern(self) -> str:
+        return self.__pre_pattern
+
+    @property
+    def replaced(self) -> str:
+        return self.__replaced
+
+    @property
+    def insertee(self) -> str:
+        return self.__insertee
+
     def __eq__(self, other) -> bool:
         if not isinstance(other, EditTransformation): return False
         return (
@@ -322,8 +416,12 @@ class EditTransformation(WordTransformation):
             replace_part = "leave it"
         return (find_part + replace_part).format(self.__pre_pattern, self.__replaced, self.__insertee)
 
+    @property
+    def join_key(self) -> Tuple[Tuple[str, str], ...]:
+        return ((self.__replaced, self.__insertee),)
+
     def __hash__(self) -> int:
-        return 11 * hash(self.__replaced) ^ 23 * hash(self.__insertee)
+        return hash(self.join_key)
 
     def maybe_joinable(self, other: WordTransformation) -> bool:
         if not isinstance(other, WordTransformation): return False
@@ -356,6 +454,10 @@ class WordTransformationSequence(WordTransformation):
             transformed, transformee = transformation.apply_step(transformed, transformee)
         return transformed, transformee
 
+    @property
+    def transformations(self) -> Tuple[WordTransformation, ...]:
+        return self.__transformations
+
     def __eq__(self, other) -> bool:
         if not isinstance(other, WordTransformationSequence): return False
         return other.__transformations == self.__transformations
@@ -366,8 +468,12 @@ class WordTransformationSequence(WordTransformation):
     def __repr__(self) -> str:
         return str.join("", (repr(transf) for transf in self.__transformations))
 
+    @property
+    def join_key(self) -> Tuple[Tuple[str, str], ...]:
+        return tuple(key for transformation in self.__transformations for key in transformation.join_key)
+
     def __hash__(self) -> int:
-        return reduce(lambda a, b: hash(a) ^ hash(b), self.__transformations, 0)
+        return hash(self.join_key)
 
     def maybe_joinable(self, other: WordTransformation) -> bool:
         if not isinstance(other, WordTransformation): return False
@@ -417,8 +523,24 @@ def build_word_transformation(subsequence_intervals: WordSubsequenceIntervals) -
         transforms.append(EditTransformation(pre_pattern, "", ""))
     return WordTransformationSequence(transforms)
 
-def analyze_word_pair(word_a: str, word_b: str) -> WordTransformation:
-    lcs_matrix = LCSMatrix(word_a, word_b)
-    subsequence_intervals = WordSubsequenceIntervals(lcs_matrix)
+LINEAR_SPACE_THRESHOLD = 128
+
+
+def align_word_pair(word_a: str, word_b: str, linear_space_threshold: Optional[int] = None,
+                    alphabet: Optional[Alphabet] = None) -> WordSubsequenceIntervals:
+    # words longer than the threshold (default: LINEAR_SPACE_THRESHOLD) are aligned without the full LCS matrix. with an
+    # alphabet, the int coded words are aligned and only the resulting intervals refer back to the strings
+    if alphabet is not None:
+        coded = align_word_pair(alphabet.encode_known(word_a), alphabet.encode_known(word_b), linear_space_threshold)
+        return WordSubsequenceIntervals.from_intervals(word_a, word_b, coded.intervals)
+    if linear_space_threshold is None:
+        linear_space_threshold = LINEAR_SPACE_THRESHOLD
+    if max(len(word_a), len(word_b)) > linear_space_threshold:
+        return WordSubsequenceIntervals.in_linear_space(word_a, word_b)
+    return WordSubsequenceIntervals(LCSMatrix(word_a, word_b))
+
+
+def analyze_word_pair(word_a: str, word_b: str, alphabet: Optional[Alphabet] = None) -> WordTransformation:
+    subsequence_intervals = align_word_pair(word_a, word_b, alphabet=alphabet)
     transformation = build_word_transformation(subsequence_intervals)
     return transformation
\ No newline at end of file
@@ -150,6 +150,40 @@ class LCSMatrixTests(unittest.TestCase):
         self.__lcs_matrix_test_worker(word_a, word_b, expected)
 
 
+class LinearSpaceAlignmentTests(unittest.TestCase):
+
+    @staticmethod
+    def matrix_intervals(word_a: str, word_b: str) -> Tuple[word_analysis.IntervalPair]:
+        return word_analysis.WordSubsequenceIntervals(word_analysis.LCSMatrix(word_a, word_b)).intervals
+
+    def test_same_intervals_as_matrix_traceback(self) -> None:
+        import benchmark_corpus
+        pairs = benchmark_corpus.generate_word_pairs(500, seed=3)
+        pairs += [("liegen", "gelegen"), ("halloh", "hello"), ("a", "b"), ("asdf", "asdf"), ("fasd", "asdf")]
+        for word_a, word_b in pairs:
+            linear = word_analysis.WordSubsequenceIntervals.in_linear_space(word_a, word_b)
+            self.assertEqual(self.matrix_intervals(word_a, word_b), linear.intervals)
+            self.assertEqual(word_a, linear.word_a)
+            self.assertEqual(word_b, linear.word_b)
+
+    def test_same_intervals_for_long_words(self) -> None:
+        import random
+        rng = random.Random(0)
+        for alphabet in ["ab", "abcd", "abcdefghijkl"]:
+            for _ in range(20):
+                word_a = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 150)))
+                word_b = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 150)))
+                linear = word_analysis.WordSubsequenceIntervals.in_linear_space(word_a, word_b)
+                self.assertEqual(self.matrix_intervals(word_a, word_b), linear.intervals)
+
+    def test_align_word_pair_threshold(self) -> None:
+        word_a = "ab" * 40
+        word_b = "ba" * 45
+        expected = self.matrix_intervals(word_a, word_b)
+        self.assertEqual(expected, word_analysis.align_word_pair(word_a, word_b, linear_space_threshold=10).intervals)
+        self.assertEqual(expected, word_analysis.align_word_pair(word_a, word_b, linear_space_threshold=1000).intervals)
+
+
 class EditTransformationTests(unittest.TestCase):
 
     def test_apply_insert(self) -> None:
@@ -422,4 +456,22 @@ class TransformationSequenceTests(unittest.TestCase):
         self.assertEquals(expected34, joined43)
 
         joined11 = transf1.join(transf1)
-        self.assertEquals(transf1, joined11)
\ No newline at end of file
+        self.assertEquals(transf1, joined11)
+
+    def test_join_key(self) -> None:
+        subt1 = word_analysis.EditTransformation("abc", "", "ge")
+        subt2 = word_analysis.EditTransformation("dc", "", "ge")
+        subt3 = word_analysis.EditTransformation("hef", "ghi", "asdf")
+        transf1 = word_analysis.WordTransformationSequence([subt3, subt1])
+        transf2 = word_analysis.WordTransformationSequence([subt3, subt2])
+        self.assertEqual(transf1.join_key, (("ghi", "asdf"), ("", "ge")))
+        self.assertEqual(transf1.join_key, transf2.join_key)
+        self.assertEqual(transf1.join(transf2).join_key, transf1.join_key)
+        self.assertEqual(word_analysis.WordTransformationSequence([subt1]).join_key, subt1.join_key)
+        self.assertNotEqual(word_analysis.WordTransformationSequence([subt1, subt3]).join_key, transf1.join_key)
+
+    def test_hash_of_repeated_steps(self) -> None:
+        # equal steps used to cancel each other in the hash
+        repeated = word_analysis.analyze_word_pair("lesen", "lasan")
+        self.assertEqual(repeated.join_key, (("e", "a"), ("e", "a"), ("", "")))
+        self.assertNotEqual(hash(repeated), hash(word_analysis.analyze_word_pair("lesen", "lesen")))
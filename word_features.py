@@ -0,0 +1,273 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from alphabet import Alphabet
+
+Features = Dict[Union[str, int], Union[str, int]]
+
+
+def word_features(word: str) -> Features:
+    # one-hot style features: every letter is indexed from the front (0, 1, ...) and from the back (-1, -2, ...)
+    features = dict() # type: Features
+    length = len(word)
+    features["length"] = length
+    for i in range(length):
+        features[i] = word[i]
+        features[i - length] = word[i]
+    return features
+
+
+def count_suffix(nr) -> str:
+    # 11th, 12th and 13th (also 111th, ...) take "th" despite their last digit
+    if nr % 100 in (11, 12, 13):
+        return "{}th".format(nr)
+    elif nr % 10 == 1:
+        return "{}st".format(nr)
+    elif nr % 10 == 2:
+        return "{}nd".format(nr)
+    elif nr % 10 == 3:
+        return "{}rd".format(nr)
+    else:
+        return "{}th".format(nr)
+
+
+def describe_position(position: int) -> str:
+    return "{} letter from {}".format(count_suffix(position + 1) if position >= 0 else count_suffix(-position),
+                                      "front" if position >= 0 else "back")
+
+
+class OneHotFeatureEncoder:
+
+    # one column per (position, letter) combination, as produced by a DictVectorizer on word_features
+
+    def __init__(self, vectorizer) -> None:
+        self.__vectorizer = vectorizer
+
+    @property
+    def vectorizer(self):
+        return self.__vectorizer
+
+    @property
+    def feature_count(self) -> int:
+        return len(self.__vectorizer.vocabulary_)
+
+    def fit(self, words: Iterable[str]) -> "OneHotFeatureEncoder":
+        # words may be any iterable, e.g. a stream of words read from disk
+        self.__vectorizer.fit(word_features(word) for word in words)
+        return self
+
+    def fit_transform(self, words: Sequence[str]):
+        return self.__vectorizer.fit_transform(word_features(word) for word in words)
+
+    def transform(self, words: Sequence[str]):
+        return self.__vectorizer.transform([word_features(word) for word in words])
+
+    def describe_split(self, feature: int, threshold: float) -> str:
+        return describe_one_hot_split(self.__vectorizer.get_feature_names()[feature], self.__vectorizer.separator)
+
+    def compact(self, features: Sequence[int]) -> "CompactOneHotEncoder":
+        feature_names = self.__vectorizer.get_feature_names()
+        return CompactOneHotEncoder([feature_names[f] for f in features], self.__vectorizer.separator)
+
+
+def describe_one_hot_split(feature_name: str, separator: str) -> str:
+    a = feature_name.split(separator)
+    if a[0] == "length":
+        return "<word length dependence>"
+    return "is {} a {}?".format(describe_position(int(a[0])), a[1])
+
+
+class CompactOneHotEncoder:
+
+    # the one-hot encoding restricted to the given feature names, encoding words as dicts of feature id -> value
+    # without requiring sklearn
+
+    def __init__(self, feature_names: Sequence[str], separator: str = "=") -> None:
+        self.__feature_names = tuple(feature_names)
+        self.__separator = separator
+        self.__vocabulary = {name: i for i, name in enumerate(self.__feature_names)}
+
+    @property
+    def feature_count(self) -> int:
+        return len(self.__feature_names)
+
+    def encode(self, word: str) -> Dict[int, int]:
+        vocabulary = self.__vocabulary
+        row = dict()
+        for key, value in word_features(word).items():
+            if isinstance(value, str):
+                f = vocabulary.get("{}{}{}".format(key, self.__separator, value))
+                value = 1
+            else:
+                f = vocabulary.get(str(key))
+            if f is not None:
+                row[f] = value
+        return row
+
+    def transform(self, words: Sequence[str]) -> List[Dict[int, int]]:
+        return [self.encode(word) for word in words]
+
+    def describe_split(self, feature: int, threshold: float) -> str:
+        return describe_one_hot_split(self.__feature_names[feature], self.__separator)
+
+
+class OrdinalFeatureEncoder:
+
+    # a fixed number of integer coded columns: the letters at the front positions 0..k-1, the letters at the back
+    # positions -1..-k and the word length. each position has its own letter codes, ordered by how often the letter
+    # occurs there in the training words; 0 stands for "no letter" and the highest code for letters never seen there.
+    # with an alphabet, which must contain all training letters, words are int coded first and every position maps
+    # alphabet codes to its letter codes with a table instead of a dict. the features are the same.
+
+    def __init__(self, positions: int = 8, alphabet: Optional[Alphabet] = None) -> None:
+        if positions < 1:
+            raise ValueError("OrdinalFeatureEncoder requires at least one position")
+        self.__positions = tuple(range(positions)) + tuple(range(-1, -positions - 1, -1))
+        self.__codes = [dict() for _ in self.__positions] # type: List[Dict[str, int]]
+        self.__letters = [[] for _ in self.__positions] # type: List[List[str]]
+        self.__alphabet = alphabet
+        self.__tables = [] # type: List[array]
+
+    def __setstate__(self, state: dict) -> None:
+        # encoders stored before alphabets were introduced lack them
+        self.__dict__.update(state)
+        self.__alphabet = state.get("_OrdinalFeatureEncoder__alphabet")
+        self.__tables = state.get("_OrdinalFeatureEncoder__tables", [])
+
+    @property
+    def alphabet(self) -> Optional[Alphabet]:
+        return self.__alphabet
+
+    @property
+    def positions(self) -> Sequence[int]:
+        return self.__positions
+
+    @property
+    def feature_count(self) -> int:
+        return len(self.__positions) + 1
+
+    def __letters_at(self, word: str):
+        length = len(word)
+        for column, position in enumerate(self.__positions):
+            if -length <= position < length:
+                yield column, word[position]
+
+    def fit(self, words: Sequence[str]) -> "OrdinalFeatureEncoder":
+        alphabet = self.__alphabet
+        if alphabet is not None:
+            words = (alphabet.encode_known(word) for word in words)
+        counts = [Counter() for _ in self.__positions]
+        for word in words:
+            for column, letter in self.__letters_at(word):
+                counts[column][letter] += 1
+        self.__tables = []
+        for column, counter in enumerate(counts):
+            # ties are broken by the letter itself to keep the codes independent of the input order. alphabet codes
+            # are ordered like their letters
+            letters = sorted(counter, key=lambda letter: (-counter[letter], letter))
+            if alphabet is not None:
+                table = array("i", [len(letters) + 1] * (len(alphabet) + 1))
+                for code, letter in enumerate(letters):
+                    table[letter] = code + 1
+                self.__tables.append(table)
+                letters = [alphabet.letter_of(letter) for letter in letters]
+            self.__letters[column] = letters
+            self.__codes[column] = {letter: code + 1 for code, letter in enumerate(letters)}
+        return self
+
+    def encode(self, word: str) -> List[int]:
+        if self.__alphabet is not None:
+            return self.encode_coded(self.__alphabet.encode(word))
+        row = [0] * self.feature_count
+        for column, letter in self.__letters_at(word):
+            codes = self.__codes[column]
+            row[column] = codes.get(letter, len(codes) + 1)
+        row[-1] = len(word)
+        return row
+
+    def encode_coded(self, word: Sequence[int]) -> List[int]:
+        # encodes a word coded by the alphabet of this encoder, letters outside the alphabet count as never seen
+        tables = self.__tables
+        row = [0] * self.feature_count
+        length = len(word)
+        for column, position in enumerate(self.__positions):
+            if -length <= position < length:
+                row[column] = tables[column][word[position]]
+        row[-1] = length
+        return row
+
+    def transform(self, words: Sequence[str]) -> List[List[int]]:
+        return [self.encode(word) for word in words]
+
+    def fit_transform(self, words: Sequence[str]) -> List[List[int]]:
+        return self.fit(words).transform(words)
+
+    def describe_split(self, feature: int, threshold: float) -> str:
+        # describes the condition for taking the right ("True") branch, i.e. code > threshold
+        if feature == len(self.__positions):
+            return "is the word longer than {} letters?".format(int(threshold))
+        letters = ["(none)"] + self.__letters[feature] + ["(other)"]
+        below = letters[:int(threshold) + 1]
+        above = letters[int(threshold) + 1:]
+        position = describe_position(self.__positions[feature])
+        if len(above) <= len(below):
+            return "is {} one of {}?".format(position, ", ".join(above))
+        return "is {} none of {}?".format(position, ", ".join(below))
+
+    def compact(self, features: Sequence[int]) -> "CompactOrdinalEncoder":
+        return CompactOrdinalEncoder(self, features)
+
+
+class CompactOrdinalEncoder:
+
+    # the ordinal encoding restricted to the given columns, encoding words as dicts of feature id -> value
+
+    def __init__(self, encoder: OrdinalFeatureEncoder, columns: Sequence[int]) -> None:
+        self.__encoder = encoder
+        self.__columns = tuple(columns)
+
+    @property
+    def feature_count(self) -> int:
+        return len(self.__columns)
+
+    def encode(self, word: str) -> Dict[int, int]:
+        row = self.__encoder.encode(word)
+        return {f: row[column] for f, column in enumerate(self.__columns)}
+
+    def transform(self, words: Sequence[str]) -> List[Dict[int, int]]:
+        return [self.encode(word) for word in words]
+
+    def describe_split(self, feature: int, threshold: float) -> str:
+        return self.__encoder.describe_split(self.__columns[feature], threshold)
+
+
+class PlainWordEncoder:
+
+    # passes the words on unchanged, for classifiers that work on the words themselves (e.g. SuffixTrieClassifier)
+
+    @property
+    def feature_count(self) -> int:
+        return 1
+
+    def transform(self, words: Sequence[str]) -> List[str]:
+        return list(words)
+
+    def fit_transform(self, words: Sequence[str]) -> List[str]:
+        return self.transform(words)
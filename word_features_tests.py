@@ -0,0 +1,54 @@
+# pywords - A machine learning implementation for words transformations in natural languages (e.g. verb conjugations) using decision trees
+# Copyright (C) 2017  Lukas Prediger <lukas.prediger@rwth-aachen.>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+import word_features
+
+
+class WordFeaturesTests(unittest.TestCase):
+
+    def test_word_features(self) -> None:
+        expected = {"length": 3, 0: "f", 1: "o", 2: "x", -3: "f", -2: "o", -1: "x"}
+        self.assertEqual(word_features.word_features("fox"), expected)
+
+    def test_count_suffix(self) -> None:
+        self.assertEqual([word_features.count_suffix(nr) for nr in [1, 2, 3, 4, 11, 12, 13, 21, 22, 23, 101, 111, 112, 113]],
+                         ["1st", "2nd", "3rd", "4th", "11th", "12th", "13th", "21st", "22nd", "23rd", "101st", "111th",
+                          "112th", "113th"])
+        self.assertEqual(word_features.describe_position(-22), "22nd letter from back")
+
+
+class OrdinalFeatureEncoderTests(unittest.TestCase):
+
+    def test_encode(self) -> None:
+        encoder = word_features.OrdinalFeatureEncoder(positions=2).fit(["liegen", "lagen", "sagt"])
+        self.assertEqual(encoder.positions, (0, 1, -1, -2))
+        # front 0: l (2x) < s, front 1: a (2x) < i, back -1: n (2x) < t, back -2: e (2x) < g
+        self.assertEqual(encoder.encode("liegen"), [1, 2, 1, 1, 6])
+        self.assertEqual(encoder.encode("sagt"), [2, 1, 2, 2, 4])
+        self.assertEqual(encoder.encode("x"), [3, 0, 3, 0, 1])
+        self.assertEqual(encoder.encode(""), [0, 0, 0, 0, 0])
+
+    def test_describe_split(self) -> None:
+        encoder = word_features.OrdinalFeatureEncoder(positions=2).fit(["liegen", "lagen", "sagt", "sehen", "tun"])
+        self.assertEqual(encoder.describe_split(0, 1.5), "is 1st letter from front none of (none), l?")
+        self.assertEqual(encoder.describe_split(2, 0.5), "is 1st letter from back none of (none)?")
+        self.assertEqual(encoder.describe_split(3, 2.5), "is 2nd letter from back one of u, (other)?")
+        self.assertEqual(encoder.describe_split(4, 4.5), "is the word longer than 4 letters?")
+
+    def test_invalid_positions(self) -> None:
+        self.assertRaises(ValueError, word_features.OrdinalFeatureEncoder, 0)